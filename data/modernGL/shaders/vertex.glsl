@@ -1,8 +1,11 @@
 #version 330
 
 uniform mat4 model;
-uniform mat4 view;
-uniform mat4 proj;
+// Written once per frame by ShaderProgram.write_camera and shared by every program
+layout(std140) uniform Camera {
+    mat4 view;
+    mat4 proj;
+};
 uniform float uv_scale;
 
 in vec3 in_position;
@@ -0,0 +1,20 @@
+#version 330
+
+// Written once per frame by ShaderProgram.write_camera and shared by every program
+layout(std140) uniform Camera {
+    mat4 view;
+    mat4 proj;
+};
+uniform float uv_scale;
+
+in vec3 in_position;
+in vec2 in_texcoord_0;
+// Per-instance model matrix, one per SceneObject in the batch
+in mat4 in_model;
+
+out vec2 v_uv;
+
+void main() {
+    v_uv = in_texcoord_0 * uv_scale;
+    gl_Position = proj * view * in_model * vec4(in_position, 1.0);
+}
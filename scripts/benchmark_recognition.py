@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import contextlib
+import argparse
+import cv2
+import numpy as np
+from src.deploy import load_gesture_predictor, load_eager_predictor
+from src.frame_source import open_frame_source, list_recordings
+from src.hand_roi import HandRoiTracker
+from src.scheduler import InferenceScheduler
+from src.features import featurizer_for, landmarks_to_array
+from src.pipeline import PipelineStats
+
+STAGES = ("decode", "convert", "landmarks", "classify")
+DEFAULT_SOURCE = os.path.join("data", "video_samples")
+
+
+def load_classifier(weights: str):
+    """The fastest exported variant, else the eager weights, else None (landmarks only)"""
+    predictor = load_gesture_predictor() or load_eager_predictor(weights)
+    if predictor is None:
+        print(f"No export and no {weights}, only landmarks are benchmarked")
+    return predictor
+
+
+def landmark_errors(landmarks, reference):
+    """Matches every reference hand to the nearest hand by wrist position.
+
+    Returns:
+        list: Mean x/y distance over the 21 landmarks of every matched hand, in normalized image units
+    """
+    errors = []
+    unmatched = list(range(len(landmarks)))
+    for hand in reference:
+        if not unmatched:
+            break
+        nearest = min(unmatched, key=lambda i: np.linalg.norm(landmarks[i, 0, :2] - hand[0, :2]))
+        unmatched.remove(nearest)
+        errors.append(float(np.linalg.norm(landmarks[nearest, :, :2] - hand[:, :2], axis=1).mean()))
+    return errors
+
+
+def replay(recording, hands, classifier, stats, realtime=False, max_frames=None, roi_tracker=None,
+           scheduler=None, reference=None):
+    """Runs one recording through decode, colour conversion, MediaPipe and the classifier. With a
+    scheduler, skipped frames classify the extrapolated landmarks instead.
+
+    With a reference Hands, every frame also runs full-frame detection (untimed, excluded from the wall
+    time), and the landmarks of --roi / --adaptive are compared against it.
+
+    Returns:
+        dict: frames, frames with at least one hand, hands and wall time of the replay, plus the frames
+            whose hand count agreed with the reference and the landmark errors of the matched hands
+    """
+    frames = detected = num_hands = 0
+    agreed, errors = 0, []
+    featurizer = featurizer_for(classifier)
+    start = time.perf_counter()
+
+    def compare(frame, landmarks):
+        nonlocal agreed, start
+        compare_started = time.perf_counter()
+        expected = landmarks_to_array(reference.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).multi_hand_landmarks)
+        agreed += len(expected) == len(landmarks)
+        errors.extend(landmark_errors(landmarks, expected))
+        start += time.perf_counter() - compare_started
+    with open_frame_source(recording, realtime=realtime) as source:
+        while max_frames is None or frames < max_frames:
+            with stats["decode"].time():
+                ok, frame = source.read()
+            if not ok:
+                break
+            # Source time keeps the motion gating independent of the replay speed
+            if scheduler is not None and not scheduler.should_detect(frame, source.timestamp):
+                landmarks = scheduler.estimate(source.timestamp)[0]
+                if reference is not None:
+                    compare(frame, landmarks)
+                if classifier is not None and len(landmarks):
+                    with stats["classify"].time():
+                        classifier(featurizer(landmarks)).argmax(axis=1)
+                stats.tick()
+                frames += 1
+                detected += bool(len(landmarks))
+                num_hands += len(landmarks)
+                continue
+            started = time.perf_counter()
+            if roi_tracker is not None:
+                # Cropping and conversion happen inside the tracker, they count as landmark time
+                with stats["landmarks"].time():
+                    results = roi_tracker.process(hands, frame)
+            else:
+                with stats["convert"].time():
+                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                with stats["landmarks"].time():
+                    results = hands.process(frame_rgb)
+            hand_list = results.multi_hand_landmarks or []
+            batch = landmarks_to_array(hand_list)
+            if reference is not None:
+                compare(frame, batch)
+            if scheduler is not None:
+                scheduler.update(source.timestamp, batch,
+                                 [h.classification[0].label for h in results.multi_handedness or []],
+                                 time.perf_counter() - started)
+            if classifier is not None and hand_list:
+                with stats["classify"].time():
+                    classifier(featurizer(batch)).argmax(axis=1)
+            stats.tick()
+            frames += 1
+            detected += bool(hand_list)
+            num_hands += len(hand_list)
+    counts = {"frames": frames, "detected_frames": detected, "hands": num_hands,
+              "wall_s": time.perf_counter() - start}
+    if reference is not None:
+        counts.update(reference_agreed=agreed, landmark_errors=errors)
+    return counts
+
+
+def summarize(counts, stats) -> dict:
+    frames = counts["frames"]
+    summary = {
+        **{key: value for key, value in counts.items() if key != "landmark_errors"},
+        "throughput_fps": frames / counts["wall_s"] if counts["wall_s"] > 0 else 0.0,
+        "detection_rate": counts["detected_frames"] / frames if frames else 0.0,
+        "hands_per_frame": counts["hands"] / frames if frames else 0.0,
+        "stages": {name: stats[name].summary() for name in STAGES},
+    }
+    if "landmark_errors" in counts:
+        errors = np.array(counts["landmark_errors"])
+        summary["reference"] = {
+            "agreement": counts["reference_agreed"] / frames if frames else 0.0,
+            "matched_hands": len(errors),
+            "mean_error": float(errors.mean()) if len(errors) else 0.0,
+            "p95_error": float(np.percentile(errors, 95)) if len(errors) else 0.0,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recordings through the recognition pipeline and time every stage")
+    parser.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="Video file, image directory, or a directory of recordings")
+    parser.add_argument("--realtime", action="store_true", help="Replay at the recorded pace instead of as fast as possible")
+    parser.add_argument("--max-frames", type=int, default=None, help="Frames per recording")
+    parser.add_argument("--max-num-hands", type=int, default=2)
+    parser.add_argument("--roi", action="store_true", help="Detect hands in a tracked crop (src/hand_roi.py)")
+    parser.add_argument("--roi-max-side", type=int, default=None, help="With --roi, downscale larger crops")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Skip detection on still frames with an InferenceScheduler (src/scheduler.py)")
+    parser.add_argument("--target-fps", type=float, default=None, help="Scheduler detection limit, implies --adaptive")
+    parser.add_argument("--cpu-budget", type=float, default=None, help="Scheduler CPU share, implies --adaptive")
+    parser.add_argument("--reference", action="store_true",
+                        help="Compare the landmarks with full-frame detection on every frame (untimed), "
+                             "to measure what --roi / --adaptive cost in accuracy")
+    parser.add_argument("--no-classifier", action="store_true", help="Only time landmark extraction")
+    parser.add_argument("--weights", default="gesture_classifier_weights.pth",
+                        help="Eager weights used when nothing was exported")
+    parser.add_argument("--json", default=None, help="Write the results to this JSON file ('-' for stdout)")
+    args = parser.parse_args()
+
+    recordings = list_recordings(args.source)
+    if not recordings:
+        raise SystemExit(f"No video files or image directories found in {args.source}")
+
+    import mediapipe as mp
+    classifier = None if args.no_classifier else load_classifier(args.weights)
+    adaptive = args.adaptive or args.target_fps or args.cpu_budget
+    results = {"source": args.source, "realtime": args.realtime, "roi": args.roi, "adaptive": bool(adaptive),
+               "classifier": getattr(classifier, "name", None), "recordings": {}}
+    totals = {"frames": 0, "detected_frames": 0, "hands": 0, "wall_s": 0.0}
+    if args.reference:
+        totals.update(reference_agreed=0, landmark_errors=[])
+    overall = PipelineStats(*STAGES, window=1_000_000)
+    for recording in recordings:
+        stats = PipelineStats(*STAGES, window=1_000_000)
+        # A fresh Hands per recording, so tracking state never leaks from one clip into the next
+        with mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=args.max_num_hands,
+                                      min_detection_confidence=0.5, min_tracking_confidence=0.5) as hands, \
+                (mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=args.max_num_hands,
+                                          min_detection_confidence=0.5, min_tracking_confidence=0.5)
+                 if args.reference else contextlib.nullcontext()) as reference:
+            roi_tracker = HandRoiTracker(max_side=args.roi_max_side) if args.roi else None
+            scheduler = InferenceScheduler(target_fps=args.target_fps, cpu_budget=args.cpu_budget) if adaptive else None
+            counts = replay(recording, hands, classifier, stats, args.realtime, args.max_frames, roi_tracker,
+                            scheduler, reference)
+        results["recordings"][recording] = summarize(counts, stats)
+        if roi_tracker is not None:
+            results["recordings"][recording]["roi_pixel_ratio"] = roi_tracker.pixel_ratio()
+            results["recordings"][recording]["roi_region_changes"] = roi_tracker.region_changes
+        if scheduler is not None:
+            results["recordings"][recording]["detect_ratio"] = scheduler.detect_ratio()
+        for key in totals:
+            totals[key] += counts[key]
+        for name in STAGES:
+            for sample in stats[name].samples:
+                overall[name].record(sample)
+    results["overall"] = summarize(totals, overall)
+
+    if args.json == "-":
+        print(json.dumps(results, indent=2))
+        return
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    for name, r in list(results["recordings"].items()) + [("overall", results["overall"])]:
+        print(f"{name}: {r['frames']} frames, {r['throughput_fps']:.1f} fps, "
+              f"detection rate {r['detection_rate']:.1%}, {r['hands_per_frame']:.2f} hands/frame")
+        if "reference" in r:
+            ref = r["reference"]
+            print(f"  vs full frame: hand count agrees on {ref['agreement']:.1%} of frames, landmark error "
+                  f"mean {ref['mean_error']:.4f} p95 {ref['p95_error']:.4f} over {ref['matched_hands']} hands")
+    print(f"{'stage':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, s in results["overall"]["stages"].items():
+        print(f"{name:>10} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import sys
+import json
+import math
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESOURCE_DIR = REPO_ROOT / "data" / "modernGL"
+# The scene modules import each other by bare module name, as when src/scene.py is run directly
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import moderngl
+import moderngl_window as mglw
+from pyrr import Matrix44
+from asset_cache import AssetCache
+from frustum import Frustum
+from instanced_renderer import InstancedRenderer
+from orbit_camera import OrbitCamera
+from profiler import FrameProfiler
+from render_queue import RenderQueue
+from scene_object import SceneObject
+from shader_program import ShaderProgram
+
+# mesh name -> (obj file, texture, uniform scale on the benchmark grid)
+ASSETS = {
+    "bunny": ("models/bunny.obj", "textures/bunny.jpg", 1.0),
+    "crate": ("models/crate.obj", "textures/crate.jpg", 0.2),
+}
+
+
+def create_context(backend: str = None) -> moderngl.Context:
+    """Standalone GL 3.3 context without a window. Falls back to EGL, which also works with Mesa's
+    software rasteriser on machines without a display.
+    """
+    backends = [backend] if backend else [None, "egl"]
+    for i, name in enumerate(backends):
+        try:
+            kwargs = {"backend": name} if name else {}
+            return moderngl.create_standalone_context(require=330, **kwargs)
+        except Exception:
+            if i == len(backends) - 1:
+                raise
+
+
+def triangle_count(vao) -> int:
+    return vao._index_buffer.size // vao._index_element_size // 3
+
+
+def build_scene(ctx, shader_program, meshes, num_objects, instanced, lod=False):
+    """Loads the assets through the AssetCache and lays num_objects out on a grid over the floor. With lod
+    the meshes are loaded with their levels of detail and culled against the view frustum.
+
+    Returns:
+        (objects, submit) where submit(queue, frustum) queues the frame's draws and returns
+        (triangles, culled objects)
+    """
+    assets = AssetCache(ctx, RESOURCE_DIR)
+    loaded = []
+    for name in meshes:
+        obj_path, texture_path, scale = ASSETS[name]
+        if not (RESOURCE_DIR / obj_path).exists():
+            print(f"{obj_path} not found, skipping {name}")
+            continue
+        mesh = assets.load_mesh_lods(obj_path) if lod else assets.load_mesh(obj_path)
+        loaded.append((mesh, assets.load_texture(texture_path), scale))
+    if not loaded:
+        raise FileNotFoundError(f"None of the meshes {meshes} exist in {RESOURCE_DIR / 'models'}")
+
+    side = max(1, math.ceil(math.sqrt(num_objects)))
+    spacing = 8.0 / side
+    objects = []
+    for i in range(num_objects):
+        mesh, texture, scale = loaded[i % len(loaded)]
+        obj = SceneObject(None, texture, lod=mesh) if lod else SceneObject(mesh, texture)
+        obj.position = [(i % side + 0.5) * spacing - 4.0, 0.0, (i // side + 0.5) * spacing - 4.0]
+        obj.scale = [scale, scale, scale]
+        objects.append(obj)
+
+    floor = SceneObject(assets.load_mesh("models/floor.obj"), assets.load_texture("textures/tile_floor.jpg"))
+    floor.position = [0, -0.01, 0]
+
+    if instanced:
+        prog = shader_program.load_shader(
+            "instanced", RESOURCE_DIR / "shaders" / "vertex_instanced.glsl", RESOURCE_DIR / "shaders" / "fragment.glsl")
+        renderer = InstancedRenderer(ctx, prog)
+        for obj in objects:
+            renderer.add(obj)
+        renderer.add(floor, uv_scale=1)
+
+        def submit(queue, frustum):
+            renderer.set_frustum(frustum)
+            renderer.submit(queue)
+            return renderer.triangles, renderer.culled
+        return objects, submit
+
+    prog = shader_program.load_shader(
+        "crate", RESOURCE_DIR / "shaders" / "vertex.glsl", RESOURCE_DIR / "shaders" / "fragment.glsl")
+
+    def submit(queue, frustum):
+        triangles = culled = 0
+        for obj in objects + [floor]:
+            item = obj.draw_item(prog, uv_scale=1, frustum=frustum)
+            if item is None:
+                culled += 1
+                continue
+            queue.submit(item)
+            triangles += triangle_count(item.vao)
+        return triangles, culled
+    return objects, submit
+
+
+def percentiles_ms(samples) -> dict:
+    ms = np.asarray(samples, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"mean": float(ms.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(ms.max())}
+
+
+def run(args) -> dict:
+    ctx = create_context(args.backend)
+    mglw.activate_context(ctx=ctx)
+    width, height = args.size
+    fbo = ctx.simple_framebuffer((width, height))
+    fbo.use()
+
+    shader_program = ShaderProgram(ctx)
+    load_start = time.perf_counter()
+    objects, submit = build_scene(ctx, shader_program, args.meshes, args.objects, not args.no_instancing, args.lod)
+    load_s = time.perf_counter() - load_start
+
+    profiler = FrameProfiler(ctx, enabled=args.gpu_timers)
+    queue = RenderQueue(shader_program, profiler=profiler)
+    cam = OrbitCamera(radius=args.radius, pitch=args.pitch)
+    proj = Matrix44.perspective_projection(fovy=45.0, aspect=width / height, near=0.1, far=100.0, dtype='f4')
+    moving = objects[:int(len(objects) * args.moving)]
+
+    total = args.warmup + args.frames
+    frame_times, submit_times = [], []
+    stats_sum = {}
+    for frame in range(total):
+        start = time.perf_counter()
+        profiler.begin_frame()
+        # Scripted camera: args.orbits full revolutions with a slow pitch sweep
+        cam.rotate(360.0 * args.orbits / total, 0.0)
+        cam.pitch = args.pitch + 15.0 * math.sin(2 * math.pi * frame / total)
+        for obj in moving:
+            obj.rotation[1] += 2.0
+
+        ctx.clear(0.1, 0.1, 0.1)
+        ctx.enable(ctx.DEPTH_TEST)
+        view = cam.get_view_matrix()
+        queue.set_camera(view, proj)
+        triangles, culled = submit(queue, Frustum(view, proj, height) if args.lod else None)
+        submitted = time.perf_counter()
+        stats = queue.flush()
+        stats.update(triangles=triangles, culled=culled)
+        # Wait for the rasteriser so the frame time includes the GPU (or llvmpipe) work
+        ctx.finish()
+        profiler.end_frame()
+        end = time.perf_counter()
+
+        if frame >= args.warmup:
+            frame_times.append(end - start)
+            submit_times.append(submitted - start)
+            for key, value in stats.items():
+                stats_sum[key] = stats_sum.get(key, 0) + value
+    profiler.set_enabled(False)
+
+    return {
+        "renderer": ctx.info["GL_RENDERER"],
+        "size": [width, height],
+        "objects": len(objects),
+        "moving": len(moving),
+        "instanced": not args.no_instancing,
+        "lod": args.lod,
+        "frames": args.frames,
+        "load_s": load_s,
+        "frame_ms": percentiles_ms(frame_times),
+        "cpu_submit_ms": percentiles_ms(submit_times),
+        "fps": float(len(frame_times) / sum(frame_times)),
+        "per_frame": {key: value / args.frames for key, value in stats_sum.items()},
+        "gpu_ms": {name: {k: v for k, v in timer.summary().items() if k != "count"}
+                   for name, timer in profiler.gpu_timers.items()},
+    }
+
+
+def parse_size(value: str):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless render benchmark of the Scene draw path")
+    parser.add_argument("--objects", type=int, default=100, help="Number of SceneObjects besides the floor")
+    parser.add_argument("--meshes", nargs="+", default=["bunny", "crate"], choices=sorted(ASSETS),
+                        help="Meshes the objects cycle through")
+    parser.add_argument("--frames", type=int, default=600, help="Measured frames")
+    parser.add_argument("--warmup", type=int, default=60, help="Frames rendered before measuring")
+    parser.add_argument("--size", type=parse_size, default=(1024, 768), help="Framebuffer size, e.g. 1024x768")
+    parser.add_argument("--orbits", type=float, default=2.0, help="Camera revolutions over the run")
+    parser.add_argument("--radius", type=float, default=8.0, help="Orbit radius")
+    parser.add_argument("--pitch", type=float, default=25.0, help="Mean orbit pitch in degrees")
+    parser.add_argument("--moving", type=float, default=0.1, help="Fraction of objects spinning every frame")
+    parser.add_argument("--no-instancing", action="store_true", help="Draw every object with its own draw call")
+    parser.add_argument("--lod", action="store_true",
+                        help="Load meshes with their levels of detail and cull them against the view frustum")
+    parser.add_argument("--gpu-timers", action="store_true", help="Time every draw with GL timer queries")
+    parser.add_argument("--backend", default=None, help="moderngl standalone backend, e.g. egl")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    print(f"{results['renderer']} {results['size'][0]}x{results['size'][1]}, {results['objects']} objects "
+          f"({results['moving']} moving), instanced={results['instanced']}, lod={results['lod']}, assets loaded in {results['load_s']:.2f} s")
+    print(f"{'':>12} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for key in ("frame_ms", "cpu_submit_ms"):
+        r = results[key]
+        print(f"{key:>12} {r['mean']:8.2f} {r['p50']:8.2f} {r['p95']:8.2f} {r['p99']:8.2f} {r['max']:8.2f}")
+    print(f"fps {results['fps']:.1f}  " + "  ".join(f"{key} {value:.1f}" for key, value in results["per_frame"].items()))
+    for name, r in results["gpu_ms"].items():
+        print(f"gpu {name}: p50 {r['p50_ms']:.2f} ms  p95 {r['p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
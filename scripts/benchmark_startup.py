@@ -0,0 +1,91 @@
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Each snippet runs in a fresh interpreter: import, load the model and classify one hand
+CHILD_PRELUDE = """
+import sys, time, json, resource
+start = time.perf_counter()
+import numpy as np
+"""
+
+CHILD_REPORT = """
+from src.features import featurizer_for
+logits = predict(featurizer_for(predict)(np.random.rand(1, 63).astype(np.float32)))
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is in bytes on macOS and kilobytes elsewhere
+rss_mb = rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({"load_s": elapsed, "peak_rss_mb": rss_mb, "torch_imported": "torch" in sys.modules}))
+"""
+
+BACKENDS = {
+    # The current path: eager GestureClassifier rebuilt from the .pth weights and their sidecar, or an
+    # untrained default one without weights
+    "eager": """
+from src.deploy import load_eager_predictor, TorchPredictor
+predict = load_eager_predictor({weights!r}) if {weights!r} else None
+if predict is None:
+    from src.model import GestureClassifier, CLASS_NAMES
+    predict = TorchPredictor(GestureClassifier(num_classes=len(CLASS_NAMES)).eval())
+""",
+    "torchscript": """
+from src.deploy import load_gesture_predictor
+predict = load_gesture_predictor({model_dir!r}, "fp32")
+""",
+    "numpy": """
+from src.deploy import load_gesture_predictor
+predict = load_gesture_predictor({model_dir!r}, "numpy")
+""",
+}
+
+
+def run_backend(name, model_dir, weights):
+    code = CHILD_PRELUDE + BACKENDS[name].format(model_dir=model_dir, weights=weights) + CHILD_REPORT
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{name} backend failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["process_wall_s"] = wall
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare cold-start time and memory of the inference backends")
+    parser.add_argument("--model-dir", default=str(REPO_ROOT / "models" / "final"),
+                        help="Directory written by scripts/export.py")
+    parser.add_argument("--weights", default="gesture_classifier_weights.pth",
+                        help="Eager weights for the baseline, skipped if the file does not exist")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per backend, the best run is kept")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    # The children run in REPO_ROOT, so they get an absolute path: relative to the current directory,
+    # else to the repository
+    weights = ""
+    for candidate in (Path(args.weights).resolve(), REPO_ROOT / args.weights):
+        if candidate.exists():
+            weights = str(candidate)
+            break
+    results = {}
+    for name in BACKENDS:
+        runs = [run_backend(name, args.model_dir, weights) for _ in range(args.runs)]
+        results[name] = min(runs, key=lambda run: run["process_wall_s"])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':>12} {'wall s':>8} {'load s':>8} {'peak RSS MB':>12} {'torch':>6}")
+    for name, r in results.items():
+        print(f"{name:>12} {r['process_wall_s']:8.2f} {r['load_s']:8.2f} {r['peak_rss_mb']:12.1f} {str(r['torch_imported']):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESOURCE_DIR = REPO_ROOT / "data" / "modernGL"
+# The scene modules import each other by bare module name, as when src/scene.py is run directly
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from asset_cache import AssetCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precomputes the simplified levels of detail of the scene meshes "
+                                                 "into the asset cache, so the scene never builds them at startup")
+    parser.add_argument("meshes", nargs="*", default=["models/bunny.obj"],
+                        help="OBJ files relative to the resource directory")
+    parser.add_argument("--levels", type=int, default=4, help="Levels including the full mesh")
+    parser.add_argument("--resource-dir", type=Path, default=RESOURCE_DIR)
+    args = parser.parse_args()
+
+    # No GL context: the levels are only written to the cache, Scene uploads them when it loads the mesh
+    assets = AssetCache(None, args.resource_dir)
+    for mesh in args.meshes:
+        start = time.perf_counter()
+        meta = assets.build_mesh_lods(mesh, args.levels)
+        elapsed = time.perf_counter() - start
+        print(f"{mesh}: bounding sphere radius {meta['radius']:.3f}, "
+              f"{'cached' if assets.hits else f'built in {elapsed:.2f} s'}")
+        for level, info in enumerate(meta["levels"]):
+            print(f"  lod{level}: {info['indices'] // 3:8d} triangles {info['vertices']:8d} vertices  "
+                  f"error {info['error']:.4f}")
+        assets.hits = assets.misses = 0
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,417 @@
+import time
+import argparse
+import threading
+import copy
+from types import SimpleNamespace
 import cv2
 import mediapipe as mp
-import torch
 import numpy as np
-from src.model import GestureClassifier
-
-# Load your trained model weights
-num_classes = 4  # We will adjust trhis as we increase the number of gestures
-model = GestureClassifier(num_classes=num_classes)
-model.load_state_dict(torch.load("gesture_classifier_weights.pth", map_location=torch.device('cpu')))
-model.eval()  # Set to evaluation mode
+from src.temporal import StreamingGestureRecognizer
+from src.deploy import load_gesture_predictor, load_eager_predictor
+from src.pipeline import LatestValueQueue, PipelineStats
+from src.frame_source import open_frame_source
+from src.landmark_log import LandmarkLogWriter
+from src.hand_roi import HandRoiTracker
+from src.scheduler import InferenceScheduler
+from src.gesture_index import GestureIndex, DEFAULT_INDEX_PATH
+from src.features import featurizer_for, landmarks_to_array, read_weights_spec
+from src.gesture_service import GestureServiceClient, DEFAULT_ADDRESS, draw_gestures
 
+# The classifier (the MLP or a k-NN index), set up by main() for the mode it runs in
+model = None
+# Turns landmarks into the inputs the model was trained on
+featurizer = None
 # Define a mapping from class indices to gesture names
-class_names = {3: "swipe_right", 1: "none", 0: "hold", 2: "scale"} # This will also get adjusted as we add more gestures
+class_names = {}
 
 # Set up MediaPipe Hands for video stream (for multi-hand detection)
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=2,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5
-)
+def create_hands():
+    # Each camera stream needs its own Hands instance because it keeps tracking state between frames
+    return mp_hands.Hands(
+        static_image_mode=False,
+        max_num_hands=2,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+hands = create_hands()
 mp_drawing = mp.solutions.drawing_utils
 
-# Open video stream using OpenCV
-cap = cv2.VideoCapture(1)
+# One StreamingGestureRecognizer per camera stream when running with --temporal
+temporal_recognizers = None
+# LandmarkLogWriter for the first stream when running with --record
+recorder = None
+# One HandRoiTracker per camera stream when running with --roi
+roi_trackers = None
+# One InferenceScheduler per camera stream when running with --adaptive, with the last detected results
+schedulers = None
+last_results = None
+
+
+def load_mlp():
+    """
+    Loads the fastest model exported by scripts/export.py. torch is only imported
+    when that is a TorchScript variant or when we fall back to your trained model weights.
+    """
+    predictor = load_gesture_predictor() or load_eager_predictor("gesture_classifier_weights.pth")
+    if predictor is None:
+        raise SystemExit("No exported model and no gesture_classifier_weights.pth, run scripts/train.py first")
+    return predictor
+
+
+# ----- Per-frame stages -----
+def landmarks_to_batch(hand_landmarks_list):
+    """Stacks the landmarks of H hands into an (H, 21, 3) float32 array."""
+    return landmarks_to_array(hand_landmarks_list)
+
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame.")
-        break
+def classify_landmarks(hand_landmarks_list):
+    """
+    Classifies every hand in hand_landmarks_list with a single forward pass.
+    The landmarks of all H hands are featurized as one batch.
+    Returns the gesture names in the same order as the input.
+    """
+    if not hand_landmarks_list:
+        return []
+    batch = landmarks_to_batch(hand_landmarks_list)
+    # Run inference
+    outputs = model(featurizer(batch))
+    predicted = outputs.argmax(axis=1).tolist()
+    return [class_names.get(predicted_class, "Unknown") for predicted_class in predicted]
 
+
+def classify_temporal(results, recognizer):
+    """
+    Advances the streaming temporal model of every hand in results by one frame.
+    Hands are tracked by handedness, so each keeps its own landmark history.
+    """
+    hand_list = results.multi_hand_landmarks or []
+    hand_ids = [h.classification[0].label for h in results.multi_handedness or []]
+    gestures = recognizer.update(hand_ids, landmarks_to_batch(hand_list))
+    return [gesture or "..." for gesture in gestures]
+
+
+def estimated_results(previous, landmarks):
+    """
+    Results for a frame the scheduler skipped: copies of the last detected hands
+    moved to the extrapolated landmarks, so drawing and classification work unchanged.
+    """
+    hand_list = copy.deepcopy(list(previous.multi_hand_landmarks or []))
+    for hand_landmarks, points in zip(hand_list, landmarks):
+        for lm, (x, y, z) in zip(hand_landmarks.landmark, points):
+            lm.x, lm.y, lm.z = float(x), float(y), float(z)
+    return SimpleNamespace(multi_hand_landmarks=hand_list or None,
+                           multi_handedness=previous.multi_handedness, estimated=True)
+
+
+def detect_hands(i, frame, stream_hand_model):
+    """Runs MediaPipe on the frame of stream i, through its HandRoiTracker with --roi."""
+    if roi_trackers is not None:
+        # Only the region around last frame's hands is converted and searched
+        return roi_trackers[i].process(stream_hand_model, frame)
     # Convert frame from BGR to RGB
     frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(frame_rgb)
-
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            # Draw landmarks on the frame
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            # Extract landmarks and flatten them into a 63-dimensional vector
-            landmarks = []
-            for lm in hand_landmarks.landmark:
-                landmarks.extend([lm.x, lm.y, lm.z])
-            landmarks = np.array(landmarks, dtype=np.float32)
-            # Convert to PyTorch tensor and add batch dimension
-            input_tensor = torch.tensor(landmarks).unsqueeze(0)
-            # Run inference
-            with torch.no_grad():
-                outputs = model(input_tensor)
-                predicted_class = torch.argmax(outputs, dim=1).item()
-            gesture_name = class_names.get(predicted_class, "Unknown")
-            # Get position to display the gesture (using wrist landmark)
-            h, w, _ = frame.shape
-            wrist = hand_landmarks.landmark[0]
-            cx, cy = int(wrist.x * w), int(wrist.y * h)
-            cv2.putText(frame, gesture_name, (cx, cy - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-            print(f"Predicted Gesture: {gesture_name}")
-
-    # Display the video stream
-    cv2.imshow("Gesture Recognition", frame)
-
-    # Press 'Esc' key to exit
-    if cv2.waitKey(1) & 0xFF == 27:
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+    return stream_hand_model.process(frame_rgb)
+
+
+def recognize_streams(frames, stream_hands):
+    """
+    Runs MediaPipe on one frame per camera stream, then classifies the hands
+    from every stream together in one batch.
+    Returns a list with (results, predictions) per stream, where predictions
+    is a list of (hand_landmarks, gesture_name) pairs.
+    """
+    all_results = []
+    all_hands = []
+    for i, (frame, stream_hand_model) in enumerate(zip(frames, stream_hands)):
+        if schedulers is None:
+            results = detect_hands(i, frame, stream_hand_model)
+        else:
+            # Still frames and frames over the budget reuse the last hands at extrapolated positions
+            now = time.perf_counter()
+            if last_results[i] is None or schedulers[i].should_detect(frame, now):
+                results = detect_hands(i, frame, stream_hand_model)
+                handedness = [h.classification[0].label for h in results.multi_handedness or []]
+                schedulers[i].update(now, landmarks_to_batch(results.multi_hand_landmarks or []), handedness,
+                                     time.perf_counter() - now)
+                last_results[i] = results
+            else:
+                results = estimated_results(last_results[i], schedulers[i].estimate(now)[0])
+        all_results.append(results)
+        all_hands.extend(results.multi_hand_landmarks or [])
+
+    if temporal_recognizers is not None:
+        gesture_names = iter([name for results, recognizer in zip(all_results, temporal_recognizers)
+                              for name in classify_temporal(results, recognizer)])
+    else:
+        gesture_names = iter(classify_landmarks(all_hands))
+    # Map the batched predictions back to the hand (and stream) they came from
+    return [(results, [(hand_landmarks, next(gesture_names)) for hand_landmarks in results.multi_hand_landmarks or []])
+            for results in all_results]
+
+
+def recognize(frame):
+    """
+    Runs MediaPipe and the classifier on a BGR frame.
+    Returns (results, predictions) where predictions is a list of
+    (hand_landmarks, gesture_name) pairs.
+    """
+    return recognize_streams([frame], [hands])[0]
+
+
+def record_results(results, captured_at):
+    """Appends the landmarks, handedness and scores of one MediaPipe result to the landmark log."""
+    if getattr(results, "estimated", False):
+        # Only detected frames are recorded
+        return
+    handedness = [h.classification[0] for h in results.multi_handedness or []]
+    recorder.write(captured_at, landmarks_to_batch(results.multi_hand_landmarks or []),
+                   [h.label for h in handedness], [h.score for h in handedness])
+
+
+def draw_predictions(frame, predictions):
+    """Draws landmarks and gesture labels onto the frame in place."""
+    h, w, _ = frame.shape
+    for hand_landmarks, gesture_name in predictions:
+        # Draw landmarks on the frame
+        mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+        # Get position to display the gesture (using wrist landmark)
+        wrist = hand_landmarks.landmark[0]
+        cx, cy = int(wrist.x * w), int(wrist.y * h)
+        cv2.putText(frame, gesture_name, (cx, cy - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        print(f"Predicted Gesture: {gesture_name}")
+
+
+# ----- Sequential loop: every stage runs back to back -----
+def run_sequential(caps, stats, report_every):
+    # One Hands instance per stream, all hands are classified together
+    stream_hands = [hands] + [create_hands() for _ in caps[1:]]
+    last_report = time.perf_counter()
+    while True:
+        with stats["capture"].time():
+            grabbed = [cap.read() for cap in caps]
+        if not all(ret for ret, _ in grabbed):
+            print("Failed to grab frame.")
+            break
+        frames = [frame for _, frame in grabbed]
+        captured_at = time.perf_counter()
+
+        with stats["inference"].time():
+            recognized = recognize_streams(frames, stream_hands)
+        if recorder is not None:
+            record_results(recognized[0][0], captured_at)
+
+        with stats["display"].time():
+            for i, (frame, (_, predictions)) in enumerate(zip(frames, recognized)):
+                draw_predictions(frame, predictions)
+                # Display the video stream
+                cv2.imshow("Gesture Recognition" if i == 0 else f"Gesture Recognition {i}", frame)
+            # Press 'Esc' key to exit
+            key = cv2.waitKey(1) & 0xFF
+        stats["glass_to_label"].record(time.perf_counter() - captured_at)
+        stats.tick()
+
+        if report_every and time.perf_counter() - last_report > report_every:
+            print(stats.report())
+            last_report = time.perf_counter()
+        if key == 27:
+            break
+
+
+# ----- Pipelined loop: capture, inference and display overlap -----
+def capture_stage(cap, frames, stats, stop):
+    """Reads frames as fast as the camera delivers them. Stale frames are dropped by the queue."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        ret, frame = cap.read()
+        stats["capture"].record(time.perf_counter() - start)
+        if not ret:
+            print("Failed to grab frame.")
+            break
+        frames.put((time.perf_counter(), frame))
+    stop.set()
+    frames.close()
+
+
+def inference_stage(frames, results_queue, stats, stop):
+    """Recognizes gestures on the freshest captured frame."""
+    while not stop.is_set():
+        item = frames.get(timeout=0.1)
+        if item is None:
+            continue
+        captured_at, frame = item
+        with stats["inference"].time():
+            results, predictions = recognize(frame)
+        if recorder is not None:
+            record_results(results, captured_at)
+        results_queue.put((captured_at, frame, predictions))
+    results_queue.close()
+
+
+def run_pipelined(cap, stats, report_every):
+    # OpenCV windows must stay on the main thread, so display runs here
+    frames = LatestValueQueue()
+    results_queue = LatestValueQueue()
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=capture_stage, args=(cap, frames, stats, stop), daemon=True),
+        threading.Thread(target=inference_stage, args=(frames, results_queue, stats, stop), daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+
+    last_report = time.perf_counter()
+    while not stop.is_set():
+        item = results_queue.get(timeout=0.1)
+        if item is not None:
+            captured_at, frame, predictions = item
+            with stats["display"].time():
+                draw_predictions(frame, predictions)
+                cv2.imshow("Gesture Recognition", frame)
+            stats["glass_to_label"].record(time.perf_counter() - captured_at)
+            stats.tick()
+
+        # Press 'Esc' key to exit
+        if cv2.waitKey(1) & 0xFF == 27:
+            break
+        if report_every and time.perf_counter() - last_report > report_every:
+            print(stats.report())
+            print(f"{'dropped':>14}: {frames.dropped} captured, {results_queue.dropped} recognized")
+            last_report = time.perf_counter()
+
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=1.0)
+
+
+# ----- Service loop: a running recognition service does the capture and recognition -----
+def run_service(client, stats, report_every):
+    """Displays the shared frames and gestures of src/gesture_service.py. Nothing is recognized here."""
+    last_report = time.perf_counter()
+    while True:
+        event = client.events.poll()
+        if event is not None:
+            with stats["capture"].time():
+                # Straight from the service's shared memory, None if it was already overwritten
+                frame = client.frame(event.frame)
+            if frame is not None:
+                with stats["display"].time():
+                    draw_gestures(frame, event.landmarks, event.gestures)
+                    cv2.imshow("Gesture Recognition", frame)
+                stats["glass_to_label"].record(time.perf_counter() - event.timestamp)
+                stats.tick()
+
+        # Press 'Esc' key to exit
+        if cv2.waitKey(1) & 0xFF == 27:
+            break
+        if report_every and time.perf_counter() - last_report > report_every:
+            print(stats.report())
+            last_report = time.perf_counter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live gesture recognition from a webcam or a recording")
+    parser.add_argument("--camera", nargs="+", default=["1"],
+                        help="OpenCV camera index, video file or image directory; several sources have their "
+                             "hands classified in one batch")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Play recordings at their recorded pace instead of as fast as possible")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Run capture, inference and display on separate threads")
+    parser.add_argument("--temporal", metavar="WEIGHTS",
+                        help="Recognize motion gestures with a streaming TemporalGestureClassifier")
+    parser.add_argument("--knn", nargs="?", const=DEFAULT_INDEX_PATH, default=None, metavar="INDEX",
+                        help="Classify with the few-shot k-NN gesture index (scripts/gesture_index.py) instead of the MLP")
+    parser.add_argument("--roi", action="store_true",
+                        help="Run MediaPipe on a crop around the tracked hands instead of the full frame")
+    parser.add_argument("--roi-max-side", type=int, default=None,
+                        help="With --roi, downscale crops whose longest side exceeds this many pixels")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Skip hand detection on still frames and extrapolate the landmarks instead")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="Run hand detection at most this often per second and stream (implies --adaptive)")
+    parser.add_argument("--cpu-budget", type=float, default=None,
+                        help="Fraction of one core hand detection may use per stream (implies --adaptive)")
+    parser.add_argument("--service", nargs="?", const=DEFAULT_ADDRESS, default=None, metavar="ADDRESS",
+                        help="Show the frames and gestures of a running recognition service (src/gesture_service.py) "
+                             "instead of opening a camera")
+    parser.add_argument("--record", metavar="LOG",
+                        help="Append the landmarks of the first stream to a landmark log for offline replay")
+    parser.add_argument("--report-every", type=float, default=5.0,
+                        help="Seconds between stage latency reports (0 disables them)")
+    args = parser.parse_args()
+
+    if args.service:
+        client = GestureServiceClient(args.service, name="evaluate", preview=False).start()
+        stats = PipelineStats("capture", "inference", "display", "glass_to_label")
+        run_service(client, stats, args.report_every)
+        print(stats.report())
+        client.stop()
+        cv2.destroyAllWindows()
+        return
+
+    # The MLP is only needed when it classifies here: a service client gets gesture names from the service,
+    # a k-NN index replaces the MLP and --temporal labels every hand with the temporal model
+    global model, class_names, featurizer
+    if args.knn:
+        model = GestureIndex.load(args.knn)
+        print(f"Using the gesture index {args.knn}: {model.counts()}")
+    elif not args.temporal:
+        model = load_mlp()
+    if model is not None:
+        class_names = model.class_names
+        featurizer = featurizer_for(model)
+
+    # Open the video streams, webcams and recordings share the VideoCapture interface
+    caps = [open_frame_source(camera, realtime=args.realtime) for camera in args.camera]
+
+    if args.temporal:
+        global temporal_recognizers
+        import torch
+        from src.model import TemporalGestureClassifier
+        # The temporal model is trained on its own sequence labels, recorded next to its weights
+        temporal_spec = read_weights_spec(args.temporal)
+        temporal_names = temporal_spec["class_names"]
+        if temporal_names is None:
+            raise SystemExit(f"{args.temporal} has no class names next to it, "
+                             "retrain it with scripts/train.py --temporal")
+        temporal_model = TemporalGestureClassifier(**{"num_classes": len(temporal_names), **temporal_spec["model"]})
+        temporal_model.load_state_dict(torch.load(args.temporal, map_location=torch.device('cpu')))
+        temporal_model.eval()
+        temporal_recognizers = [StreamingGestureRecognizer(temporal_model, temporal_names) for _ in caps]
+    if args.roi:
+        global roi_trackers
+        roi_trackers = [HandRoiTracker(max_side=args.roi_max_side) for _ in caps]
+    if args.adaptive or args.target_fps or args.cpu_budget:
+        global schedulers, last_results
+        schedulers = [InferenceScheduler(target_fps=args.target_fps, cpu_budget=args.cpu_budget) for _ in caps]
+        last_results = [None] * len(caps)
+    if args.record:
+        global recorder
+        recorder = LandmarkLogWriter(args.record)
+    stats = PipelineStats("capture", "inference", "display", "glass_to_label")
+
+    if args.pipelined:
+        if len(caps) > 1:
+            print("Pipelined mode uses a single camera, ignoring the others")
+        run_pipelined(caps[0], stats, args.report_every)
+    else:
+        run_sequential(caps, stats, args.report_every)
+
+    print(stats.report())
+    for i, tracker in enumerate(roi_trackers or []):
+        print(f"Stream {i}: {tracker.pixel_ratio():.1%} of the pixels processed, "
+              f"{tracker.full_frame_searches}/{tracker.frames} full-frame searches")
+    for i, scheduler in enumerate(schedulers or []):
+        print(f"Stream {i}: detection ran on {scheduler.detect_ratio():.1%} of the frames")
+    if recorder is not None:
+        recorder.close()
+        print(f"Recorded {recorder.frames} frames to {args.record}")
+    for cap in caps:
+        cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import torch
+import torch.nn as nn
+from src.model import GestureClassifier, CLASS_NAMES, fold_batchnorm
+from src.dataset import PROCESSED_DIR, has_packed_landmarks, load_packed_landmarks
+from src.deploy import FINAL_MODEL_DIR, MANIFEST_NAME, TorchPredictor, NumpyPredictor, weights_source
+from src.features import Featurizer, read_weights_spec
+
+
+# ----- Measurements -----
+def measure_latency_us(predictor, batch_size, repeats=2000, warmup=200, input_dim=63):
+    """Median and p95 wall time of one predictor call, in microseconds."""
+    batch = np.random.rand(batch_size, input_dim).astype(np.float32)
+    for _ in range(warmup):
+        predictor(batch)
+    samples = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        predictor(batch)
+        samples[i] = time.perf_counter() - start
+    return {"p50": float(np.median(samples) * 1e6), "p95": float(np.percentile(samples, 95) * 1e6)}
+
+
+def measure_accuracy(predictor, features, labels):
+    """Top-1 accuracy of predictor on (features, labels), or None without labeled data."""
+    if features is None:
+        return None
+    predicted = predictor(features).argmax(axis=1)
+    return float((predicted == labels).mean())
+
+
+# ----- Variants -----
+def export_variants(model, out_dir):
+    """
+    Writes every deployment variant to out_dir and returns a list of
+    (name, file name, format, predictor):
+      fp32   BatchNorm folded, Dropout stripped, scripted and frozen
+      int8   the same network with dynamically quantized Linear layers
+      numpy  the folded weights as a .npz for the torch-free NumpyPredictor
+    """
+    folded = fold_batchnorm(model)
+    fp32 = torch.jit.freeze(torch.jit.script(folded))
+    quantized = torch.ao.quantization.quantize_dynamic(folded, {nn.Linear}, dtype=torch.qint8)
+    int8 = torch.jit.freeze(torch.jit.script(quantized))
+
+    variants = []
+    for name, module in (("fp32", fp32), ("int8", int8)):
+        path = f"gesture_classifier_{name}.pt"
+        torch.jit.save(module, os.path.join(out_dir, path))
+        variants.append((name, path, "torchscript", TorchPredictor(module, name)))
+
+    linears = [layer for layer in folded if isinstance(layer, nn.Linear)]
+    weights = [layer.weight.detach().numpy().T for layer in linears]
+    biases = [layer.bias.detach().numpy() for layer in linears]
+    path = "gesture_classifier.npz"
+    NumpyPredictor.save(os.path.join(out_dir, path), weights, biases)
+    variants.append(("numpy", path, "npz", NumpyPredictor.load(os.path.join(out_dir, path))))
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export optimized deployment variants of the gesture classifier")
+    parser.add_argument("--weights", default="gesture_classifier_weights.pth", help="Trained eager weights")
+    parser.add_argument("--num-classes", type=int, default=None,
+                        help="Classes of the weights, only needed when their sidecar does not record it")
+    parser.add_argument("--out-dir", default=FINAL_MODEL_DIR)
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR,
+                        help="Packed landmarks from scripts/preprocess.py used to check accuracy")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                        help="Variants losing more accuracy than this are never picked as the fastest")
+    args = parser.parse_args()
+
+    # The features and architecture of the weights come from their sidecar (see scripts/train.py)
+    spec = read_weights_spec(args.weights)
+    featurizer = Featurizer.from_spec(spec["features"])
+    packed = None
+    if has_packed_landmarks(args.processed_dir):
+        packed = load_packed_landmarks(args.processed_dir, mmap_mode=None)
+
+    # The deployed labels are the ones the weights were trained on: from their sidecar, else the packed
+    # dataset they were most likely trained on, else the hard-coded CLASS_NAMES
+    class_names = spec["class_names"]
+    if class_names is None:
+        class_names = dict(enumerate(packed["label_names"])) if packed is not None else CLASS_NAMES
+    elif packed is not None and list(packed["label_names"]) != list(class_names.values()):
+        raise SystemExit(f"{args.weights} was trained on {list(class_names.values())}, but the accuracy check "
+                         f"would use the labels {packed['label_names']} of {args.processed_dir}")
+    num_classes = spec["model"].get("num_classes", args.num_classes or len(class_names))
+    if args.num_classes is not None and args.num_classes != num_classes:
+        raise SystemExit(f"--num-classes {args.num_classes}, but {args.weights} has {num_classes} classes")
+    if len(class_names) != num_classes:
+        raise SystemExit(f"{num_classes} classes, but {len(class_names)} class names: {list(class_names.values())}")
+
+    model = GestureClassifier(input_dim=featurizer.dim, **{**spec["model"], "num_classes": num_classes})
+    model.load_state_dict(torch.load(args.weights, map_location=torch.device('cpu')))
+    model.eval()
+
+    features = labels = None
+    if packed is not None:
+        features, labels = np.array(featurizer(packed["features"])), packed["labels"]
+    else:
+        print(f"No packed landmarks in {args.processed_dir}, skipping the accuracy check")
+
+    baseline = TorchPredictor(model)
+    baseline_accuracy = measure_accuracy(baseline, features, labels)
+    reference_input = features if features is not None else featurizer(np.random.rand(512, 63).astype(np.float32))
+    reference_logits = baseline(reference_input)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    manifest = {
+        # The loaders fall back to the eager weights once these were retrained after the export
+        "source": weights_source(args.weights),
+        "num_classes": num_classes,
+        "class_names": {str(idx): name for idx, name in class_names.items()},
+        # Inputs are raw landmarks when this is null, else the Featurizer spec the live loops apply
+        "features": None if featurizer.is_raw else featurizer.spec,
+        "baseline": {
+            "accuracy": baseline_accuracy,
+            "latency_us": {f"batch{b}": measure_latency_us(baseline, b, input_dim=featurizer.dim) for b in (1, 2)},
+        },
+        "variants": {},
+    }
+    for name, path, artifact_format, predictor in export_variants(model, args.out_dir):
+        logits = predictor(reference_input).copy()
+        accuracy = measure_accuracy(predictor, features, labels)
+        manifest["variants"][name] = {
+            "path": path,
+            "format": artifact_format,
+            "accuracy": accuracy,
+            "accuracy_delta": None if accuracy is None else accuracy - baseline_accuracy,
+            "max_abs_logit_error": float(np.abs(logits - reference_logits).max()),
+            "argmax_agreement": float((logits.argmax(1) == reference_logits.argmax(1)).mean()),
+            "latency_us": {f"batch{b}": measure_latency_us(predictor, b, input_dim=featurizer.dim) for b in (1, 2)},
+        }
+
+    # The fastest variant (batch of one hand) that keeps accuracy within the allowed drop
+    def acceptable(entry):
+        if entry["accuracy_delta"] is not None:
+            return entry["accuracy_delta"] >= -args.max_accuracy_drop
+        return entry["argmax_agreement"] >= 1.0 - args.max_accuracy_drop
+    candidates = {name: entry for name, entry in manifest["variants"].items() if acceptable(entry)} or \
+        {"fp32": manifest["variants"]["fp32"]}
+    manifest["fastest"] = min(candidates, key=lambda name: candidates[name]["latency_us"]["batch1"]["p50"])
+
+    with open(os.path.join(args.out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"{'variant':>8} {'p50 us':>8} {'p95 us':>8} {'accuracy':>9} {'max err':>9}")
+    print(f"{'eager':>8} {manifest['baseline']['latency_us']['batch1']['p50']:8.1f} "
+          f"{manifest['baseline']['latency_us']['batch1']['p95']:8.1f} {str(baseline_accuracy):>9}")
+    for name, entry in manifest["variants"].items():
+        print(f"{name:>8} {entry['latency_us']['batch1']['p50']:8.1f} {entry['latency_us']['batch1']['p95']:8.1f} "
+              f"{str(entry['accuracy']):>9} {entry['max_abs_logit_error']:9.2e}")
+    print(f"Fastest acceptable variant: {manifest['fastest']} (written to {args.out_dir})")
+
+
+if __name__ == "__main__":
+    main()
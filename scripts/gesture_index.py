@@ -0,0 +1,129 @@
+import os
+import time
+import argparse
+import numpy as np
+from src.dataset import PROCESSED_DIR, has_packed_landmarks, load_packed_landmarks
+from src.gesture_index import GestureIndex, DEFAULT_INDEX_PATH
+from src.features import Featurizer, featurizer_for
+from src.landmark_log import LandmarkLog
+from src.pipeline import StageTimer
+
+
+def load_examples(path):
+    """(N, 63) landmarks from a .npy capture (src/utils.py --no-images) or a landmark log (.lmlog)"""
+    if path.endswith(".npy"):
+        return np.load(path).reshape(-1, 63)
+    return LandmarkLog(path).hand_landmarks()
+
+
+def open_index(path, k=None):
+    if os.path.exists(path):
+        index = GestureIndex.load(path)
+        if k:
+            index.k = k
+        return index
+    return GestureIndex(k=k or 5)
+
+
+def build(args):
+    """Builds an index from the packed landmarks of scripts/preprocess.py, optionally holding out a share
+    of every class to measure the accuracy."""
+    if not has_packed_landmarks(args.processed_dir):
+        raise SystemExit(f"No packed landmarks in {args.processed_dir}, run scripts/preprocess.py first")
+    packed = load_packed_landmarks(args.processed_dir, mmap_mode=None)
+    features = packed["features"][packed["detected"]]
+    labels = packed["labels"][packed["detected"]]
+    rng = np.random.default_rng(args.seed)
+    holdout = rng.random(len(labels)) < args.holdout
+
+    featurizer = Featurizer.parse(args.features)
+    features = np.array(featurizer(features))
+    index = GestureIndex(k=args.k, max_distance=args.max_distance, features=featurizer.spec)
+    start = time.perf_counter()
+    for label, name in enumerate(packed["label_names"]):
+        # Class indices follow the packed label order, like the MLP's
+        index.class_names[label] = name
+    for label, name in enumerate(packed["label_names"]):
+        index.add(name, features[(labels == label) & ~holdout])
+    print(f"Indexed {len(index)} {featurizer} examples of {len(index.class_names)} gestures in "
+          f"{(time.perf_counter() - start) * 1e3:.1f} ms: {index.counts()}")
+    if holdout.any():
+        predicted = index(features[holdout]).argmax(axis=1)
+        print(f"Held-out accuracy: {(predicted == labels[holdout]).mean():.2%} on {int(holdout.sum())} samples")
+    index.save(args.index)
+    print(f"Saved the index to {args.index}")
+
+
+def add(args):
+    index = open_index(args.index, args.k)
+    examples = np.concatenate([load_examples(path) for path in args.examples])
+    start = time.perf_counter()
+    class_idx = index.add(args.gesture, featurizer_for(index)(examples))
+    elapsed = time.perf_counter() - start
+    index.save(args.index)
+    print(f"Registered {len(examples)} examples of {args.gesture!r} (class {class_idx}) in {elapsed * 1e3:.2f} ms, "
+          f"{index.counts()[args.gesture]} in total")
+
+
+def remove(args):
+    index = open_index(args.index)
+    removed = index.remove(args.gesture)
+    index.save(args.index)
+    print(f"Removed {removed} examples of {args.gesture!r}")
+
+
+def info(args):
+    index = open_index(args.index)
+    featurizer = featurizer_for(index)
+    print(f"{args.index}: {len(index)} examples, k={index.k}, max_distance={index.max_distance}, features={featurizer}")
+    for idx, name in sorted(index.class_names.items()):
+        print(f"{idx:4d} {name:>16}: {index.counts()[name]}")
+
+    # Featurization plus query latency for the batch sizes the live loops use (one or two hands)
+    rng = np.random.default_rng(0)
+    for batch_size in (1, 2):
+        timer = StageTimer(f"batch{batch_size}", window=args.repeats)
+        queries = rng.random((batch_size, 63), dtype=np.float32)
+        index(featurizer(queries))
+        for _ in range(args.repeats):
+            with timer.time():
+                index(featurizer(queries))
+        print(timer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the few-shot k-NN gesture index")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Index file (.npz)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Index every gesture of the packed training landmarks")
+    build_parser.add_argument("--processed-dir", default=PROCESSED_DIR)
+    build_parser.add_argument("--k", type=int, default=5)
+    build_parser.add_argument("--features", default="normalized",
+                              help="Featurization of the references (src/features.py), e.g. normalized+angles")
+    build_parser.add_argument("--max-distance", type=float, default=None,
+                              help="Queries farther from every example are reported as Unknown")
+    build_parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples kept out to measure accuracy")
+    build_parser.add_argument("--seed", type=int, default=0)
+    build_parser.set_defaults(func=build)
+
+    add_parser = commands.add_parser("add", help="Register examples of a new or existing gesture")
+    add_parser.add_argument("gesture")
+    add_parser.add_argument("examples", nargs="+", help=".npy captures from src/utils.py --no-images or .lmlog files")
+    add_parser.add_argument("--k", type=int, default=None)
+    add_parser.set_defaults(func=add)
+
+    remove_parser = commands.add_parser("remove", help="Drop every example of a gesture")
+    remove_parser.add_argument("gesture")
+    remove_parser.set_defaults(func=remove)
+
+    info_parser = commands.add_parser("info", help="List the gestures and time queries")
+    info_parser.add_argument("--repeats", type=int, default=2000)
+    info_parser.set_defaults(func=info)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import argparse
+import multiprocessing
+import numpy as np
+from tqdm import tqdm
+from src.dataset import (LandmarkCache, PROCESSED_DIR, LANDMARK_DIM, extract_landmarks_with_flag,
+                         list_image_samples, load_captured_landmarks, save_packed_landmarks, dataset_digest)
+
+# Per-process MediaPipe Hands instance, created by init_worker
+_hands = None
+
+
+# ----- Worker process setup -----
+def init_worker(min_detection_confidence, max_num_hands):
+    """
+    Runs once in every pool process. Each worker owns its own Hands graph, so
+    extraction never contends on a shared instance.
+    """
+    global _hands
+    import cv2
+    import mediapipe as mp
+    # One pool process per core already saturates the machine
+    cv2.setNumThreads(1)
+    _hands = mp.solutions.hands.Hands(
+        static_image_mode=True,
+        max_num_hands=max_num_hands,
+        min_detection_confidence=min_detection_confidence
+    )
+
+
+def extract_worker(task):
+    idx, image_path = task
+    landmarks, detected = extract_landmarks_with_flag(image_path, _hands)
+    return idx, landmarks, detected
+
+
+# ----- Main Preprocessing -----
+def main():
+    parser = argparse.ArgumentParser(description="Extract hand landmarks for every image in the dataset")
+    parser.add_argument("--data-dir", default="data_model", help="Dataset root with one subfolder per label")
+    parser.add_argument("--out-dir", default=PROCESSED_DIR, help="Where the packed arrays are written")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of extraction processes")
+    parser.add_argument("--chunksize", type=int, default=16, help="Images handed to a worker at a time")
+    parser.add_argument("--min-detection-confidence", type=float, default=0.5)
+    parser.add_argument("--max-num-hands", type=int, default=1)
+    parser.add_argument("--cache-dir", default=os.path.join(PROCESSED_DIR, "landmark_cache"),
+                        help="Landmark cache shared with train.py, or '' to disable it")
+    args = parser.parse_args()
+
+    # Taken before extraction, so files changed while it runs make the pack stale instead of going unnoticed
+    digest = dataset_digest(args.data_dir)
+    samples, label_names = list_image_samples(args.data_dir)
+    print(f"Found {len(samples)} images in {len(label_names)} classes: {label_names}")
+
+    features = np.zeros((len(samples), LANDMARK_DIM), dtype=np.float32)
+    detected = np.zeros(len(samples), dtype=np.uint8)
+
+    # Only images that are not already cached go to the pool
+    cache = LandmarkCache(args.cache_dir, args.min_detection_confidence, args.max_num_hands) if args.cache_dir else None
+    tasks = []
+    for idx, (image_path, _) in enumerate(samples):
+        cached = cache.lookup(image_path) if cache is not None else None
+        if cached is None:
+            tasks.append((idx, image_path))
+        else:
+            features[idx], detected[idx] = cached
+    print(f"{len(samples) - len(tasks)} images cached, extracting {len(tasks)} with {args.workers} workers")
+
+    if tasks:
+        with multiprocessing.Pool(args.workers, initializer=init_worker,
+                                  initargs=(args.min_detection_confidence, args.max_num_hands)) as pool:
+            for idx, landmarks, hand_found in tqdm(pool.imap_unordered(extract_worker, tasks, chunksize=args.chunksize),
+                                                   total=len(tasks), desc="Extracting landmarks"):
+                features[idx], detected[idx] = landmarks, hand_found
+                if cache is not None:
+                    cache.store(samples[idx][0], landmarks, hand_found)
+    # Also without new rows: lookups by content hash add entries, deleted images free rows
+    if cache is not None:
+        cache.flush()
+
+    labels = np.array([label for _, label in samples], dtype=np.int64)
+    paths = [path for path, _ in samples]
+    # Landmark-only captures from src/utils.py --no-images are packed as they are
+    captured, captured_labels, captured_paths = load_captured_landmarks(args.data_dir, label_names)
+    if len(captured):
+        print(f"Adding {len(captured)} landmark-only captured samples")
+        features = np.concatenate([features, captured])
+        labels = np.concatenate([labels, captured_labels])
+        detected = np.concatenate([detected, np.ones(len(captured), dtype=np.uint8)])
+        paths += captured_paths
+    save_packed_landmarks(args.out_dir, features, labels, detected, label_names, paths, root=args.data_dir,
+                          digest=digest)
+    print(f"Wrote {len(labels)} samples ({int(detected.sum())} with a detected hand) to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
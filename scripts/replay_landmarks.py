@@ -0,0 +1,74 @@
+import json
+import time
+import argparse
+from collections import Counter
+from src.deploy import load_gesture_predictor
+from src.landmark_log import LandmarkLog
+from src.features import featurizer_for
+from src.pipeline import StageTimer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a recorded landmark log through the gesture classifier")
+    parser.add_argument("log", help="Landmark log written by evaluate.py --record or scene.py --record-landmarks")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed, 1.0 is the recorded pace. 0 replays as fast as possible")
+    parser.add_argument("--variant", default=None, help="Exported variant to use, defaults to the fastest")
+    parser.add_argument("--batch", action="store_true",
+                        help="Classify every recorded hand in one batch instead of frame by frame")
+    parser.add_argument("--print-frames", action="store_true", help="Print the gestures of every frame")
+    parser.add_argument("--json", default=None, help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    log = LandmarkLog(args.log)
+    predictor = load_gesture_predictor(variant=args.variant)
+    if predictor is None:
+        raise SystemExit("No exported classifier, run scripts/export.py first")
+    class_names = predictor.class_names
+    featurizer = featurizer_for(predictor)
+    duration = float(log.timestamps[-1] - log.timestamps[0]) if len(log) else 0.0
+    print(f"{args.log}: {len(log)} frames, {len(log.hand_landmarks())} hands, {duration:.1f} s recorded")
+
+    counts = Counter()
+    timer = StageTimer("classify", window=max(len(log), 1))
+    start = time.perf_counter()
+    if args.batch:
+        # The whole log is one contiguous (N, 63) batch, read straight from the memory map
+        with timer.time():
+            predicted = predictor(featurizer(log.hand_landmarks())).argmax(axis=1)
+        counts.update(class_names.get(int(idx), "Unknown") for idx in predicted)
+    else:
+        for index, frame in enumerate(log.replay(args.speed or None)):
+            if len(frame.landmarks) == 0:
+                counts["no hand"] += 1
+                continue
+            with timer.time():
+                logits = predictor(featurizer(frame.landmarks))
+            gestures = [class_names.get(int(idx), "Unknown") for idx in logits.argmax(axis=1)]
+            counts.update(gestures)
+            if args.print_frames:
+                print(f"{index:6d} {frame.timestamp - log.timestamps[0]:8.3f} s  "
+                      + ", ".join(f"{hand}: {gesture}" for hand, gesture in zip(frame.handedness, gestures)))
+    wall = time.perf_counter() - start
+
+    results = {
+        "log": args.log,
+        "frames": len(log),
+        "recorded_s": duration,
+        "replay_s": wall,
+        "speedup": duration / wall if wall > 0 else None,
+        "classifier": predictor.name,
+        "gestures": dict(counts),
+        "classify": timer.summary(),
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"Replayed in {wall:.3f} s ({results['speedup'] or 0:.0f}x the recorded time) with {predictor.name}")
+    for gesture, count in counts.most_common():
+        print(f"{gesture:>14}: {count}")
+    print(timer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+from tqdm import tqdm
+from src.dataset import PROCESSED_DIR, has_packed_landmarks, load_packed_landmarks
+from src.features import Featurizer
+
+# Per-process training data, loaded by init_worker
+_features = None
+_labels = None
+_num_classes = None
+_mirror_labels = None
+
+
+# ----- Search space -----
+def parse_list(text, cast):
+    return [cast(value) for value in text.split(",") if value]
+
+
+def parse_widths(text):
+    """'128x64,256x128' -> [(128, 64), (256, 128)]"""
+    return [tuple(int(width) for width in option.split("x")) for option in text.split(",") if option]
+
+
+def build_configs(space, search, num_trials, seed):
+    """
+    Returns the configurations to evaluate: every combination of the space for
+    a grid search, or num_trials distinct random combinations.
+    """
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+    if search == "grid" or num_trials >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, num_trials)
+
+
+def stratified_folds(labels, k, seed):
+    """Returns a fold index per sample, with every class spread evenly over the k folds."""
+    rng = np.random.default_rng(seed)
+    folds = np.empty(len(labels), dtype=np.int64)
+    for label in np.unique(labels):
+        members = rng.permutation(np.flatnonzero(labels == label))
+        folds[members] = np.arange(len(members)) % k
+    return folds
+
+
+# ----- Worker process setup -----
+def init_worker(processed_dir, detected_only, threads):
+    """
+    Runs once in every pool process. torch is limited to `threads` threads so
+    the pool (workers * threads) matches the core count instead of every trial
+    fighting over all cores.
+    """
+    global _features, _labels, _num_classes, _mirror_labels
+    import torch
+    torch.set_num_threads(threads)
+    packed = load_packed_landmarks(processed_dir, mmap_mode='r')
+    keep = packed["detected"] if detected_only else np.ones(len(packed["labels"]), dtype=bool)
+    _features = torch.from_numpy(np.ascontiguousarray(packed["features"][keep]))
+    _labels = torch.from_numpy(packed["labels"][keep])
+    _num_classes = len(packed["label_names"])
+    from src.augment import mirror_label_map
+    _mirror_labels = mirror_label_map(packed["label_names"])
+
+
+def train_fold(task):
+    """
+    Trains one configuration on every fold but `fold` and returns its accuracy
+    on the held-out fold. Batches are sliced straight from the in-memory tensors.
+    """
+    import torch
+    import torch.nn as nn
+    from src.model import GestureClassifier
+    from src.augment import LandmarkAugmenter
+    config_id, config, fold, folds, seed = task
+    torch.manual_seed(seed + fold)
+    train_idx = torch.from_numpy(np.flatnonzero(folds != fold))
+    val_idx = torch.from_numpy(np.flatnonzero(folds == fold))
+    train_x, train_y = _features[train_idx], _labels[train_idx]
+
+    featurizer = Featurizer.parse(config["features"])
+    model = GestureClassifier(input_dim=featurizer.dim, num_classes=_num_classes, hidden=config["hidden"],
+                              dropout=config["dropout"])
+    optimizer = torch.optim.Adam(model.parameters(), lr=config["lr"])
+    criterion = nn.CrossEntropyLoss()
+    # Built exactly like scripts/train.py --augment, so the winner is retrained the way it was scored
+    augment = None
+    if config.get("augment"):
+        augment = LandmarkAugmenter(mirror_prob=config["mirror_prob"], mirror_labels=_mirror_labels)
+    # Without augmentation the whole training split is featurized once, up front
+    if augment is None and not featurizer.is_raw:
+        train_x = torch.from_numpy(np.array(featurizer(train_x.numpy())))
+    batch_size = config["batch_size"]
+    start = time.perf_counter()
+    for _ in range(config["epochs"]):
+        model.train()
+        order = torch.randperm(len(train_idx))
+        for begin in range(0, len(order), batch_size):
+            batch = order[begin:begin + batch_size]
+            # BatchNorm cannot train on a single sample
+            if len(batch) < 2:
+                continue
+            inputs, targets = train_x[batch], train_y[batch]
+            if augment is not None:
+                augmented, augmented_targets = augment(inputs, targets)
+                inputs, targets = torch.cat([inputs, augmented]), torch.cat([targets, augmented_targets])
+                inputs = torch.from_numpy(np.array(featurizer(inputs.numpy())))
+            optimizer.zero_grad()
+            loss = criterion(model(inputs), targets)
+            loss.backward()
+            optimizer.step()
+    train_s = time.perf_counter() - start
+
+    model.eval()
+    with torch.no_grad():
+        predicted = model(torch.from_numpy(np.array(featurizer(_features[val_idx].numpy())))).argmax(dim=1)
+    accuracy = (predicted == _labels[val_idx]).float().mean().item()
+    return config_id, fold, accuracy, float(loss.item()), train_s
+
+
+# ----- Leaderboard -----
+def aggregate(configs, fold_results):
+    """Averages the fold results of every configuration, best mean accuracy first."""
+    rows = []
+    for config_id, config in enumerate(configs):
+        results = fold_results[config_id]
+        accuracies = np.array([accuracy for accuracy, _, _ in results])
+        rows.append({
+            "rank": 0,
+            "hidden": "x".join(str(width) for width in config["hidden"]),
+            "dropout": config["dropout"],
+            "lr": config["lr"],
+            "batch_size": config["batch_size"],
+            "epochs": config["epochs"],
+            "augment": bool(config.get("augment")),
+            "mirror_prob": config["mirror_prob"],
+            "features": config["features"],
+            "mean_accuracy": float(accuracies.mean()),
+            "std_accuracy": float(accuracies.std()),
+            "min_accuracy": float(accuracies.min()),
+            "final_loss": float(np.mean([loss for _, loss, _ in results])),
+            "train_s": float(np.mean([train_s for _, _, train_s in results])),
+        })
+    # Ties go to the more stable, then the faster configuration
+    rows.sort(key=lambda row: (-row["mean_accuracy"], row["std_accuracy"], row["train_s"]))
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+
+def print_leaderboard(rows, top):
+    print(f"{'rank':>4} {'hidden':>10} {'dropout':>7} {'lr':>8} {'batch':>5} {'epochs':>6} {'aug':>3} {'features':>20} "
+          f"{'acc':>7} {'± std':>6} {'min':>7} {'s/fold':>6}")
+    for row in rows[:top]:
+        print(f"{row['rank']:4d} {row['hidden']:>10} {row['dropout']:7.2f} {row['lr']:8.0e} {row['batch_size']:5d} "
+              f"{row['epochs']:6d} {'yes' if row['augment'] else 'no':>3} {row['features']:>20} {row['mean_accuracy']:7.2%} "
+              f"{row['std_accuracy']:6.2%} {row['min_accuracy']:7.2%} {row['train_s']:6.1f}")
+
+
+# ----- Main Sweep -----
+def main():
+    parser = argparse.ArgumentParser(description="k-fold cross-validated hyperparameter sweep of the gesture classifier")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR, help="Packed landmarks from scripts/preprocess.py")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--search", choices=("grid", "random"), default="grid")
+    parser.add_argument("--trials", type=int, default=20, help="Configurations drawn by --search random")
+    parser.add_argument("--hidden", default="128x64,256x128,64x32,128", help="Comma-separated layer widths, e.g. 256x128")
+    parser.add_argument("--dropout", default="0.1,0.3,0.5")
+    parser.add_argument("--lr", default="0.003,0.001,0.0003")
+    parser.add_argument("--batch-size", default="16,64")
+    parser.add_argument("--epochs", default="10")
+    parser.add_argument("--features", default="raw",
+                        help="Comma-separated featurizations (src/features.py), e.g. raw,normalized+angles")
+    parser.add_argument("--augment", default="0", help="'0', '1' or '0,1' to sweep landmark augmentation")
+    parser.add_argument("--mirror-prob", type=float, default=0.5,
+                        help="Mirroring probability of augmented trials, as scripts/train.py --mirror-prob")
+    parser.add_argument("--include-undetected", action="store_true",
+                        help="Keep images without a detected hand (all-zero features)")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size, defaults to cores / --threads")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per trial")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10, help="Leaderboard rows to print")
+    parser.add_argument("--out", default="sweep_results", help="Prefix of the .json and .csv leaderboard files")
+    args = parser.parse_args()
+
+    if not has_packed_landmarks(args.processed_dir):
+        raise SystemExit(f"No packed landmarks in {args.processed_dir}, run scripts/preprocess.py first")
+    packed = load_packed_landmarks(args.processed_dir)
+    labels = packed["labels"] if args.include_undetected else packed["labels"][packed["detected"]]
+    folds = stratified_folds(labels, args.folds, args.seed)
+
+    space = {
+        "hidden": parse_widths(args.hidden),
+        "dropout": parse_list(args.dropout, float),
+        "lr": parse_list(args.lr, float),
+        "batch_size": parse_list(args.batch_size, int),
+        "epochs": parse_list(args.epochs, int),
+        "augment": parse_list(args.augment, lambda value: bool(int(value))),
+        "features": parse_list(args.features, lambda value: str(Featurizer.parse(value))),
+        "mirror_prob": [args.mirror_prob],
+    }
+    configs = build_configs(space, args.search, args.trials, args.seed)
+    # Every (configuration, fold) pair is its own task, which keeps the pool busy until the very end
+    tasks = [(config_id, config, fold, folds, args.seed)
+             for config_id, config in enumerate(configs) for fold in range(args.folds)]
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads)
+    print(f"{len(labels)} samples, {len(configs)} configurations x {args.folds} folds on "
+          f"{workers} workers with {args.threads} torch thread(s) each")
+
+    fold_results = {config_id: [] for config_id in range(len(configs))}
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                              initargs=(args.processed_dir, not args.include_undetected, args.threads)) as pool:
+        for config_id, fold, accuracy, loss, train_s in tqdm(pool.imap_unordered(train_fold, tasks),
+                                                             total=len(tasks), desc="Trials"):
+            fold_results[config_id].append((accuracy, loss, train_s))
+    wall = time.perf_counter() - start
+
+    rows = aggregate(configs, fold_results)
+    with open(f"{args.out}.json", 'w') as f:
+        json.dump({"folds": args.folds, "samples": int(len(labels)), "wall_s": wall, "leaderboard": rows}, f, indent=2)
+    with open(f"{args.out}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print_leaderboard(rows, args.top)
+    best = rows[0]
+    print(f"Swept in {wall:.1f} s, leaderboard written to {args.out}.json and {args.out}.csv")
+    print(f"Train the best configuration with: python -m scripts.train --hidden {best['hidden']} "
+          f"--dropout {best['dropout']} --lr {best['lr']} --batch-size {best['batch_size']} --epochs {best['epochs']} "
+          f"--features {best['features']}"
+          + (f" --augment --mirror-prob {best['mirror_prob']}" if best["augment"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,24 @@
 import os
-import cv2
-import mediapipe as mp
+import argparse
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import Dataset, DataLoader
 from tqdm import tqdm
-from src.model import GestureClassifier
+from src.model import GestureClassifier, TemporalGestureClassifier
+from src.augment import LandmarkAugmenter, mirror_label_map
+from src.features import Featurizer, write_feature_spec
+from src.dataset import (extract_landmarks, extract_landmarks_with_flag, LandmarkCache, list_image_samples,
+                         has_packed_landmarks, load_packed_landmarks, load_sequence_windows, load_captured_landmarks,
+                         dataset_digest, PROCESSED_DIR)
 
-# ----- Define a function to extract landmarks from an image -----
-def extract_landmarks(image_path, hands):
-    """
-    Reads an image, processes it with MediaPipe Hands to extract landmarks,
-    and returns a 63-dimensional vector (21 landmarks * 3 coordinates).
-    If no hand is detected, returns a vector of zeros.
-    """
-    img = cv2.imread(image_path)
-    if img is None:
-        return np.zeros(63, dtype=np.float32)
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = hands.process(img_rgb)
-    if results.multi_hand_landmarks:
-        # Use the first detected hand.
-        landmarks = results.multi_hand_landmarks[0]
-        return np.array([[lm.x, lm.y, lm.z] for lm in landmarks.landmark], dtype=np.float32).flatten()
-    else:
-        return np.zeros(63, dtype=np.float32)
+# Where extracted landmark vectors are cached between runs
+CACHE_DIR = os.path.join(PROCESSED_DIR, "landmark_cache")
 
 # ----- Custom Dataset Class -----
 class GestureDataset(Dataset):
-    def __init__(self, root_dir):
+    def __init__(self, root_dir, cache_dir=CACHE_DIR, min_detection_confidence=0.5, max_num_hands=1):
         """
         Expects a folder structure:
           root_dir/
@@ -41,67 +29,162 @@ class GestureDataset(Dataset):
             label2/
               image1.jpg
               ...
-        It uses MediaPipe Hands to extract landmark features.
+        It uses MediaPipe Hands to extract landmark features. Extraction runs
+        once up front and is stored in a LandmarkCache, so later runs (and every
+        epoch) only read float32 arrays. Pass cache_dir=None to disable the cache.
+        Landmark-only captures (label/*.npy from src/utils.py --no-images) are
+        appended after the images.
         """
-        self.samples = []
-        self.labels = []
-        # Get sorted list of subfolder names as labels
-        self.labels = sorted([d for d in os.listdir(root_dir) if os.path.isdir(os.path.join(root_dir, d))])
-        label_to_idx = {label: idx for idx, label in enumerate(self.labels)}
-        for label in self.labels:
-            folder = os.path.join(root_dir, label)
-            for filename in os.listdir(folder):
-                if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    self.samples.append((os.path.join(folder, filename), label_to_idx[label]))
+        # Subfolder names, sorted, are the labels
+        self.samples, self.labels = list_image_samples(root_dir)
+        self.captured, self.captured_targets, _ = load_captured_landmarks(root_dir, self.labels)
+
+        self.min_detection_confidence = min_detection_confidence
+        self.max_num_hands = max_num_hands
+        self.hands = None
 
+        if cache_dir is None:
+            self.features = None
+            return
+
+        # Resolve every sample through the cache, extracting only the misses
+        cache = LandmarkCache(cache_dir, min_detection_confidence, max_num_hands)
+        self.features = np.empty((len(self.samples), 63), dtype=np.float32)
+        self.detected = np.empty(len(self.samples), dtype=bool)
+        misses = 0
+        for i, (img_path, _) in enumerate(tqdm(self.samples, desc="Loading landmarks")):
+            cached = cache.lookup(img_path)
+            if cached is None:
+                cached = extract_landmarks_with_flag(img_path, self._get_hands())
+                cache.store(img_path, *cached)
+                misses += 1
+            self.features[i], self.detected[i] = cached
+        cache.flush()
+        print(f"Landmark cache: {len(self.samples) - misses} hits, {misses} extracted, "
+              f"{int((~self.detected).sum())} images without a detected hand")
+
+    def _get_hands(self):
         # Initialize MediaPipe Hands once (static_image_mode=True for images)
-        self.hands = mp.solutions.hands.Hands(
-            static_image_mode=True,
-            max_num_hands=1,
-            min_detection_confidence=0.5
-        )
+        if self.hands is None:
+            # Imported lazily so training from cached or packed landmarks never loads MediaPipe
+            import mediapipe as mp
+            self.hands = mp.solutions.hands.Hands(
+                static_image_mode=True,
+                max_num_hands=self.max_num_hands,
+                min_detection_confidence=self.min_detection_confidence
+            )
+        return self.hands
 
     def __len__(self):
-        return len(self.samples)
+        return len(self.samples) + len(self.captured)
 
     def __getitem__(self, idx):
+        if idx >= len(self.samples):
+            idx -= len(self.samples)
+            return torch.from_numpy(self.captured[idx]), torch.tensor(self.captured_targets[idx])
         img_path, label = self.samples[idx]
-        landmarks = extract_landmarks(img_path, self.hands)
+        if self.features is not None:
+            landmarks = self.features[idx]
+        else:
+            landmarks = extract_landmarks(img_path, self._get_hands())
         return torch.tensor(landmarks), torch.tensor(label)
 
-# ----- Main Training Loop -----
-def main():
-    # Path to dataset folder - subfolders are ghoing to get read as labels here
-    # Once the model trains, everytime we add a new subfolder, we need to rearrange the class dictionay in evaluate.py because it needs to follow alphabetical order to correclty display labels
-    dataset_dir = "data_model"
+class PackedGestureDataset(Dataset):
+    def __init__(self, processed_dir=PROCESSED_DIR):
+        """
+        Serves the packed (N, 63) landmark array written by scripts/preprocess.py.
+        No image decoding or MediaPipe is involved.
+        """
+        packed = load_packed_landmarks(processed_dir, mmap_mode=None)
+        self.features = torch.from_numpy(packed["features"])
+        self.targets = torch.from_numpy(packed["labels"])
+        self.labels = packed["label_names"]
 
-    # Create dataset and DataLoader
-    dataset = GestureDataset(dataset_dir)
-    # For simplicity, use 80% for training and 20% for validation
-    train_size = int(0.8 * len(dataset))
-    val_size = len(dataset) - train_size
-    train_dataset, val_dataset = torch.utils.data.random_split(dataset, [train_size, val_size])
+    def __len__(self):
+        return len(self.targets)
 
-    train_loader = DataLoader(train_dataset, batch_size=16, shuffle=True, num_workers=0)
-    val_loader = DataLoader(val_dataset, batch_size=16, shuffle=False, num_workers=0)
+    def __getitem__(self, idx):
+        return self.features[idx], self.targets[idx]
 
-    num_classes = len(dataset.labels)
-    model = GestureClassifier(num_classes=num_classes)
+class SequenceGestureDataset(Dataset):
+    def __init__(self, sequence_dir, window, stride=1):
+        """
+        Serves fixed-length windows of landmark sequences for TemporalGestureClassifier.
+        See src.dataset.load_sequence_windows for the expected folder layout.
+        """
+        windows, targets, self.labels = load_sequence_windows(sequence_dir, window, stride)
+        self.windows = torch.from_numpy(windows)
+        self.targets = torch.from_numpy(targets)
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __getitem__(self, idx):
+        return self.windows[idx], self.targets[idx]
 
+def check_packed_source(processed_dir, data_dir):
+    """
+    Raises SystemExit unless the packed landmarks in processed_dir were built
+    from data_dir and are still up to date: same labels, same number of
+    images and no sample added, removed or rewritten since preprocessing.
+    Training never silently uses a pack of another (or an older) dataset.
+    """
+    packed = load_packed_landmarks(processed_dir)
+    samples, label_names = list_image_samples(data_dir)
+    rerun = f"re-run scripts/preprocess.py --data-dir {data_dir} --out-dir {processed_dir}"
+    root = packed["root"]
+    if root is None or os.path.realpath(root) != os.path.realpath(data_dir):
+        raise SystemExit(f"The packed landmarks in {processed_dir} were built from {root or 'an unrecorded root'}, "
+                         f"not {data_dir}: {rerun}")
+    if list(packed["label_names"]) != list(label_names):
+        raise SystemExit(f"The packed landmarks in {processed_dir} have the labels {packed['label_names']}, "
+                         f"but {data_dir} has {label_names}: {rerun}")
+    # Landmark-only captures are recorded as "<file>#<row>", images by their path
+    packed_images = sum("#" not in path for path in packed["paths"])
+    if packed_images != len(samples):
+        raise SystemExit(f"The packed landmarks in {processed_dir} hold {packed_images} images, "
+                         f"but {data_dir} has {len(samples)}: {rerun}")
+    if packed["digest"] != dataset_digest(data_dir):
+        raise SystemExit(f"Samples in {data_dir} were added, removed or changed since the landmarks in "
+                         f"{processed_dir} were packed: {rerun}")
+
+
+# ----- Training Loop -----
+def featurize_batch(featurizer, inputs):
+    """Applies a src.features Featurizer to a (B, 63) landmark tensor."""
+    return torch.tensor(featurizer(inputs.numpy()))
+
+
+def train_model(model, train_loader, val_loader, num_epochs=10, lr=0.001, augment=None, augment_copies=1,
+                featurizer=None):
+    """
+    Trains model with Adam and cross-entropy, printing the validation accuracy after every epoch.
+    With a LandmarkAugmenter, every training batch is extended by augment_copies
+    freshly transformed copies of itself. A Featurizer turns the (augmented)
+    landmarks into the model's inputs.
+    """
     criterion = nn.CrossEntropyLoss()
-    optimizer = optim.Adam(model.parameters(), lr=0.001)
+    optimizer = optim.Adam(model.parameters(), lr=lr)
 
-    num_epochs = 10
     for epoch in range(num_epochs):
         model.train()
         running_loss = 0.0
+        # Samples seen this epoch, augmented copies included
+        train_size = 0
         for inputs, labels in tqdm(train_loader, desc=f"Epoch {epoch+1}/{num_epochs}"):
+            if augment is not None:
+                copies = [augment(inputs, labels) for _ in range(augment_copies)]
+                inputs = torch.cat([inputs] + [features for features, _ in copies])
+                labels = torch.cat([labels] + [targets for _, targets in copies])
+            if featurizer is not None:
+                inputs = featurize_batch(featurizer, inputs)
             optimizer.zero_grad()
             outputs = model(inputs)
             loss = criterion(outputs, labels)
             loss.backward()
             optimizer.step()
             running_loss += loss.item() * inputs.size(0)
+            train_size += inputs.size(0)
         epoch_loss = running_loss / train_size
         print(f"Epoch {epoch+1} Training Loss: {epoch_loss:.4f}")
 
@@ -111,16 +194,100 @@ def main():
         total = 0
         with torch.no_grad():
             for inputs, labels in val_loader:
+                if featurizer is not None:
+                    inputs = featurize_batch(featurizer, inputs)
                 outputs = model(inputs)
                 _, preds = torch.max(outputs, 1)
                 total += labels.size(0)
                 correct += (preds == labels).sum().item()
         val_acc = correct / total
         print(f"Epoch {epoch+1} Validation Accuracy: {val_acc*100:.2f}%")
+    return model
+
+# ----- Main Training Loop -----
+def main():
+    parser = argparse.ArgumentParser(description="Train the gesture classifier")
+    parser.add_argument("--data-dir", default="data_model",
+                        help="Dataset root with one subfolder per label. The packed landmarks are only used when they "
+                             "are up to date with it")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR,
+                        help="Packed landmarks from scripts/preprocess.py, used instead of the images when present")
+    parser.add_argument("--temporal", action="store_true",
+                        help="Train the streaming TemporalGestureClassifier on landmark sequences")
+    parser.add_argument("--sequence-dir", default="data_sequences",
+                        help="Root with one subfolder of (T, 63) .npy clips per label, used with --temporal")
+    parser.add_argument("--stride", type=int, default=1, help="Frames between consecutive training windows")
+    parser.add_argument("--hidden", default="128x64", help="Hidden layer widths of GestureClassifier, e.g. 256x128")
+    parser.add_argument("--dropout", type=float, default=0.3, help="Dropout of GestureClassifier")
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--features", default="raw",
+                        help="Classifier inputs (src/features.py): raw, or normalized, distances and angles joined by '+'")
+    parser.add_argument("--augment", action="store_true",
+                        help="Add randomly rotated, scaled, shifted and jittered copies of every training batch")
+    parser.add_argument("--augment-copies", type=int, default=1, help="Augmented copies per batch with --augment")
+    parser.add_argument("--mirror-prob", type=float, default=0.5,
+                        help="With --augment, probability of mirroring a hand (left/right labels are swapped)")
+    args = parser.parse_args()
+
+    # Path to dataset folder - subfolders are ghoing to get read as labels here
+    # Once the model trains, everytime we add a new subfolder, we need to rearrange the class dictionay in evaluate.py because it needs to follow alphabetical order to correclty display labels
+    dataset_dir = args.data_dir
+
+    # Create dataset and DataLoader
+    if args.temporal:
+        model_class = TemporalGestureClassifier
+        # Windows exactly as long as the receptive field match what the streaming model sees
+        window = TemporalGestureClassifier().receptive_field
+        dataset = SequenceGestureDataset(args.sequence_dir, window, args.stride)
+        weights_path = "temporal_gesture_classifier_weights.pth"
+    elif has_packed_landmarks(args.processed_dir):
+        if os.path.isdir(dataset_dir):
+            check_packed_source(args.processed_dir, dataset_dir)
+        else:
+            print(f"{dataset_dir} does not exist, the packed landmarks cannot be checked against it")
+        print(f"Loading preprocessed landmarks from {args.processed_dir}")
+        model_class = GestureClassifier
+        dataset = PackedGestureDataset(args.processed_dir)
+        weights_path = "gesture_classifier_weights.pth"
+    else:
+        model_class = GestureClassifier
+        dataset = GestureDataset(dataset_dir)
+        weights_path = "gesture_classifier_weights.pth"
+    # For simplicity, use 80% for training and 20% for validation
+    train_size = int(0.8 * len(dataset))
+    val_size = len(dataset) - train_size
+    train_dataset, val_dataset = torch.utils.data.random_split(dataset, [train_size, val_size])
+
+    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True, num_workers=0)
+    val_loader = DataLoader(val_dataset, batch_size=args.batch_size, shuffle=False, num_workers=0)
+
+    num_classes = len(dataset.labels)
+    featurizer = None
+    if model_class is GestureClassifier:
+        hidden = tuple(int(width) for width in args.hidden.split("x"))
+        featurizer = Featurizer.parse(args.features)
+        model = GestureClassifier(input_dim=featurizer.dim, num_classes=num_classes, hidden=hidden, dropout=args.dropout)
+    else:
+        model = model_class(num_classes=num_classes)
+    augment = None
+    if args.augment:
+        augment = LandmarkAugmenter(mirror_prob=args.mirror_prob, mirror_labels=mirror_label_map(dataset.labels))
+    train_model(model, train_loader, val_loader, num_epochs=args.epochs, lr=args.lr, augment=augment,
+                augment_copies=args.augment_copies, featurizer=featurizer)
 
     # Save the trained model weights
-    torch.save(model.state_dict(), "gesture_classifier_weights.pth")
-    print("Training complete and model saved as gesture_classifier_weights.pth")
+    torch.save(model.state_dict(), weights_path)
+    if featurizer is not None:
+        # Export and the eager fallbacks rebuild the model from the features and architecture in a sidecar file
+        write_feature_spec(weights_path, featurizer,
+                           model={"num_classes": num_classes, "hidden": list(hidden), "dropout": args.dropout},
+                           class_names=dataset.labels)
+    else:
+        # The temporal model's labels come from the sequence folders
+        write_feature_spec(weights_path, model={"num_classes": num_classes}, class_names=dataset.labels)
+    print(f"Training complete and model saved as {weights_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,215 @@
+import json
+import hashlib
+from pathlib import Path
+import numpy as np
+import moderngl
+from moderngl import Context, Texture
+from moderngl_window.opengl.vao import VAO
+from moderngl_window.geometry.attributes import AttributeNames
+from moderngl_window.loaders.scene.wavefront import translate_buffer_format
+from mesh_lod import MeshLOD, build_lod_chain, bounding_sphere, position_offset
+
+# Bump when the cache layout changes so stale entries are rebuilt
+CACHE_VERSION = 1
+
+
+class AssetCache:
+    def __init__(self, ctx: Context, resource_dir: Path, cache_dir: Path = None):
+        """Binary cache for meshes and textures. The first launch parses the OBJ/JPEG sources and writes
+        interleaved vertex buffers, index data and decoded pixels as .npy files. Warm launches memory-map
+        those files straight into GPU buffers and never touch PyWavefront or the image decoder.
+
+        Entries are keyed by the SHA-1 of the source file (plus the load options), so editing an asset
+        automatically produces a new entry.
+
+        Args:
+            ctx (Context): The modernGL context
+            resource_dir (Path): Root that relative asset paths are resolved against
+            cache_dir (Path, optional): Where cache files are written. Defaults to resource_dir / "cache".
+        """
+        self.ctx = ctx
+        self.resource_dir = Path(resource_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else self.resource_dir / "cache"
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, path: Path, **options) -> str:
+        digest = hashlib.sha1()
+        digest.update(path.read_bytes())
+        digest.update(json.dumps({"version": CACHE_VERSION, **options}, sort_keys=True).encode())
+        return f"{path.stem}-{digest.hexdigest()[:16]}"
+
+    # ----- Meshes -----
+    def load_mesh(self, rel_path: str) -> VAO:
+        """Loads the first mesh of an OBJ file as an indexed VAO. It is a drop-in replacement for
+        load_scene(rel_path).root_nodes[0].mesh.vao.
+
+        Args:
+            rel_path (str): Path of the .obj file relative to resource_dir
+
+        Returns:
+            VAO: The mesh VAO with in_texcoord_0 / in_normal / in_position attributes
+        """
+        path = self.resource_dir / rel_path
+        key = self._key(path, kind="mesh")
+        meta_path = self.cache_dir / f"{key}.mesh.json"
+        if meta_path.exists():
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._build_mesh(path, key)
+
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        return self._upload_mesh(meta, key)
+
+    def _upload_mesh(self, meta: dict, key: str) -> VAO:
+        vertices = np.load(self.cache_dir / f"{key}.vbo.npy", mmap_mode='r')
+        indices = np.load(self.cache_dir / f"{key}.ibo.npy", mmap_mode='r')
+        vao = VAO(meta["name"], mode=moderngl.TRIANGLES)
+        # moderngl reads the memory maps directly through the buffer protocol
+        vao.buffer(self.ctx.buffer(vertices), meta["buffer_format"], meta["attributes"])
+        vao.index_buffer(self.ctx.buffer(indices), index_element_size=4)
+        return vao
+
+    def _parse_obj(self, path: Path):
+        """Returns (material name, buffer format, attributes, interleaved vertices, indices) of an OBJ file"""
+        import pywavefront
+        data = pywavefront.Wavefront(str(path), create_materials=True, parse=True)
+        material = next(mat for mat in data.materials.values() if mat.vertices)
+        buffer_format, attributes, _ = translate_buffer_format(material.vertex_format, AttributeNames)
+
+        stride = sum(int(fmt[:-1]) for fmt in buffer_format.split())
+        interleaved = np.asarray(material.vertices, dtype='f4').reshape(-1, stride)
+        # PyWavefront expands every face corner; collapse identical corners into an index buffer.
+        # Vertices keep the order of their first use, which preserves the post-transform cache locality.
+        _, first, inverse = np.unique(interleaved, axis=0, return_index=True, return_inverse=True)
+        order = np.argsort(first)
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+        vertices = np.ascontiguousarray(interleaved[first[order]])
+        indices = remap[inverse.reshape(-1)].astype('u4')
+        return material.name, buffer_format, attributes, vertices, indices
+
+    def _build_mesh(self, path: Path, key: str) -> None:
+        name, buffer_format, attributes, vertices, indices = self._parse_obj(path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        np.save(self.cache_dir / f"{key}.vbo.npy", vertices)
+        np.save(self.cache_dir / f"{key}.ibo.npy", indices)
+        # The metadata is written last, it marks the entry as complete
+        with open(self.cache_dir / f"{key}.mesh.json", 'w') as f:
+            json.dump({
+                "name": name,
+                "source": str(path.name),
+                "buffer_format": buffer_format,
+                "attributes": attributes,
+                "vertices": len(vertices),
+                "indices": len(indices),
+            }, f, indent=1)
+
+    def load_mesh_lods(self, rel_path: str, max_levels: int = 4) -> MeshLOD:
+        """Loads a mesh together with its simplified levels of detail and bounding sphere (see
+        src/mesh_lod.py). The levels are built once, by build_mesh_lods or on the first load, and stored
+        in the cache next to the mesh.
+
+        Args:
+            rel_path (str): Path of the .obj file relative to resource_dir
+            max_levels (int, optional): Levels including the full mesh. Defaults to 4.
+
+        Returns:
+            MeshLOD: One VAO per level, finest first
+        """
+        meta = self.build_mesh_lods(rel_path, max_levels)
+        levels = [self._upload_mesh(meta, level["key"]) for level in meta["levels"]]
+        return MeshLOD(levels, [level["error"] for level in meta["levels"]], meta["center"], meta["radius"],
+                       [level["indices"] // 3 for level in meta["levels"]])
+
+    def build_mesh_lods(self, rel_path: str, max_levels: int = 4) -> dict:
+        """Simplifies a mesh into its levels of detail and writes them to the cache, unless they are
+        already there. Needs no GL context, so the levels can be built offline.
+
+        Returns:
+            dict: The LOD metadata (bounding sphere, and cache key, error and size of every level)
+        """
+        path = self.resource_dir / rel_path
+        key = self._key(path, kind="mesh_lod", max_levels=max_levels)
+        meta_path = self.cache_dir / f"{key}.lod.json"
+        if meta_path.exists():
+            self.hits += 1
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        self.misses += 1
+
+        name, buffer_format, attributes, vertices, indices = self._parse_obj(path)
+        offset = position_offset(buffer_format, attributes)
+        center, radius = bounding_sphere(vertices[:, offset:offset + 3].astype(np.float64))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        levels = []
+        for level, (level_vertices, level_indices, error) in enumerate(
+                build_lod_chain(vertices, indices, offset, max_levels)):
+            level_key = f"{key}.lod{level}"
+            np.save(self.cache_dir / f"{level_key}.vbo.npy", level_vertices)
+            np.save(self.cache_dir / f"{level_key}.ibo.npy", level_indices)
+            levels.append({"key": level_key, "error": error, "vertices": len(level_vertices),
+                           "indices": len(level_indices)})
+        meta = {
+            "name": name,
+            "source": str(path.name),
+            "buffer_format": buffer_format,
+            "attributes": attributes,
+            "center": center.tolist(),
+            "radius": radius,
+            "levels": levels,
+        }
+        # The metadata is written last, it marks the entry as complete
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=1)
+        return meta
+
+    # ----- Textures -----
+    def load_texture(self, rel_path: str, flip_y: bool = True, mipmap: bool = False,
+                     anisotropy: float = 1.0) -> Texture:
+        """Loads a 2D texture from decoded, cached pixels. Matches load_texture_2d(rel_path), which also
+        flips images vertically by default.
+
+        Args:
+            rel_path (str): Path of the image relative to resource_dir
+            flip_y (bool, optional): Flip the image top to bottom. Defaults to True.
+            mipmap (bool, optional): Generate mipmaps after upload. Defaults to False.
+            anisotropy (float, optional): Anisotropic filtering samples. Defaults to 1.0.
+
+        Returns:
+            Texture: The texture
+        """
+        path = self.resource_dir / rel_path
+        key = self._key(path, kind="texture", flip_y=flip_y)
+        pixels_path = self.cache_dir / f"{key}.tex.npy"
+        if pixels_path.exists():
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._build_texture(path, pixels_path, flip_y)
+
+        pixels = np.load(pixels_path, mmap_mode='r')
+        height, width, components = pixels.shape
+        texture = self.ctx.texture((width, height), components, pixels)
+        if mipmap:
+            texture.build_mipmaps()
+            texture.anisotropy = anisotropy
+        return texture
+
+    def _build_texture(self, path: Path, pixels_path: Path, flip_y: bool) -> None:
+        from PIL import Image
+        with Image.open(path) as image:
+            if image.mode not in ("L", "RGB", "RGBA"):
+                image = image.convert("RGBA")
+            if flip_y:
+                image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+            pixels = np.asarray(image, dtype=np.uint8)
+        if pixels.ndim == 2:
+            pixels = pixels[:, :, None]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a partially written file is never mistaken for a cache hit
+        tmp_path = pixels_path.with_suffix(".tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(pixels))
+        tmp_path.replace(pixels_path)
@@ -0,0 +1,119 @@
+import math
+import torch
+
+WRIST = 0
+
+
+def mirror_label_map(label_names):
+    """
+    Returns the class each class becomes when the hand is mirrored, as a list
+    indexed by class. Labels containing "left"/"right" map to their counterpart;
+    when the counterpart does not exist the entry is None and samples of that
+    class are never mirrored. Every other class maps to itself.
+    """
+    if isinstance(label_names, dict):
+        label_names = [label_names[i] for i in sorted(label_names)]
+    index = {name: i for i, name in enumerate(label_names)}
+    mapping = []
+    for i, name in enumerate(label_names):
+        if "right" in name:
+            mapping.append(index.get(name.replace("right", "left")))
+        elif "left" in name:
+            mapping.append(index.get(name.replace("left", "right")))
+        else:
+            mapping.append(i)
+    return mapping
+
+
+def rotation_matrices(angles):
+    """
+    Builds (B, 3, 3) rotation matrices Rz @ Ry @ Rx from (B, 3) angles in radians
+    (rotation about x, y and z).
+    """
+    cx, cy, cz = torch.cos(angles).unbind(-1)
+    sx, sy, sz = torch.sin(angles).unbind(-1)
+    one, zero = torch.ones_like(cx), torch.zeros_like(cx)
+    rx = torch.stack([one, zero, zero, zero, cx, -sx, zero, sx, cx], -1).view(-1, 3, 3)
+    ry = torch.stack([cy, zero, sy, zero, one, zero, -sy, zero, cy], -1).view(-1, 3, 3)
+    rz = torch.stack([cz, -sz, zero, sz, cz, zero, zero, zero, one], -1).view(-1, 3, 3)
+    return rz @ ry @ rx
+
+
+class LandmarkAugmenter:
+    def __init__(self, rotation_deg=(10.0, 10.0, 20.0), scale=(0.85, 1.15), translation=0.05,
+                 mirror_prob=0.0, mirror_labels=None, jitter_std=0.004, generator=None):
+        """
+        Random geometric augmentation of landmark batches, applied as a few
+        tensor ops on the whole batch instead of per sample, so every epoch sees
+        freshly transformed hands without decoding images or running MediaPipe.
+
+        Accepts (B, 63), (B, 21, 3) or (B, T, 63) batches. Each sample draws one
+        transform; the frames of a (B, T, 63) window share it. All-zero vectors
+        (images or frames without a detected hand) stay zero.
+
+        rotation_deg: maximum rotation about the wrist around the x, y and z
+            axes, z being the in-plane rotation
+        scale: (min, max) uniform scale about the wrist
+        translation: maximum x/y shift in normalized image coordinates
+        mirror_prob: probability of mirroring a sample horizontally, which
+            turns a left hand into a right one
+        mirror_labels: class mapping applied to mirrored samples, see
+            mirror_label_map. Classes mapped to None are never mirrored.
+        jitter_std: standard deviation of the Gaussian noise added to every
+            coordinate
+        """
+        self.rotation = torch.tensor(rotation_deg, dtype=torch.float32) * (math.pi / 180)
+        self.scale = scale
+        self.translation = translation
+        self.mirror_prob = mirror_prob
+        self.jitter_std = jitter_std
+        self.generator = generator
+        self.mirror_to = None
+        self.mirror_allowed = None
+        if mirror_labels is not None:
+            self.mirror_allowed = torch.tensor([target is not None for target in mirror_labels])
+            self.mirror_to = torch.tensor([i if target is None else target for i, target in enumerate(mirror_labels)])
+
+    def _uniform(self, *shape, low=-1.0, high=1.0):
+        return torch.rand(*shape, generator=self.generator) * (high - low) + low
+
+    def __call__(self, features, labels=None):
+        """
+        Returns (augmented features, labels) with the input's shape and dtype.
+        labels is only changed by mirroring and may be None.
+        """
+        shape = features.shape
+        batch = shape[0]
+        # (B, F, 21, 3): F frames per sample, 1 for single-frame inputs
+        points = features.reshape(batch, -1, 21, 3).float()
+        present = points.abs().sum(dim=(2, 3), keepdim=True) > 0
+
+        wrist = points[:, :, WRIST:WRIST + 1]
+        centered = points - wrist
+
+        if self.mirror_prob > 0:
+            mirror = torch.rand(batch, generator=self.generator) < self.mirror_prob
+            if self.mirror_allowed is not None and labels is not None:
+                mirror &= self.mirror_allowed[labels]
+            # Mirroring the image maps x to 1 - x, relative to the wrist it only flips the sign
+            sign = torch.ones(batch, 1, 1, 3)
+            sign[mirror, ..., 0] = -1.0
+            centered = centered * sign
+            wrist = wrist.clone()
+            wrist[..., 0] = torch.where(mirror.view(batch, 1, 1), 1.0 - wrist[..., 0], wrist[..., 0])
+            if labels is not None and self.mirror_to is not None:
+                labels = torch.where(mirror, self.mirror_to[labels], labels)
+
+        rotation = rotation_matrices(self._uniform(batch, 3) * self.rotation)
+        scale = self._uniform(batch, 1, 1, 1, low=self.scale[0], high=self.scale[1])
+        # Row vectors: p' = p @ R^T
+        transformed = centered @ rotation.transpose(1, 2).unsqueeze(1) * scale
+
+        shift = torch.zeros(batch, 1, 1, 3)
+        shift[..., :2] = self._uniform(batch, 1, 1, 2) * self.translation
+        transformed = transformed + wrist + shift
+        if self.jitter_std:
+            transformed = transformed + torch.randn(transformed.shape, generator=self.generator) * self.jitter_std
+
+        transformed = torch.where(present, transformed, points)
+        return transformed.reshape(shape).to(features.dtype), labels
@@ -0,0 +1,360 @@
+import os
+import json
+import hashlib
+import cv2
+import numpy as np
+try:
+    from .features import landmarks_to_array
+except ImportError:
+    # Loaded as a top-level module (src/utils.py runs with src/ on the path)
+    from features import landmarks_to_array
+
+# Number of values in a flattened landmark vector (21 landmarks * 3 coordinates)
+LANDMARK_DIM = 63
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Landmarks tracked while src/utils.py captured images, one row per image of the session (zeros without a
+# hand). The images are the samples, so these files are not loaded as landmark-only samples
+IMAGE_LANDMARKS_SUFFIX = ".images.npy"
+
+
+# ----- Define a function to extract landmarks from an image -----
+def extract_landmarks(image_path, hands):
+    """
+    Reads an image, processes it with MediaPipe Hands to extract landmarks,
+    and returns a 63-dimensional vector (21 landmarks * 3 coordinates).
+    If no hand is detected, returns a vector of zeros.
+    """
+    landmarks, _ = extract_landmarks_with_flag(image_path, hands)
+    return landmarks
+
+
+def extract_landmarks_with_flag(image_path, hands):
+    """
+    Same as extract_landmarks, but also returns whether a hand was detected so
+    callers can tell a genuine zero vector apart from a failed detection.
+    """
+    img = cv2.imread(image_path)
+    if img is None:
+        return np.zeros(LANDMARK_DIM, dtype=np.float32), False
+    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    results = hands.process(img_rgb)
+    if results.multi_hand_landmarks:
+        # Use the first detected hand.
+        return landmarks_to_array(results.multi_hand_landmarks[:1]).reshape(LANDMARK_DIM), True
+    else:
+        return np.zeros(LANDMARK_DIM, dtype=np.float32), False
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Returns the SHA-1 hex digest of a file's contents."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ----- Persistent landmark feature cache -----
+class LandmarkCache:
+    def __init__(self, cache_dir, min_detection_confidence=0.5, max_num_hands=1, static_image_mode=True):
+        """
+        Content-addressed on-disk cache of extracted landmark vectors.
+
+        Layout of cache_dir:
+          index.json     detector settings + {path: {size, mtime_ns, sha1, row}}
+          features.npy   (N, 63) float32 landmark vectors, memory-mapped on load
+          detected.npy   (N,) uint8 "hand detected" flags
+
+        An entry is reused when the image's size and mtime still match. If they
+        changed, the file is re-hashed and the row is reused only when the
+        content is identical. Rows are also shared between paths with the same
+        content hash. Changing the detector settings invalidates every entry.
+        Landmarks tracked in video mode (static_image_mode=False) differ from
+        single-image detections, so the mode is part of the settings.
+        """
+        self.cache_dir = cache_dir
+        self.settings = {
+            "min_detection_confidence": float(min_detection_confidence),
+            "max_num_hands": int(max_num_hands),
+            "static_image_mode": bool(static_image_mode),
+        }
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.features_path = os.path.join(cache_dir, "features.npy")
+        self.detected_path = os.path.join(cache_dir, "detected.npy")
+
+        self.entries = {}
+        self.rows_by_hash = {}
+        self.features = np.zeros((0, LANDMARK_DIM), dtype=np.float32)
+        self.detected = np.zeros(0, dtype=np.uint8)
+        # Rows added since the last flush
+        self._new_features = []
+        self._new_detected = []
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.index_path) and os.path.exists(self.features_path)
+                and os.path.exists(self.detected_path)):
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            features = np.load(self.features_path, mmap_mode='r')
+            detected = np.load(self.detected_path, mmap_mode='r')
+        except (OSError, ValueError):
+            print(f"Landmark cache at {self.cache_dir} is unreadable, rebuilding it")
+            return
+
+        if index.get("settings") != self.settings:
+            print("Detector settings changed, invalidating landmark cache")
+            return
+        if features.shape[1:] != (LANDMARK_DIM,) or len(features) != len(detected):
+            print(f"Landmark cache at {self.cache_dir} is inconsistent, rebuilding it")
+            return
+
+        self.entries = index.get("entries", {})
+        self.features = features
+        self.detected = detected
+        for entry in self.entries.values():
+            self.rows_by_hash[entry["sha1"]] = entry["row"]
+
+    def __len__(self):
+        return len(self.features) + len(self._new_features)
+
+    def _row(self, row):
+        if row < len(self.features):
+            return self.features[row], bool(self.detected[row])
+        offset = row - len(self.features)
+        return self._new_features[offset], bool(self._new_detected[offset])
+
+    def lookup(self, image_path):
+        """Returns (landmarks, detected) for image_path, or None on a cache miss."""
+        key = os.path.abspath(image_path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+
+        entry = self.entries.get(key)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return self._row(entry["row"])
+
+        # Size or mtime changed (or new path): fall back to the content hash
+        sha1 = hash_file(key)
+        row = self.rows_by_hash.get(sha1)
+        if row is None:
+            return None
+        self.entries[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1, "row": row}
+        self._dirty = True
+        return self._row(row)
+
+    def store(self, image_path, landmarks, detected):
+        """Adds a freshly extracted landmark vector for image_path."""
+        key = os.path.abspath(image_path)
+        stat = os.stat(key)
+        sha1 = hash_file(key)
+        row = len(self)
+        self._new_features.append(np.asarray(landmarks, dtype=np.float32).reshape(LANDMARK_DIM))
+        self._new_detected.append(1 if detected else 0)
+        self.entries[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1, "row": row}
+        self.rows_by_hash[sha1] = row
+        self._dirty = True
+
+    def _compaction(self):
+        """
+        Drops the entries of deleted images. Returns the rows still referenced
+        by an entry, or None when every row is (nothing to compact).
+        """
+        deleted = [key for key in self.entries if not os.path.exists(key)]
+        for key in deleted:
+            del self.entries[key]
+        referenced = sorted({entry["row"] for entry in self.entries.values()})
+        if not deleted and len(referenced) == len(self):
+            return None
+        self._dirty = True
+        return referenced
+
+    def flush(self):
+        """
+        Writes new rows and the index to disk. Rows no entry refers to any more
+        (deleted or rewritten images) are compacted away, so the arrays do not
+        grow without bound. Existing rows are rewritten only when rows were
+        added or removed.
+        """
+        keep = self._compaction()
+        if not self._dirty:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._new_features or (keep is not None and len(keep) < len(self)):
+            new_features = np.array(self._new_features, dtype=np.float32).reshape(-1, LANDMARK_DIM)
+            features = np.concatenate([np.asarray(self.features), new_features])
+            detected = np.concatenate([np.asarray(self.detected), np.array(self._new_detected, dtype=np.uint8)])
+            if keep is not None:
+                features, detected = features[keep], detected[keep]
+                new_rows = {old: new for new, old in enumerate(keep)}
+                for entry in self.entries.values():
+                    entry["row"] = new_rows[entry["row"]]
+                self.rows_by_hash = {entry["sha1"]: entry["row"] for entry in self.entries.values()}
+            # Drop the old memory maps so the files can be replaced on every platform
+            self.features = self.detected = None
+            # Write to temporary files first so an interrupted flush never leaves a torn cache
+            np.save(self.features_path + ".tmp.npy", features)
+            np.save(self.detected_path + ".tmp.npy", detected)
+            os.replace(self.features_path + ".tmp.npy", self.features_path)
+            os.replace(self.detected_path + ".tmp.npy", self.detected_path)
+            self.features = np.load(self.features_path, mmap_mode='r')
+            self.detected = np.load(self.detected_path, mmap_mode='r')
+            self._new_features = []
+            self._new_detected = []
+
+        with open(self.index_path + ".tmp", 'w') as f:
+            json.dump({"settings": self.settings, "entries": self.entries}, f)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        self._dirty = False
+
+
+# ----- Packed landmark arrays written by scripts/preprocess.py -----
+PROCESSED_DIR = os.path.join("data", "processed")
+
+
+def list_image_samples(root_dir):
+    """
+    Walks root_dir/<label>/ and returns (samples, labels) where samples is a
+    list of (image_path, label_idx) and labels is the sorted list of subfolder
+    names. The ordering matches GestureDataset so class indices agree.
+    """
+    labels = sorted([d for d in os.listdir(root_dir) if os.path.isdir(os.path.join(root_dir, d))])
+    samples = []
+    for idx, label in enumerate(labels):
+        folder = os.path.join(root_dir, label)
+        for filename in sorted(os.listdir(folder)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(folder, filename), idx))
+    return samples, labels
+
+
+def load_captured_landmarks(root_dir, labels):
+    """
+    Loads the landmark-only samples written by src/utils.py --no-images:
+    root_dir/<label>/*.npy files holding (N, 63) float32 arrays. The
+    *.images.npy landmarks written next to captured images are skipped.
+    Returns (features (M, 63), label indices (M,), paths) where every path is
+    "<file>#<row>".
+    """
+    features, targets, paths = [], [], []
+    for idx, label in enumerate(labels):
+        label_dir = os.path.join(root_dir, label)
+        for file_name in sorted(os.listdir(label_dir)):
+            if not file_name.endswith(".npy") or file_name.endswith((".tmp.npy", IMAGE_LANDMARKS_SUFFIX)):
+                continue
+            path = os.path.join(label_dir, file_name)
+            rows = np.load(path).reshape(-1, LANDMARK_DIM)
+            features.append(rows.astype(np.float32))
+            targets.extend([idx] * len(rows))
+            paths.extend(f"{path}#{row}" for row in range(len(rows)))
+    if not features:
+        return np.zeros((0, LANDMARK_DIM), dtype=np.float32), np.zeros(0, dtype=np.int64), []
+    return np.concatenate(features), np.array(targets, dtype=np.int64), paths
+
+
+def dataset_digest(root_dir):
+    """
+    SHA-1 over the relative path, size and mtime of every image and
+    landmark-only capture under root_dir/<label>/. It changes whenever a
+    sample is added, removed or rewritten, without reading any pixels.
+    """
+    digest = hashlib.sha1()
+    samples, labels = list_image_samples(root_dir)
+    files = [path for path, _ in samples]
+    for label in labels:
+        label_dir = os.path.join(root_dir, label)
+        files.extend(os.path.join(label_dir, name) for name in sorted(os.listdir(label_dir))
+                     if name.endswith(".npy") and not name.endswith(".tmp.npy"))
+    for path in files:
+        stat = os.stat(path)
+        digest.update(f"{os.path.relpath(path, root_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def save_packed_landmarks(out_dir, features, labels, detected, label_names, paths, root=None, digest=None):
+    """
+    Writes a packed dataset:
+      landmarks.npy  (N, 63) float32
+      labels.npy     (N,) int64 class indices
+      detected.npy   (N,) uint8 "hand detected" flags
+      index.json     {"labels": [label names], "paths": [source path per row],
+                      "root": absolute dataset root the pack was built from,
+                      "digest": dataset_digest of that root}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "landmarks.npy"), np.asarray(features, dtype=np.float32).reshape(-1, LANDMARK_DIM))
+    np.save(os.path.join(out_dir, "labels.npy"), np.asarray(labels, dtype=np.int64))
+    np.save(os.path.join(out_dir, "detected.npy"), np.asarray(detected, dtype=np.uint8))
+    with open(os.path.join(out_dir, "index.json"), 'w') as f:
+        json.dump({"labels": list(label_names), "paths": list(paths),
+                   "root": os.path.abspath(root) if root is not None else None, "digest": digest}, f, indent=1)
+
+
+def has_packed_landmarks(processed_dir=PROCESSED_DIR):
+    """Returns True if processed_dir contains the output of scripts/preprocess.py."""
+    return all(os.path.exists(os.path.join(processed_dir, name))
+               for name in ("landmarks.npy", "labels.npy", "detected.npy", "index.json"))
+
+
+def load_packed_landmarks(processed_dir=PROCESSED_DIR, mmap_mode='r'):
+    """
+    Loads the output of scripts/preprocess.py without touching MediaPipe.
+
+    Returns:
+        dict with "features" (N, 63) float32, "labels" (N,) int64,
+        "detected" (N,) bool, "label_names", "paths", "root" and "digest"
+        (None for packs written before they were recorded).
+    """
+    with open(os.path.join(processed_dir, "index.json"), 'r') as f:
+        index = json.load(f)
+    return {
+        "features": np.load(os.path.join(processed_dir, "landmarks.npy"), mmap_mode=mmap_mode),
+        "labels": np.load(os.path.join(processed_dir, "labels.npy")),
+        "detected": np.load(os.path.join(processed_dir, "detected.npy")).astype(bool),
+        "label_names": index["labels"],
+        "paths": index["paths"],
+        "root": index.get("root"),
+        "digest": index.get("digest"),
+    }
+
+
+# ----- Landmark sequences for the temporal model -----
+def load_sequence_windows(root_dir, window, stride=1):
+    """
+    Expects a folder structure:
+      root_dir/
+        label1/
+          clip1.npy   (T, 63) or (T, 21, 3) landmark vectors, oldest frame first
+          ...
+    Cuts every clip into overlapping windows of `window` frames, one ending at
+    every frame that has window - 1 frames of history. Earlier frames are not
+    used: a streaming model evaluates its first frames over zero activations,
+    not over convolutions of zero frames, so padded windows would not match
+    it. StreamingGestureRecognizer reports nothing until a hand has been
+    tracked for a full window, and clips shorter than one are skipped.
+
+    Returns:
+        (windows (N, window, 63) float32, labels (N,) int64, label names)
+    """
+    label_names = sorted([d for d in os.listdir(root_dir) if os.path.isdir(os.path.join(root_dir, d))])
+    windows, labels = [], []
+    for idx, label in enumerate(label_names):
+        folder = os.path.join(root_dir, label)
+        for filename in sorted(os.listdir(folder)):
+            if not filename.lower().endswith('.npy'):
+                continue
+            clip = np.load(os.path.join(folder, filename)).astype(np.float32).reshape(-1, LANDMARK_DIM)
+            if len(clip) < window:
+                continue
+            # (T - window + 1, window, 63) view, one window ending at every frame with a full history
+            clip_windows = np.lib.stride_tricks.sliding_window_view(clip, window, axis=0).transpose(0, 2, 1)
+            windows.append(clip_windows[::stride])
+            labels.append(np.full(len(clip_windows[::stride]), idx, dtype=np.int64))
+    if not windows:
+        return np.zeros((0, window, LANDMARK_DIM), dtype=np.float32), np.zeros(0, dtype=np.int64), label_names
+    return np.ascontiguousarray(np.concatenate(windows)), np.concatenate(labels), label_names
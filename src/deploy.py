@@ -0,0 +1,204 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+# Where scripts/export.py writes the deployment artifacts and their manifest
+FINAL_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "final")
+MANIFEST_NAME = "manifest.json"
+
+
+class TorchPredictor:
+    def __init__(self, module, name: str = "eager", class_names: dict = None, features: dict = None):
+        """Wraps an eager or TorchScript module behind the NumPy-in, NumPy-out predictor interface
+        shared by every backend.
+
+        Args:
+            module (nn.Module | ScriptModule): A model in eval mode mapping (H, 63) to (H, num_classes)
+            name (str, optional): Variant name used in reports. Defaults to "eager".
+            class_names (dict, optional): Mapping of class index to gesture name. Defaults to None.
+            features (dict, optional): Featurizer spec of the inputs (see src/features.py). Defaults to None
+                (raw landmarks).
+        """
+        import torch
+        self.torch = torch
+        self.module = module
+        self.name = name
+        self.class_names = class_names or {}
+        self.features = features
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        """Runs one forward pass
+
+        Args:
+            batch (np.ndarray): (H, 63) float32 landmark vectors
+
+        Returns:
+            np.ndarray: (H, num_classes) logits
+        """
+        with self.torch.inference_mode():
+            return self.module(self.torch.from_numpy(np.ascontiguousarray(batch, dtype=np.float32))).numpy()
+
+
+class NumpyPredictor:
+    def __init__(self, weights: list, biases: list, name: str = "numpy", class_names: dict = None,
+                 features: dict = None):
+        """Pure-NumPy inference for the BatchNorm-folded GestureClassifier MLP, so the live loops can run
+        without importing torch. Every layer is a float32 matmul written into a buffer that is allocated
+        once per batch size and reused afterwards.
+
+        Args:
+            weights (list): (in, out) float32 weight per Linear layer
+            biases (list): (out,) float32 bias per Linear layer
+            name (str, optional): Variant name used in reports. Defaults to "numpy".
+            class_names (dict, optional): Mapping of class index to gesture name. Defaults to None.
+            features (dict, optional): Featurizer spec of the inputs (see src/features.py). Defaults to None
+                (raw landmarks).
+        """
+        self.weights = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.ascontiguousarray(b, dtype=np.float32) for b in biases]
+        self.name = name
+        self.class_names = class_names or {}
+        self.features = features
+        self._buffers = {}
+
+    @classmethod
+    def load(cls, path: str, name: str = "numpy", class_names: dict = None, features: dict = None) -> "NumpyPredictor":
+        """Loads weights written by NumpyPredictor.save"""
+        with np.load(path) as data:
+            num_layers = int(data["num_layers"])
+            weights = [data[f"w{i}"] for i in range(num_layers)]
+            biases = [data[f"b{i}"] for i in range(num_layers)]
+        return cls(weights, biases, name, class_names, features)
+
+    @staticmethod
+    def save(path: str, weights: list, biases: list) -> None:
+        """Writes (in, out) weights and biases to a compact .npz"""
+        arrays = {"num_layers": np.array(len(weights))}
+        for i, (w, b) in enumerate(zip(weights, biases)):
+            arrays[f"w{i}"] = np.asarray(w, dtype=np.float32)
+            arrays[f"b{i}"] = np.asarray(b, dtype=np.float32)
+        np.savez(path, **arrays)
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        """Runs one forward pass
+
+        Args:
+            batch (np.ndarray): (H, 63) float32 landmark vectors
+
+        Returns:
+            np.ndarray: (H, num_classes) logits. The array is reused by the next call with the same batch size.
+        """
+        buffers = self._buffers.get(len(batch))
+        if buffers is None:
+            buffers = [np.empty((len(batch), w.shape[1]), dtype=np.float32) for w in self.weights]
+            self._buffers[len(batch)] = buffers
+
+        h = np.asarray(batch, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i, (w, b, out) in enumerate(zip(self.weights, self.biases, buffers)):
+            np.matmul(h, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0.0, out=out)  # ReLU
+            h = out
+        return h
+
+
+def read_manifest(model_dir: str = FINAL_MODEL_DIR):
+    """Returns the export manifest as a dict, or None when nothing was exported yet"""
+    path = os.path.join(model_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def weights_source(weights_path: str) -> dict:
+    """Identifies the trained weights an export was built from: absolute path and SHA-1 of the file"""
+    with open(weights_path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    return {"weights": os.path.abspath(weights_path), "sha1": digest}
+
+
+def stale_export_reason(manifest: dict):
+    """Why the export no longer matches the weights it was built from, None while it does (or when that
+    cannot be told: older manifests, weights that were moved away)
+    """
+    source = manifest.get("source")
+    if not source or not os.path.exists(source["weights"]):
+        return None
+    if weights_source(source["weights"])["sha1"] != source["sha1"]:
+        return f"{source['weights']} changed since it was exported"
+    return None
+
+
+def load_gesture_predictor(model_dir: str = FINAL_MODEL_DIR, variant: str = None):
+    """Loads an exported gesture classifier. Without a variant, the fastest one recorded in the
+    manifest by scripts/export.py is used.
+
+    Args:
+        model_dir (str, optional): Directory holding the manifest and artifacts. Defaults to models/final.
+        variant (str, optional): Name of a specific variant, e.g. "fp32" or "int8". Defaults to None.
+
+    Returns:
+        A predictor mapping (H, F) float32 features to (H, num_classes) logits, or None if no export exists.
+        Its `features` attribute is the Featurizer spec the inputs need (None for raw (H, 63) landmarks).
+        Without a variant, None is also returned when the weights were retrained after the export, so
+        callers fall back to the eager weights.
+    """
+    manifest = read_manifest(model_dir)
+    if manifest is None:
+        return None
+    stale = stale_export_reason(manifest)
+    if stale is not None:
+        if variant is None:
+            print(f"Ignoring the export in {model_dir}: {stale}, re-run scripts/export.py")
+            return None
+        print(f"Warning: the export in {model_dir} is stale: {stale}")
+    variant = variant or manifest["fastest"]
+    entry = manifest["variants"][variant]
+    path = os.path.join(model_dir, entry["path"])
+    # JSON object keys are strings, class indices are ints
+    class_names = {int(idx): name for idx, name in manifest.get("class_names", {}).items()}
+    features = manifest.get("features")
+
+    if entry["format"] == "npz":
+        return NumpyPredictor.load(path, variant, class_names, features)
+    if entry["format"] == "torchscript":
+        # Only TorchScript variants pay for importing torch
+        import torch
+        module = torch.jit.load(path, map_location="cpu")
+        module.eval()
+        return TorchPredictor(module, variant, class_names, features)
+    raise ValueError(f"Unknown artifact format {entry['format']!r} for variant {variant!r}")
+
+
+def load_eager_predictor(weights_path: str = "gesture_classifier_weights.pth", class_names: dict = None):
+    """Loads GestureClassifier weights saved by scripts/train.py, rebuilt with the features and architecture
+    recorded in their sidecar (see src/features.py).
+
+    Args:
+        weights_path (str, optional): The trained weights. Defaults to "gesture_classifier_weights.pth".
+        class_names (dict, optional): Mapping of class index to gesture name. Defaults to the names recorded
+            in the sidecar, else CLASS_NAMES.
+
+    Returns:
+        TorchPredictor: The model in eval mode, or None when the weights do not exist
+    """
+    if not os.path.exists(weights_path):
+        return None
+    import torch
+    try:
+        from .features import Featurizer, read_weights_spec
+        from .model import GestureClassifier, CLASS_NAMES
+    except ImportError:
+        from features import Featurizer, read_weights_spec
+        from model import GestureClassifier, CLASS_NAMES
+    spec = read_weights_spec(weights_path)
+    class_names = class_names or spec["class_names"] or CLASS_NAMES
+    options = {"num_classes": len(class_names), **spec["model"]}
+    model = GestureClassifier(input_dim=Featurizer.from_spec(spec["features"]).dim, **options)
+    model.load_state_dict(torch.load(weights_path, map_location=torch.device('cpu')))
+    model.eval()
+    return TorchPredictor(model, class_names=class_names, features=spec["features"])
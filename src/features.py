@@ -0,0 +1,212 @@
+import os
+import json
+import operator
+import itertools
+import numpy as np
+
+NUM_LANDMARKS = 21
+WRIST = 0
+MIDDLE_MCP = 9
+# Landmark chains of the five fingers, starting at the wrist
+FINGERS = ((0, 1, 2, 3, 4), (0, 5, 6, 7, 8), (0, 9, 10, 11, 12), (0, 13, 14, 15, 16), (0, 17, 18, 19, 20))
+# (previous, joint, next) for the three bending joints of every finger
+ANGLE_TRIPLES = np.array([finger[i:i + 3] for finger in FINGERS for i in range(3)])
+PAIRS = np.triu_indices(NUM_LANDMARKS, 1)
+
+# A serialized NormalizedLandmark with only x, y and z set: field 1 (length 15) holding three fixed32 floats.
+# Hands from MediaPipe serialize to exactly this layout, so whole hands convert with one strided view
+_RECORD_SIZE = 17
+_RECORD_TAGS = {0: 0x0a, 1: 15, 2: 0x0d, 7: 0x15, 12: 0x1d}
+_xyz = operator.attrgetter('x', 'y', 'z')
+
+
+def landmarks_to_array(hand_list, out: np.ndarray = None) -> np.ndarray:
+    """Converts MediaPipe landmark lists (results.multi_hand_landmarks) to an (H, 21, 3) float32 array.
+    The protos are serialized in C and read with one strided NumPy view instead of touching every
+    landmark attribute from Python.
+
+    Args:
+        hand_list (list): NormalizedLandmarkList per hand, may be empty or None
+        out (np.ndarray, optional): (>= H, 21, 3) float32 buffer to write into. Defaults to a new array.
+
+    Returns:
+        np.ndarray: (H, 21, 3) float32, a view into out when given
+    """
+    hand_list = hand_list or []
+    count = len(hand_list)
+    out = np.empty((count, NUM_LANDMARKS, 3), dtype=np.float32) if out is None else out[:count]
+    if count == 0:
+        return out
+    data = b"".join([hand.SerializeToString() for hand in hand_list])
+    records = count * NUM_LANDMARKS
+    if len(data) == records * _RECORD_SIZE:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(records, _RECORD_SIZE)
+        if all((raw[:, offset] == tag).all() for offset, tag in _RECORD_TAGS.items()):
+            out.reshape(records, 3)[:] = np.ndarray((records, 3), dtype='<f4', buffer=data, offset=3,
+                                                     strides=(_RECORD_SIZE, 5))
+            return out
+    # Landmarks carrying visibility/presence (or other protos) take the generic path
+    out.reshape(-1)[:] = np.fromiter(itertools.chain.from_iterable(
+        map(_xyz, itertools.chain.from_iterable(hand.landmark for hand in hand_list))),
+        dtype=np.float32, count=records * 3)
+    return out
+
+
+def normalize_landmarks(points: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Wrist-relative, scale-invariant landmarks: every landmark minus the wrist, divided by the palm size
+    (wrist to middle finger knuckle). All-zero hands (no detection) stay zero.
+
+    Args:
+        points (np.ndarray): (H, 21, 3) landmarks
+        out (np.ndarray, optional): (H, 21, 3) float32 buffer. Defaults to a new array.
+
+    Returns:
+        np.ndarray: (H, 21, 3) float32
+    """
+    out = np.subtract(points, points[:, WRIST:WRIST + 1], out=out, dtype=np.float32)
+    palm = np.linalg.norm(out[:, MIDDLE_MCP], axis=1)
+    palm[palm < 1e-6] = 1.0
+    out /= palm[:, None, None]
+    return out
+
+
+def pairwise_distances(points: np.ndarray) -> np.ndarray:
+    """(H, 210) distances between every pair of landmarks. Scale-invariant for normalized input."""
+    return np.linalg.norm(points[:, PAIRS[0]] - points[:, PAIRS[1]], axis=2)
+
+
+def joint_angles(points: np.ndarray) -> np.ndarray:
+    """(H, 15) bending angle of every finger joint, in [0, 1] (0 is straight, 1 folded back)"""
+    joint = points[:, ANGLE_TRIPLES[:, 1]]
+    before = points[:, ANGLE_TRIPLES[:, 0]] - joint
+    after = points[:, ANGLE_TRIPLES[:, 2]] - joint
+    lengths = np.linalg.norm(before, axis=2) * np.linalg.norm(after, axis=2)
+    cosine = np.einsum('hjc,hjc->hj', before, after) / np.maximum(lengths, 1e-9)
+    # A straight finger has opposite vectors (cosine -1). Hands without a detection stay zero
+    return np.where(lengths > 1e-9, 1.0 - np.arccos(np.clip(cosine, -1.0, 1.0)) / np.pi, 0.0)
+
+
+class Featurizer:
+    def __init__(self, normalize: bool = False, distances: bool = False, angles: bool = False):
+        """Turns (H, 21, 3) landmark batches into classifier inputs. Without options the features are the
+        raw 63 coordinates the shipped classifier was trained on.
+
+        Args:
+            normalize (bool, optional): Wrist-relative, palm-size-scaled coordinates. Defaults to False.
+            distances (bool, optional): Append the 210 pairwise landmark distances. Defaults to False.
+            angles (bool, optional): Append the 15 finger joint angles. Defaults to False.
+        """
+        self.normalize = normalize
+        self.distances = distances
+        self.angles = angles
+        self.dim = NUM_LANDMARKS * 3 + len(PAIRS[0]) * distances + len(ANGLE_TRIPLES) * angles
+        self._buffers = {}
+
+    @property
+    def spec(self) -> dict:
+        return {"normalize": self.normalize, "distances": self.distances, "angles": self.angles}
+
+    @property
+    def is_raw(self) -> bool:
+        return not (self.normalize or self.distances or self.angles)
+
+    @classmethod
+    def from_spec(cls, spec: dict = None) -> "Featurizer":
+        return cls(**(spec or {}))
+
+    @classmethod
+    def parse(cls, text: str) -> "Featurizer":
+        """'raw', 'normalized', 'normalized+distances+angles', ..."""
+        parts = set(text.split("+")) - {"raw", ""}
+        unknown = parts - {"normalized", "distances", "angles"}
+        if unknown:
+            raise ValueError(f"Unknown features {sorted(unknown)}")
+        return cls("normalized" in parts, "distances" in parts, "angles" in parts)
+
+    def __str__(self) -> str:
+        names = [name for name, on in (("normalized", self.normalize), ("distances", self.distances),
+                                       ("angles", self.angles)) if on]
+        return "+".join(names) or "raw"
+
+    def __call__(self, points: np.ndarray) -> np.ndarray:
+        """Features of a batch.
+
+        Args:
+            points (np.ndarray): (H, 21, 3) or (H, 63) landmarks
+
+        Returns:
+            np.ndarray: (H, dim) float32. For the small batches of the live loops this is a reused buffer,
+                valid until the next call with the same batch size.
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+        count = len(points)
+        if self.is_raw:
+            return points.reshape(count, NUM_LANDMARKS * 3)
+        out = self._buffers.get(count) if count <= 16 else None
+        if out is None:
+            out = np.empty((count, self.dim), dtype=np.float32)
+            if count <= 16:
+                self._buffers[count] = out
+        coordinates = out[:, :NUM_LANDMARKS * 3].reshape(count, NUM_LANDMARKS, 3)
+        if self.normalize:
+            normalize_landmarks(points, out=coordinates)
+        else:
+            coordinates[:] = points
+        column = NUM_LANDMARKS * 3
+        if self.distances:
+            out[:, column:column + len(PAIRS[0])] = pairwise_distances(coordinates)
+            column += len(PAIRS[0])
+        if self.angles:
+            out[:, column:] = joint_angles(coordinates)
+        return out
+
+
+def featurizer_for(predictor) -> Featurizer:
+    """The Featurizer a predictor expects, from its `features` spec (None means raw landmarks)"""
+    return Featurizer.from_spec(getattr(predictor, "features", None))
+
+
+def feature_spec_path(weights_path: str) -> str:
+    """Sidecar file recording the features and architecture a set of trained weights expects"""
+    return os.path.splitext(weights_path)[0] + ".features.json"
+
+
+def read_weights_spec(weights_path: str) -> dict:
+    """Everything recorded next to trained weights: "features" (Featurizer spec, None for raw landmarks),
+    "model" (the classifier's keyword arguments besides input_dim) and "class_names" (class index -> name,
+    None when not recorded). Weights without a sidecar get the defaults.
+    """
+    path = feature_spec_path(weights_path)
+    spec = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            spec = json.load(f)
+        # Older sidecars held only the feature spec
+        if "features" not in spec:
+            spec = {"features": spec}
+    class_names = spec.get("class_names")
+    if class_names is not None:
+        class_names = dict(enumerate(class_names))
+    return {"features": spec.get("features"), "model": spec.get("model", {}), "class_names": class_names}
+
+
+def read_feature_spec(weights_path: str) -> dict:
+    """The feature spec saved next to trained weights, None for raw landmarks"""
+    return read_weights_spec(weights_path)["features"]
+
+
+def write_feature_spec(weights_path: str, featurizer: Featurizer = None, model: dict = None,
+                       class_names: list = None) -> None:
+    """Writes the sidecar of trained weights.
+
+    Args:
+        weights_path (str): The saved weights
+        featurizer (Featurizer, optional): Features the weights were trained on. Defaults to None (raw landmarks).
+        model (dict, optional): Keyword arguments that rebuild the model, e.g. hidden and dropout. Defaults to None.
+        class_names (list, optional): Label of every class, in class index order. Defaults to None.
+    """
+    spec = {"features": None if featurizer is None or featurizer.is_raw else featurizer.spec, "model": model or {}}
+    if class_names is not None:
+        spec["class_names"] = list(class_names)
+    with open(feature_spec_path(weights_path), 'w') as f:
+        json.dump(spec, f)
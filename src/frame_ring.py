@@ -0,0 +1,163 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Shared memory layout: a header, one (sequence, timestamp) entry per slot, then the frames, 64-byte aligned.
+# A slot's sequence is 0 while it is being written, readers check it before and after touching the pixels.
+MAGIC = b"FRMRING"
+VERSION = 1
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("slots", "<u4"),
+    ("height", "<u4"),
+    ("width", "<u4"),
+    ("channels", "<u4"),
+    ("reserved", "<u4"),
+    ("latest", "<u8"),      # sequence of the newest complete frame, 0 before the first one
+])
+SLOT_DTYPE = np.dtype([("seq", "<u8"), ("timestamp", "<f8")])
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class FrameRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """A ring of fixed-size frames in shared memory, written by one process and read by any number of
+        others without copying them through a socket. Use FrameRing.create in the writer and
+        FrameRing.attach(name) in the readers.
+
+        Frames are addressed by a sequence number that keeps increasing; frame `seq` lives in slot
+        seq % slots until it is overwritten `slots` frames later. Readers that fall behind by more than
+        that get None instead of a torn frame.
+        """
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=shm.buf)
+        header = self.header[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"Shared memory {shm.name} is not a frame ring")
+        self.slots = int(header["slots"])
+        self.shape = (int(header["height"]), int(header["width"]), int(header["channels"]))
+        slots_offset = _align(HEADER_DTYPE.itemsize)
+        self.entries = np.ndarray(self.slots, dtype=SLOT_DTYPE, buffer=shm.buf, offset=slots_offset)
+        frames_offset = _align(slots_offset + self.slots * SLOT_DTYPE.itemsize)
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=frames_offset)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, shape: tuple, slots: int = 8, name: str = None) -> "FrameRing":
+        """Allocates a ring for frames of one shape.
+
+        Args:
+            shape (tuple): (height, width) or (height, width, channels) of the uint8 frames
+            slots (int, optional): Frames kept before the oldest is overwritten. Defaults to 8.
+            name (str, optional): Shared memory name. Defaults to a random one.
+
+        Returns:
+            FrameRing: The writable ring, owned by the caller
+        """
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        size = _align(_align(HEADER_DTYPE.itemsize) + slots * SLOT_DTYPE.itemsize) + slots * height * width * channels
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray(1, dtype=HEADER_DTYPE, buffer=shm.buf)
+        header[0] = (MAGIC, VERSION, slots, height, width, channels, 0, 0)
+        ring = cls(shm, owner=True)
+        ring.entries[:] = (0, 0.0)
+        return ring
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        """Opens a ring created by another process"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 every attached process registers the segment with its resource tracker,
+            # which would unlink it (under the writer) when the reader exits
+            from multiprocessing import resource_tracker
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    @property
+    def latest(self) -> int:
+        """Sequence of the newest complete frame, 0 before the first one"""
+        return int(self.header["latest"][0])
+
+    def write(self, frame: np.ndarray, timestamp: float) -> int:
+        """Copies a frame into the next slot. Only one process may write.
+
+        Args:
+            frame (np.ndarray): uint8 frame of the ring's shape
+            timestamp (float): Capture time, time.perf_counter() of the writer
+
+        Returns:
+            int: The frame's sequence number
+        """
+        # Single-channel rings also take (height, width) frames
+        if frame.shape != self.shape and not (self.shape[2] == 1 and frame.shape == self.shape[:2]):
+            raise ValueError(f"Frame of shape {frame.shape} does not fit a ring of {self.shape} frames")
+        seq = self.latest + 1
+        slot = seq % self.slots
+        entry = self.entries[slot:slot + 1]
+        entry["seq"] = 0
+        self.frames[slot].reshape(frame.shape)[:] = frame
+        entry["timestamp"] = timestamp
+        entry["seq"] = seq
+        self.header["latest"] = seq
+        return seq
+
+    def valid(self, seq: int) -> bool:
+        """True while frame seq has not been overwritten"""
+        return seq > 0 and int(self.entries[seq % self.slots]["seq"]) == seq
+
+    def view(self, seq: int):
+        """Zero-copy view of frame seq, or None when it was already overwritten. The pixels may be overwritten
+        while the view is in use, check valid(seq) afterwards when that matters.
+        """
+        if not self.valid(seq):
+            return None
+        return self.frames[seq % self.slots]
+
+    def timestamp(self, seq: int) -> float:
+        return float(self.entries[seq % self.slots]["timestamp"])
+
+    def read(self, seq: int, out: np.ndarray = None):
+        """Copies frame seq out of the ring.
+
+        Args:
+            seq (int): Frame sequence number
+            out (np.ndarray, optional): Frame-shaped uint8 buffer to copy into. Defaults to a new array.
+
+        Returns:
+            np.ndarray | None: The frame, or None when it was overwritten before or during the copy
+        """
+        frame = self.view(seq)
+        if frame is None:
+            return None
+        if out is None:
+            out = frame.copy()
+        else:
+            out[:] = frame
+        return out if self.valid(seq) else None
+
+    def close(self) -> None:
+        """Detaches from the ring, the owner also frees it"""
+        # Views into the buffer must be gone before the mapping can close
+        self.header = self.entries = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
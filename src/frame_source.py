@@ -0,0 +1,189 @@
+import os
+import abc
+import time
+import cv2
+
+# Kept local (same values as src/dataset.py) so the scene can import this module without the src package
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+class FrameSource(abc.ABC):
+    """Common interface of every frame source. It mirrors cv2.VideoCapture (read() -> (ok, frame),
+    release()), so a source can replace a VideoCapture without touching the loop around it.
+
+    Attributes:
+        fps (float): Nominal frame rate of the source
+        timestamp (float): Source time of the last frame read, in seconds from the first frame
+        frame_index (int): Number of frames read so far
+    """
+    def __init__(self, fps: float, realtime: bool = False):
+        self.fps = fps
+        self.realtime = realtime
+        self.timestamp = 0.0
+        self.frame_index = 0
+        self._started_at = None
+
+    def read(self):
+        ok, frame, timestamp = self._next()
+        if not ok:
+            return False, None
+        if self._started_at is None:
+            self._started_at = time.perf_counter() - timestamp
+        elif self.realtime:
+            # Recorded pacing: never hand out a frame before its timestamp
+            delay = self._started_at + timestamp - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.timestamp = timestamp
+        self.frame_index += 1
+        return True, frame
+
+    @abc.abstractmethod
+    def _next(self):
+        """Returns (ok, frame, timestamp in seconds)"""
+
+    def release(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class CameraSource(FrameSource):
+    def __init__(self, index: int):
+        """A live webcam. Timestamps are wall-clock seconds since the first frame."""
+        self.cap = cv2.VideoCapture(index)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0)
+
+    def _next(self):
+        ok, frame = self.cap.read()
+        now = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = now
+        return ok, frame, now - self._started_at
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: str, loop: bool = False, realtime: bool = False):
+        """A recorded video, decoded frame by frame. Timestamps come from the container.
+
+        Args:
+            path (str): Video file readable by OpenCV
+            loop (bool, optional): Start over at the end instead of stopping. Defaults to False.
+            realtime (bool, optional): Deliver frames at the recorded pace. Defaults to False (as fast as possible).
+        """
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"Could not open video {path}")
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self._offset = 0.0 # source time at the start of the current pass when looping
+        self._pass_index = 0
+
+    def _next(self):
+        ok, frame = self.cap.read()
+        if not ok and self.loop and self._pass_index > 0:
+            # Timestamps keep increasing across passes so the pacing stays continuous
+            self._offset = self.timestamp + 1.0 / self.fps
+            self._pass_index = 0
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        if not ok:
+            return False, None, self.timestamp
+        position = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if position <= 0 and self._pass_index > 0:
+            # Some backends do not report positions, fall back to the nominal frame rate
+            position = self._pass_index / self.fps
+        self._pass_index += 1
+        return True, frame, self._offset + position
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path: str, fps: float = 30.0, loop: bool = False, realtime: bool = False):
+        """Numbered or otherwise sortable images in one directory, played back as a video. Images that
+        cannot be decoded are skipped with a warning.
+
+        Args:
+            path (str): Directory holding the frames
+            fps (float, optional): Frame rate used for the timestamps. Defaults to 30.0.
+            loop (bool, optional): Start over at the end instead of stopping. Defaults to False.
+            realtime (bool, optional): Deliver frames at fps. Defaults to False (as fast as possible).
+        """
+        self.path = path
+        self.loop = loop
+        self.files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.files:
+            raise IOError(f"No images in {path}")
+        self.unreadable = set()
+        self._position = 0 # next file, frames skip unreadable ones
+        super().__init__(fps, realtime)
+
+    def _next(self):
+        # A full pass without a readable image ends the stream, also when looping
+        for _ in range(len(self.files)):
+            if self._position >= len(self.files):
+                if not self.loop:
+                    break
+                self._position = 0
+            path = self.files[self._position]
+            self._position += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, frame, self.frame_index / self.fps
+            if path not in self.unreadable:
+                self.unreadable.add(path)
+                print(f"Skipping unreadable image {path}")
+        return False, None, self.timestamp
+
+
+def list_recordings(path: str) -> list:
+    """Expands path into the recordings it holds: a video file or image directory is one recording, a
+    directory of videos and/or frame directories is one recording per entry (sorted).
+    """
+    if os.path.isfile(path):
+        return [path]
+    names = sorted(os.listdir(path))
+    if any(name.lower().endswith(IMAGE_EXTENSIONS) for name in names):
+        return [path]
+    recordings = []
+    for name in names:
+        full = os.path.join(path, name)
+        if name.lower().endswith(VIDEO_EXTENSIONS):
+            recordings.append(full)
+        elif os.path.isdir(full) and any(f.lower().endswith(IMAGE_EXTENSIONS) for f in os.listdir(full)):
+            recordings.append(full)
+    return recordings
+
+
+def open_frame_source(spec, loop: bool = False, realtime: bool = False, fps: float = 30.0) -> FrameSource:
+    """Opens a webcam, video file or image directory.
+
+    Args:
+        spec (int | str): A camera index (int or digit string), a video file or a directory of images
+        loop (bool, optional): Replay recordings forever. Defaults to False.
+        realtime (bool, optional): Pace recordings like the original capture. Defaults to False.
+        fps (float, optional): Frame rate of image directories. Defaults to 30.0.
+
+    Returns:
+        FrameSource: The opened source
+    """
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CameraSource(int(spec))
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps, loop, realtime)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, loop, realtime)
+    raise FileNotFoundError(f"{spec} is neither a camera index, a video file nor an image directory")
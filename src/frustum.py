@@ -0,0 +1,58 @@
+import numpy as np
+
+
+class Frustum:
+    def __init__(self, view, proj, viewport_height: int):
+        """The view volume of a camera, for culling bounding spheres and measuring their size on screen.
+
+        The six clip planes come straight from the combined view-projection matrix (Gribb-Hartmann), so any
+        perspective or orthographic projection works. Matrices follow pyrr's row-vector layout
+        (clip = p @ view @ proj), as written to the Camera uniform block.
+
+        Args:
+            view (Matrix44): The view matrix
+            proj (Matrix44): The projection matrix
+            viewport_height (int): Framebuffer height in pixels
+        """
+        self.view = np.asarray(view, dtype=np.float64)
+        proj = np.asarray(proj, dtype=np.float64)
+        clip = (self.view @ proj).T
+        planes = np.stack([clip[3] + clip[0], clip[3] - clip[0],   # left, right
+                           clip[3] + clip[1], clip[3] - clip[1],   # bottom, top
+                           clip[3] + clip[2], clip[3] - clip[2]])  # near, far
+        self.planes = planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+        # Pixels covered by one world unit at distance 1 along the view direction
+        self.pixels_per_unit = proj[1, 1] * viewport_height / 2.0
+        self.perspective = proj[2, 3] != 0
+        # Spheres closer than the near plane are measured as if they were on it
+        self.near = float(proj[3, 2] / (proj[2, 2] - 1.0)) if self.perspective else 0.0
+
+    def intersects(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """Which spheres are at least partially inside the frustum.
+
+        Args:
+            centers (np.ndarray): (N, 3) world-space centers
+            radii (np.ndarray): (N,) world-space radii
+
+        Returns:
+            np.ndarray: (N,) bool
+        """
+        distances = centers @ self.planes[:, :3].T + self.planes[:, 3]
+        return (distances >= -np.asarray(radii)[:, None]).all(axis=1)
+
+    def projected_sizes(self, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """Approximate on-screen diameter of every sphere in pixels.
+
+        Args:
+            centers (np.ndarray): (N, 3) world-space centers
+            radii (np.ndarray): (N,) world-space radii
+
+        Returns:
+            np.ndarray: (N,) diameters in pixels
+        """
+        diameters = 2.0 * np.asarray(radii) * self.pixels_per_unit
+        if not self.perspective:
+            return diameters
+        # The camera looks down -z in view space
+        depths = -(centers @ self.view[:3, 2] + self.view[3, 2])
+        return diameters / np.maximum(depths, self.near)
@@ -0,0 +1,172 @@
+import os
+import json
+import numpy as np
+
+# Default location, next to the artifacts written by scripts/export.py
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "final",
+                                  "gesture_index.npz")
+
+
+class GestureIndex:
+    def __init__(self, k: int = 5, max_distance: float = None, name: str = "knn", features: dict = None):
+        """Few-shot gesture recognizer: a k-nearest-neighbour vote over an index of reference feature
+        vectors. Registering a gesture only appends its examples to the index, nothing is retrained.
+
+        The references live in one contiguous float32 matrix, and a query is a single matmul against it
+        (|q|^2 + |r|^2 - 2 q.r with precomputed reference norms). For a few thousand 63-d references this
+        brute-force search is faster than a tree, and stays well under a millisecond.
+
+        The index is also a predictor (see src/deploy.py): calling it maps (H, F) features to (H, C)
+        scores, so it can replace the MLP anywhere. Like the exported predictors it carries the
+        Featurizer spec (see src/features.py) its inputs need, wrist-relative and scale-normalized
+        landmarks by default, so hands match regardless of where they are and how large they appear.
+
+        Args:
+            k (int, optional): Neighbours that vote. Defaults to 5.
+            max_distance (float, optional): Queries whose nearest reference is farther away score the extra
+                last column, which has no class name and reads as "Unknown". Defaults to None (always vote).
+            name (str, optional): Name used in reports. Defaults to "knn".
+            features (dict, optional): Featurizer spec, persisted with the index. Defaults to normalized
+                landmarks.
+        """
+        self.k = k
+        self.max_distance = max_distance
+        self.name = name
+        self.features = features if features is not None else {"normalize": True}
+        self.class_names = {}   # class index -> gesture name, persisted with the index
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.targets = np.zeros(0, dtype=np.int64)
+        self.norms = np.zeros(0, dtype=np.float32)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def class_index(self, gesture: str) -> int:
+        """Index of a gesture, registering it as a new class if needed"""
+        for idx, name in self.class_names.items():
+            if name == gesture:
+                return idx
+        idx = max(self.class_names, default=-1) + 1
+        self.class_names[idx] = gesture
+        return idx
+
+    def add(self, gesture: str, features: np.ndarray) -> int:
+        """Registers examples of a gesture.
+
+        Args:
+            gesture (str): Gesture name, new names become new classes
+            features (np.ndarray): (N, F) featurized examples, all-zero rows (no hand) are ignored
+
+        Returns:
+            int: The gesture's class index
+        """
+        idx = self.class_index(gesture)
+        embedded = np.asarray(features, dtype=np.float32)
+        embedded = embedded[np.abs(embedded).sum(axis=1) > 0]
+        needed = self.count + len(embedded)
+        if self.count == 0:
+            self.embeddings = np.zeros((0, embedded.shape[1]), dtype=np.float32)
+        if needed > len(self.embeddings):
+            # Grow geometrically so registering examples one by one stays amortized O(1)
+            capacity = max(needed, 2 * len(self.embeddings), 64)
+            self.embeddings = np.resize(self.embeddings, (capacity, embedded.shape[1]))
+            self.targets = np.resize(self.targets, capacity)
+            self.norms = np.resize(self.norms, capacity)
+        self.embeddings[self.count:needed] = embedded
+        self.targets[self.count:needed] = idx
+        self.norms[self.count:needed] = np.einsum('ij,ij->i', embedded, embedded)
+        self.count = needed
+        return idx
+
+    def remove(self, gesture: str) -> int:
+        """Drops every example of a gesture. Returns the number of removed examples. The indices of the
+        other gestures never change.
+        """
+        if gesture not in self.class_names.values():
+            raise KeyError(f"{gesture!r} is not registered")
+        idx = self.class_index(gesture)
+        keep = self.targets[:self.count] != idx
+        removed = self.count - int(keep.sum())
+        self.embeddings = np.ascontiguousarray(self.embeddings[:self.count][keep])
+        self.targets = self.targets[:self.count][keep]
+        self.norms = self.norms[:self.count][keep]
+        self.count = len(self.targets)
+        del self.class_names[idx]
+        return removed
+
+    def counts(self) -> dict:
+        """Number of examples per gesture name"""
+        per_class = np.bincount(self.targets[:self.count], minlength=max(self.class_names, default=-1) + 1)
+        return {name: int(per_class[idx]) for idx, name in self.class_names.items()}
+
+    def query(self, batch: np.ndarray, k: int = None):
+        """Nearest references of every query.
+
+        Args:
+            batch (np.ndarray): (H, F) featurized queries
+            k (int, optional): Neighbours to return. Defaults to self.k.
+
+        Returns:
+            (distances (H, k) float32 ascending, reference indices (H, k))
+        """
+        k = min(k or self.k, self.count)
+        queries = np.asarray(batch, dtype=np.float32)
+        # Squared distances through one (H, F) x (F, N) matmul
+        distances = self.norms[:self.count] - 2.0 * (queries @ self.embeddings[:self.count].T)
+        distances += np.einsum('ij,ij->i', queries, queries)[:, None]
+        if k < self.count:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(self.count), distances.shape)
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        order = np.argsort(nearest_distances, axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest_distances = np.sqrt(np.maximum(np.take_along_axis(nearest_distances, order, axis=1), 0.0))
+        return nearest_distances, nearest
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        """Votes of the k nearest references, weighted by inverse distance
+
+        Args:
+            batch (np.ndarray): (H, F) float32 features
+
+        Returns:
+            np.ndarray: (H, C) scores summing to 1, plus an "Unknown" column when max_distance is set
+        """
+        num_classes = max(self.class_names, default=-1) + 1
+        scores = np.zeros((len(batch), num_classes + (self.max_distance is not None)), dtype=np.float32)
+        if self.count == 0:
+            return scores
+        distances, nearest = self.query(batch)
+        weights = 1.0 / (distances + 1e-3)
+        rows = np.repeat(np.arange(len(batch)), nearest.shape[1])
+        np.add.at(scores, (rows, self.targets[nearest].ravel()), weights.ravel())
+        if self.max_distance is not None:
+            far = distances[:, 0] > self.max_distance
+            scores[far] = 0.0
+            scores[far, -1] = 1.0
+        scores /= np.maximum(scores.sum(axis=1, keepdims=True), 1e-12)
+        return scores
+
+    def save(self, path: str) -> None:
+        """Writes the references, their labels and the class names to a .npz"""
+        np.savez(path, embeddings=self.embeddings[:self.count], targets=self.targets[:self.count],
+                 class_names=np.array(json.dumps({str(idx): name for idx, name in self.class_names.items()})),
+                 features=np.array(json.dumps(self.features)),
+                 k=np.array(self.k), max_distance=np.array(np.nan if self.max_distance is None else self.max_distance))
+
+    @classmethod
+    def load(cls, path: str, name: str = "knn") -> "GestureIndex":
+        """Loads an index written by GestureIndex.save"""
+        with np.load(path) as data:
+            max_distance = float(data["max_distance"])
+            index = cls(k=int(data["k"]), max_distance=None if np.isnan(max_distance) else max_distance, name=name,
+                        features=json.loads(str(data["features"])))
+            index.embeddings = np.ascontiguousarray(data["embeddings"], dtype=np.float32)
+            index.targets = data["targets"].astype(np.int64)
+            # JSON object keys are strings, class indices are ints
+            index.class_names = {int(idx): gesture for idx, gesture in json.loads(str(data["class_names"])).items()}
+        index.norms = np.einsum('ij,ij->i', index.embeddings, index.embeddings)
+        index.count = len(index.targets)
+        return index
@@ -0,0 +1,574 @@
+import os
+import re
+import sys
+import json
+import time
+import errno
+import signal
+import socket
+import struct
+import argparse
+import tempfile
+import threading
+import selectors
+from collections import deque
+from typing import NamedTuple
+import cv2
+import numpy as np
+try:
+    from .frame_ring import FrameRing
+    from .pipeline import Mailbox, PipelineStats, StageTimer
+    from .landmark_log import HANDEDNESS_CODES, HANDEDNESS_NAMES
+    from .gesture_index import DEFAULT_INDEX_PATH
+except ImportError:
+    from frame_ring import FrameRing
+    from pipeline import Mailbox, PipelineStats, StageTimer
+    from landmark_log import HANDEDNESS_CODES, HANDEDNESS_NAMES
+    from gesture_index import DEFAULT_INDEX_PATH
+
+# A Unix socket where there is one, else a fixed localhost port
+DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), "gesture_service.sock") if hasattr(socket, "AF_UNIX") \
+    else "127.0.0.1:50507"
+
+# Wire format: every message is a 5 byte header (type, payload length) and its payload, little-endian.
+#   HELLO      server -> client  JSON: protocol version, frame ring name, class names (sent once)
+#   SUBSCRIBE  client -> server  UTF-8 client name, used in the lag reports
+#   RESULT     server -> client  RESULT_HEADER, then one HAND_DTYPE record per hand (256 bytes)
+#   ACK        client -> server  ACK: sequence of the last received result and its capture-to-receive lag
+# Frames never go through the socket, results name their slot in the shared FrameRing instead.
+PROTOCOL_VERSION = 1
+MSG_HELLO, MSG_SUBSCRIBE, MSG_RESULT, MSG_ACK = 1, 2, 3, 4
+MESSAGE_HEADER = struct.Struct("<BI")
+RESULT_HEADER = struct.Struct("<QQdBB")  # result sequence, frame sequence, capture time, hands, flags
+ACK = struct.Struct("<Qd")
+FLAG_ESTIMATED = 1
+HAND_DTYPE = np.dtype([
+    ("gesture", "<i2"),         # class index, -1 for Unknown
+    ("handedness", "u1"),       # 0 left, 1 right, 255 unknown (as in landmark logs)
+    ("pad", "u1"),
+    ("landmarks", "<f4", (21, 3)),
+])
+
+
+class ServiceEvent(NamedTuple):
+    """A GestureEvent received from the recognition service"""
+    timestamp: float        # time.perf_counter() when the frame was captured, comparable across local processes
+    gestures: list          # gesture name per detected hand
+    landmarks: np.ndarray   # (H, 21, 3) float32 normalized image landmarks
+    handedness: list        # "Left"/"Right" per detected hand
+    estimated: bool         # landmarks were extrapolated by the service's InferenceScheduler
+    frame: int              # FrameRing sequence of the frame, 0 when frames are not shared
+    seq: int                # result sequence number
+
+
+def parse_address(address: str):
+    """'host:port' is a TCP address, anything else a Unix socket path. Returns (family, address)."""
+    match = re.fullmatch(r"([\w.\-]*):(\d+)", address)
+    if match:
+        return socket.AF_INET, (match.group(1) or "127.0.0.1", int(match.group(2)))
+    return socket.AF_UNIX, address
+
+
+def _unix_socket_alive(path: str) -> bool:
+    """Whether a process still accepts connections on the Unix socket file at path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except ConnectionRefusedError:
+        return False
+    finally:
+        probe.close()
+
+
+def encode_message(kind: int, payload: bytes) -> bytes:
+    return MESSAGE_HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_result(seq: int, frame: int, event, class_indices: dict) -> bytes:
+    """Packs a GestureEvent into one RESULT message"""
+    count = len(event.landmarks)
+    hands = np.zeros(count, dtype=HAND_DTYPE)
+    if count:
+        hands["gesture"] = [class_indices.get(gesture, -1) for gesture in event.gestures]
+        hands["handedness"] = [HANDEDNESS_CODES.get(name, 255) for name in event.handedness] + \
+            [255] * (count - len(event.handedness))
+        hands["landmarks"] = event.landmarks
+    header = RESULT_HEADER.pack(seq, frame, event.timestamp, count, FLAG_ESTIMATED if event.estimated else 0)
+    return encode_message(MSG_RESULT, header + hands.tobytes())
+
+
+def decode_result(payload: bytes, class_names: dict) -> ServiceEvent:
+    seq, frame, timestamp, count, flags = RESULT_HEADER.unpack_from(payload)
+    hands = np.frombuffer(payload, dtype=HAND_DTYPE, count=count, offset=RESULT_HEADER.size)
+    return ServiceEvent(
+        timestamp,
+        [class_names.get(int(idx), "Unknown") for idx in hands["gesture"]],
+        hands["landmarks"],
+        [HANDEDNESS_NAMES.get(int(code), "Unknown") for code in hands["handedness"]],
+        bool(flags & FLAG_ESTIMATED),
+        frame,
+        seq,
+    )
+
+
+def draw_gestures(frame: np.ndarray, landmarks: np.ndarray, gestures: list) -> None:
+    """Draws the landmarks of every hand and its gesture name at the wrist onto a BGR frame in place"""
+    height, width = frame.shape[:2]
+    for points, gesture in zip(landmarks, gestures):
+        for x, y, _ in points:
+            cv2.circle(frame, (int(x * width), int(y * height)), 3, (0, 255, 0), -1)
+        cv2.putText(frame, gesture, (int(points[0, 0] * width), int(points[0, 1] * height) - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+
+class _MessageReader:
+    """Splits a byte stream into (type, payload) messages"""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        self.buffer += data
+        messages = []
+        while len(self.buffer) >= MESSAGE_HEADER.size:
+            kind, length = MESSAGE_HEADER.unpack_from(self.buffer)
+            end = MESSAGE_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            messages.append((kind, bytes(self.buffer[MESSAGE_HEADER.size:end])))
+            del self.buffer[:end]
+        return messages
+
+
+class _Client:
+    """Server-side state of one subscriber"""
+    def __init__(self, sock, name: str, max_pending: int):
+        self.sock = sock
+        self.name = name
+        self.reader = _MessageReader()
+        self.greeted = False
+        self.pending = deque()          # encoded results waiting for the socket
+        self.max_pending = max_pending
+        self.outgoing = b""             # the partially sent message
+        self.sent = 0
+        self.dropped = 0
+        self.acked = 0                  # result sequence of the last ACK
+        self.latency = StageTimer(name)  # capture to client receive
+
+
+class RecognitionServer:
+    def __init__(self, address: str = DEFAULT_ADDRESS, class_names: dict = None, slots: int = 8,
+                 max_pending: int = 8):
+        """Publishes the frames and gesture results of one GestureWorker to any number of local clients,
+        so they share one camera, one MediaPipe graph and one classifier. Frames are copied once into a
+        shared-memory FrameRing; results go out over a socket as compact binary records that only name
+        the frame's ring slot.
+
+        The worker thread never blocks on a client: every result is encoded once, queued per client and
+        sent by the server thread through non-blocking sockets. A client that stops reading loses its
+        oldest results (counted as dropped) rather than slowing the others down.
+
+        Args:
+            address (str, optional): Unix socket path or 'host:port'. Defaults to DEFAULT_ADDRESS.
+            class_names (dict, optional): Class index to gesture name, sent to every client. Defaults to None.
+            slots (int, optional): Frames kept in the ring. Defaults to 8.
+            max_pending (int, optional): Results queued per client before the oldest are dropped. Defaults to 8.
+        """
+        self.address = address
+        self.class_names = class_names or {}
+        self.class_indices = {name: idx for idx, name in self.class_names.items()}
+        self.slots = slots
+        self.max_pending = max_pending
+        self.ring = None
+        self.seq = 0
+        self.clients = {}
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="RecognitionServer", daemon=True)
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._listener = None
+
+    def start(self) -> "RecognitionServer":
+        family, address = parse_address(self.address)
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            if _unix_socket_alive(address):
+                self._listener.close()
+                raise OSError(errno.EADDRINUSE, f"A recognition service is already running at {address}")
+            # A stale socket file of a previous daemon that did not shut down cleanly
+            os.remove(address)
+        elif family != socket.AF_UNIX:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(address)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ)
+        self._thread.start()
+        return self
+
+    def stop(self, close_ring: bool = True) -> None:
+        """Disconnects every client and removes the socket. Pass close_ring=False while a GestureWorker may
+        still be writing frames, the ring is then left to be freed when the process exits.
+        """
+        self._stop.set()
+        self._wake()
+        if self._thread.is_alive():
+            self._thread.join(2.0)
+        for client in list(self.clients.values()):
+            self._disconnect(client)
+        self._listener.close()
+        family, address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(address):
+            os.remove(address)
+        if self.ring is not None and close_ring:
+            self.ring.close()
+
+    # ----- Called by the GestureWorker thread -----
+    def publish_frame(self, frame: np.ndarray, timestamp: float) -> int:
+        """Copies a frame into the shared ring, created with the first frame's shape. Returns its sequence.
+        Frames of another size (mixed-resolution image directories) are resized to the ring's, the landmarks
+        are normalized so they still line up. Frames with another channel count raise ValueError.
+        """
+        if self.ring is None:
+            self.ring = FrameRing.create(frame.shape, self.slots)
+            # Clients that connected before the first frame are greeted now
+            self._wake()
+        height, width = self.ring.shape[:2]
+        if frame.shape[:2] != (height, width):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        return self.ring.write(frame, timestamp)
+
+    def publish(self, event, frame: int = 0) -> None:
+        """Queues a GestureEvent for every client, encoded once"""
+        self.seq += 1
+        message = encode_result(self.seq, frame, event, self.class_indices)
+        with self._lock:
+            for client in self.clients.values():
+                if not client.greeted:
+                    continue
+                if len(client.pending) >= client.max_pending:
+                    client.pending.popleft()
+                    client.dropped += 1
+                client.pending.append(message)
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass # a wake-up is already pending
+
+    # ----- Server thread -----
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for key, events in self._selector.select(timeout=0.5):
+                if key.fileobj is self._listener:
+                    self._accept()
+                elif key.fileobj is self._wake_recv:
+                    try:
+                        while self._wake_recv.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif events & selectors.EVENT_READ:
+                    self._receive(key.data)
+            for client in list(self.clients.values()):
+                self._flush(client)
+
+    def _accept(self) -> None:
+        try:
+            sock, _ = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        if sock.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = _Client(sock, f"client{len(self.clients) + 1}", self.max_pending)
+        with self._lock:
+            self.clients[sock.fileno()] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+
+    def _receive(self, client: _Client) -> None:
+        try:
+            data = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._disconnect(client)
+            return
+        for kind, payload in client.reader.feed(data):
+            if kind == MSG_SUBSCRIBE:
+                client.name = client.latency.name = payload.decode("utf-8", "replace") or client.name
+            elif kind == MSG_ACK:
+                seq, lag = ACK.unpack(payload)
+                client.acked = max(client.acked, seq)
+                client.latency.record(lag)
+
+    def _flush(self, client: _Client) -> None:
+        if client.sock.fileno() < 0:
+            return
+        if not client.greeted and self.ring is not None:
+            hello = json.dumps({"version": PROTOCOL_VERSION, "ring": self.ring.name,
+                                "class_names": {str(idx): name for idx, name in self.class_names.items()}})
+            client.outgoing += encode_message(MSG_HELLO, hello.encode("utf-8"))
+            client.greeted = True
+        while True:
+            if not client.outgoing:
+                with self._lock:
+                    if not client.pending:
+                        break
+                    client.outgoing = client.pending.popleft()
+                client.sent += 1
+            try:
+                sent = client.sock.send(client.outgoing)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                self._disconnect(client)
+                return
+            client.outgoing = client.outgoing[sent:]
+            if client.outgoing:
+                break
+        wanted = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.outgoing else 0)
+        if self._selector.get_key(client.sock).events != wanted:
+            self._selector.modify(client.sock, wanted, client)
+
+    def _disconnect(self, client: _Client) -> None:
+        with self._lock:
+            self.clients = {fd: other for fd, other in self.clients.items() if other is not client}
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    def report(self) -> str:
+        """One line per client: results sent and dropped, how many results its ACKs trail the newest one,
+        and the capture-to-receive latency
+        """
+        lines = []
+        for client in list(self.clients.values()):
+            latency = client.latency.summary()
+            lines.append(f"{client.name:>14}: sent {client.sent:6d}  dropped {client.dropped:5d}  "
+                         f"behind {max(self.seq - client.acked, 0):3d}  lag p50 {latency['p50_ms']:6.1f} ms  "
+                         f"p95 {latency['p95_ms']:6.1f} ms")
+        return "\n".join(lines) or f"{'clients':>14}: none"
+
+
+class GestureServiceClient:
+    def __init__(self, address: str = DEFAULT_ADDRESS, name: str = "client", preview: bool = True,
+                 connect_timeout: float = 5.0):
+        """Subscribes to a running recognition service instead of opening the camera and running MediaPipe
+        and the classifier in this process. It is a drop-in replacement for GestureWorker: events and
+        preview frames are polled from the same lock-free mailboxes.
+
+        Results arrive on a background thread, which acknowledges each one so the service can report how
+        far behind every client is. Frames are read from the service's shared-memory ring only when a
+        preview is wanted or frame() is called.
+
+        Args:
+            address (str, optional): Address of the service. Defaults to DEFAULT_ADDRESS.
+            name (str, optional): Client name shown in the service's lag report. Defaults to "client".
+            preview (bool, optional): Publish the shared frames, with the landmarks drawn, for an OpenCV
+                preview window. Defaults to True.
+            connect_timeout (float, optional): Seconds to wait for the service and its first frame.
+                Defaults to 5.0.
+        """
+        self.address = address
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.class_names = {}
+        self.ring = None
+
+        self.events = Mailbox()
+        self.preview = Mailbox() if preview else None
+        self.stats = PipelineStats("lag", "preview")
+
+        self._sock = None
+        self._reader = _MessageReader()
+        self._backlog = []      # results that arrived together with the greeting
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="GestureServiceClient", daemon=True)
+
+    def start(self) -> "GestureServiceClient":
+        """Connects and waits for the service's greeting, so class_names is set once this returns"""
+        family, address = parse_address(self.address)
+        deadline = time.perf_counter() + self.connect_timeout
+        while True:
+            self._sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                self._sock.connect(address)
+                break
+            except OSError:
+                self._sock.close()
+                # The service may still be starting up
+                if time.perf_counter() > deadline:
+                    raise ConnectionError(f"No recognition service at {self.address}")
+                time.sleep(0.1)
+        if family == socket.AF_INET:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock.sendall(encode_message(MSG_SUBSCRIBE, self.name.encode("utf-8")))
+
+        # The greeting comes with the service's first frame
+        self._sock.settimeout(max(deadline - time.perf_counter(), 0.1))
+        hello = None
+        while hello is None:
+            data = self._sock.recv(65536)
+            if not data:
+                raise ConnectionError(f"The recognition service at {self.address} closed the connection")
+            messages = self._reader.feed(data)
+            if messages and messages[0][0] == MSG_HELLO:
+                hello = json.loads(messages[0][1].decode("utf-8"))
+                self._backlog = messages[1:]
+        if hello["version"] != PROTOCOL_VERSION:
+            raise ConnectionError(f"The recognition service speaks protocol {hello['version']}, "
+                                  f"expected {PROTOCOL_VERSION}")
+        # JSON object keys are strings, class indices are ints
+        self.class_names = {int(idx): name for idx, name in hello["class_names"].items()}
+        self.ring = FrameRing.attach(hello["ring"])
+        self._sock.settimeout(0.5)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._sock is not None:
+            self._sock.close()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def frame(self, seq: int):
+        """A copy of the shared frame seq, None once the service has overwritten it"""
+        return self.ring.read(seq) if self.ring is not None else None
+
+    def _run(self) -> None:
+        messages = self._backlog
+        while not self._stop.is_set():
+            for kind, payload in messages:
+                if kind == MSG_RESULT:
+                    self._handle(decode_result(payload, self.class_names))
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                messages = []
+                continue
+            except OSError:
+                break
+            if not data:
+                print(f"The recognition service at {self.address} closed the connection")
+                break
+            messages = self._reader.feed(data)
+
+    def _handle(self, event: ServiceEvent) -> None:
+        lag = time.perf_counter() - event.timestamp
+        self.stats["lag"].record(lag)
+        self.events.publish(event)
+        self.stats.tick()
+        try:
+            self._sock.sendall(encode_message(MSG_ACK, ACK.pack(event.seq, lag)))
+        except OSError:
+            return
+        if self.preview is not None:
+            with self.stats["preview"].time():
+                frame = self.frame(event.frame)
+                if frame is None:
+                    return
+                draw_gestures(frame, event.landmarks, event.gestures)
+            self.preview.publish(frame)
+
+
+def load_classifier(knn_path: str = None):
+    """The few-shot gesture index with knn_path, else the fastest exported classifier, else the eager
+    weights. Returns (classifier or None, class names).
+    """
+    if knn_path:
+        from gesture_index import GestureIndex
+        index = GestureIndex.load(knn_path)
+        return index, index.class_names
+    from deploy import load_gesture_predictor, load_eager_predictor
+    predictor = load_gesture_predictor() or load_eager_predictor("gesture_classifier_weights.pth")
+    if predictor is None:
+        print("gesture_classifier_weights.pth not found, gestures will not be classified")
+        return None, {}
+    return predictor, predictor.class_names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognition service: owns the camera, MediaPipe and the gesture "
+                                                 "classifier, and shares frames and results with local clients")
+    parser.add_argument("--source", default="1", help="Camera index, or a video file / image directory to replay")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Unix socket path or host:port to serve on")
+    parser.add_argument("--knn", nargs="?", const=DEFAULT_INDEX_PATH, default=None, metavar="INDEX",
+                        help="Classify with the few-shot k-NN gesture index (scripts/gesture_index.py)")
+    parser.add_argument("--roi", action="store_true",
+                        help="Detect hands in a crop around their last position instead of the full frame")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Skip hand detection on still frames and extrapolate the landmarks instead")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="Run hand detection at most this often per second (implies --adaptive)")
+    parser.add_argument("--cpu-budget", type=float, default=None,
+                        help="Fraction of one core hand detection may use, e.g. 0.5 (implies --adaptive)")
+    parser.add_argument("--max-num-hands", type=int, default=2)
+    parser.add_argument("--no-flip", action="store_true", help="Do not mirror the frames")
+    parser.add_argument("--slots", type=int, default=8, help="Frames kept in the shared ring")
+    parser.add_argument("--max-pending", type=int, default=8,
+                        help="Results queued per client before its oldest are dropped")
+    parser.add_argument("--record-landmarks", default=None, metavar="LOG",
+                        help="Append the recognized landmarks of every frame to a landmark log")
+    parser.add_argument("--report-every", type=float, default=5.0,
+                        help="Seconds between stage and per-client lag reports (0 disables them)")
+    args = parser.parse_args()
+
+    # Run as a script from src/, like scene.py
+    from gesture_worker import GestureWorker
+    from scheduler import InferenceScheduler
+    classifier, class_names = load_classifier(args.knn)
+    scheduler = None
+    if args.adaptive or args.target_fps or args.cpu_budget:
+        scheduler = InferenceScheduler(target_fps=args.target_fps, cpu_budget=args.cpu_budget)
+
+    try:
+        server = RecognitionServer(args.address, class_names, slots=args.slots, max_pending=args.max_pending).start()
+    except OSError as e:
+        raise SystemExit(f"Cannot serve on {args.address}: {e.strerror or e}")
+    worker = GestureWorker(
+        camera=args.source,
+        classifier=classifier,
+        class_names=class_names,
+        flip=not args.no_flip,
+        max_num_hands=args.max_num_hands,
+        preview=False,
+        record_path=args.record_landmarks,
+        roi=args.roi,
+        scheduler=scheduler,
+        server=server
+    ).start()
+    # A plain kill also releases the camera, the socket file and the shared memory
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Serving gestures on {args.address}, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(args.report_every or 1.0)
+            if args.report_every:
+                print(worker.stats.report())
+                print(server.report())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+        # A worker that did not exit in time may still be inside publish_frame. Its ring stays mapped and the
+        # resource tracker unlinks it when the process exits
+        server.stop(close_ring=not worker.is_alive())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import time
+import threading
+from typing import NamedTuple, Optional
+import cv2
+import numpy as np
+from pipeline import Mailbox, PipelineStats
+from frame_source import open_frame_source
+from landmark_log import LandmarkLog, LandmarkLogWriter
+from hand_roi import HandRoiTracker
+from scheduler import InferenceScheduler
+from features import featurizer_for, landmarks_to_array
+
+
+class GestureEvent(NamedTuple):
+    """One recognition result published by the GestureWorker"""
+    timestamp: float        # time.perf_counter() when the frame was captured
+    gestures: list          # gesture name per detected hand ("Unknown" without a classifier)
+    landmarks: np.ndarray   # (H, 21, 3) float32 normalized image landmarks
+    handedness: list        # "Left"/"Right" per detected hand
+    estimated: bool = False # landmarks were extrapolated by the InferenceScheduler, not detected
+
+
+class GestureWorker:
+    def __init__(self, camera=1, classifier=None, class_names: Optional[dict] = None, flip: bool = True,
+                 max_num_hands: int = 2, preview: bool = True, record_path: Optional[str] = None,
+                 roi: bool = False, scheduler: Optional[InferenceScheduler] = None, server=None):
+        """Background recognition worker. It owns the webcam, runs MediaPipe Hands and the gesture
+        classifier on its own thread, and publishes GestureEvents into a lock-free mailbox that the
+        render loop polls without blocking.
+
+        Args:
+            camera (int | str, optional): OpenCV camera index, or a video file / image directory that is
+                replayed in a loop at its recorded pace. Defaults to 1.
+            classifier (callable, optional): A predictor from src/deploy.py (or a GestureIndex) mapping
+                featurized landmarks (see src/features.py) to logits. Defaults to None (landmarks only).
+            class_names (dict, optional): Mapping of class index to gesture name. Defaults to None.
+            flip (bool, optional): Mirror the frame horizontally before recognition. Defaults to True.
+            max_num_hands (int, optional): Maximum number of hands to track. Defaults to 2.
+            preview (bool, optional): Publish annotated frames for an OpenCV preview window. Defaults to True.
+            record_path (str, optional): Append every frame's landmarks to this landmark log (see
+                src/landmark_log.py). Defaults to None.
+            roi (bool, optional): Run MediaPipe on a crop around the tracked hands (see src/hand_roi.py).
+                Defaults to False.
+            scheduler (InferenceScheduler, optional): Skips MediaPipe on still frames and when over budget,
+                publishing extrapolated landmarks instead (see src/scheduler.py). Defaults to None (detect
+                every frame).
+            server (RecognitionServer, optional): Shares every frame and event with the clients of a
+                recognition service (see src/gesture_service.py). Defaults to None.
+        """
+        self.camera = camera
+        self.classifier = classifier
+        # Turns landmarks into the inputs the classifier was trained on
+        self.featurizer = featurizer_for(classifier)
+        self.class_names = class_names or {}
+        self.flip = flip
+        self.max_num_hands = max_num_hands
+        self.record_path = record_path
+        self.roi_tracker = HandRoiTracker() if roi else None
+        self.scheduler = scheduler
+        self.server = server
+        self.unshared_frames = 0
+
+        self.events = Mailbox()
+        self.preview = Mailbox() if preview else None
+        self.stats = PipelineStats("capture", "landmarks", "classify")
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="GestureWorker", daemon=True)
+
+    def start(self) -> "GestureWorker":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Signals the worker to exit and waits for it to release the camera"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        """True until the worker thread has exited, also after a stop() that timed out"""
+        return self._thread.is_alive()
+
+    def _classify(self, landmarks: np.ndarray) -> list:
+        if self.classifier is None or len(landmarks) == 0:
+            return ["Unknown"] * len(landmarks)
+        predicted = self.classifier(self.featurizer(landmarks)).argmax(axis=1).tolist()
+        return [self.class_names.get(predicted_class, "Unknown") for predicted_class in predicted]
+
+    def _publish_frame(self, frame: np.ndarray, captured_at: float) -> int:
+        """Shares the frame through the server's ring. A frame the ring cannot hold is still recognized, its
+        results carry frame 0 (not shared) instead of stopping the worker.
+        """
+        if self.server is None:
+            return 0
+        try:
+            return self.server.publish_frame(frame, captured_at)
+        except ValueError as e:
+            self.unshared_frames += 1
+            if self.unshared_frames == 1:
+                print(f"Not sharing frames that do not fit the frame ring: {e}")
+            return 0
+
+    def _run(self) -> None:
+        # MediaPipe is created on the worker thread so its graph never touches the render thread
+        import mediapipe as mp
+        mp_hands = mp.solutions.hands
+        mp_drawing = mp.solutions.drawing_utils
+        # Video mode also with --roi: the tracker holds its crop fixed and resets the graph when it moves
+        hands = mp_hands.Hands(
+            static_image_mode=False,
+            max_num_hands=self.max_num_hands,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        cap = open_frame_source(self.camera, loop=True, realtime=True)
+        recorder = LandmarkLogWriter(self.record_path) if self.record_path else None
+        try:
+            while not self._stop.is_set():
+                with self.stats["capture"].time():
+                    ret, frame = cap.read()
+                if not ret:
+                    time.sleep(0.01)
+                    continue
+                captured_at = time.perf_counter()
+                if self.flip:
+                    frame = cv2.flip(frame, 1)
+                # Clients read the frame from shared memory, results only carry its sequence number
+                frame_seq = self._publish_frame(frame, captured_at)
+
+                estimated = self.scheduler is not None and not self.scheduler.should_detect(frame, captured_at)
+                if estimated:
+                    hand_list = []
+                    landmarks, handedness = self.scheduler.estimate(captured_at)
+                else:
+                    started = time.perf_counter()
+                    with self.stats["landmarks"].time():
+                        if self.roi_tracker is not None:
+                            results = self.roi_tracker.process(hands, frame)
+                        else:
+                            results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                    hand_list = results.multi_hand_landmarks or []
+                    # A fresh array per frame: events hand it to the render thread
+                    landmarks = landmarks_to_array(hand_list)
+                    handedness = [h.classification[0].label for h in results.multi_handedness or []]
+                    if self.scheduler is not None:
+                        self.scheduler.update(captured_at, landmarks, handedness, time.perf_counter() - started)
+                    # Only real detections are recorded, a replay must not compound extrapolation errors
+                    if recorder is not None:
+                        recorder.write(captured_at, landmarks, handedness,
+                                       [h.classification[0].score for h in results.multi_handedness or []])
+
+                with self.stats["classify"].time():
+                    gestures = self._classify(landmarks)
+                event = GestureEvent(captured_at, gestures, landmarks, handedness, estimated)
+                self.events.publish(event)
+                if self.server is not None:
+                    self.server.publish(event, frame_seq)
+                self.stats.tick()
+
+                if self.preview is not None:
+                    for hand_landmarks in hand_list:
+                        mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+                    if estimated:
+                        height, width = frame.shape[:2]
+                        for x, y, _ in landmarks.reshape(-1, 3):
+                            cv2.circle(frame, (int(x * width), int(y * height)), 3, (0, 200, 255), -1)
+                    self.preview.publish(frame)
+        finally:
+            cap.release()
+            hands.close()
+            if recorder is not None:
+                recorder.close()
+
+
+class LandmarkReplayWorker(GestureWorker):
+    def __init__(self, log_path: str, classifier=None, class_names: Optional[dict] = None, speed: float = 1.0,
+                 loop: bool = True):
+        """Drop-in replacement for GestureWorker that replays a recorded landmark log instead of running
+        the webcam and MediaPipe. Events carry the replay time, so Scene.handle_gesture treats them like
+        live ones.
+
+        Args:
+            log_path (str): Landmark log written with GestureWorker(record_path=...) or evaluate.py --record
+            classifier (callable, optional): Predictor mapping featurized landmarks to logits. Defaults to None.
+            class_names (dict, optional): Mapping of class index to gesture name. Defaults to None.
+            speed (float, optional): Replay speed, 1.0 is the recorded pace. Defaults to 1.0.
+            loop (bool, optional): Start over at the end of the log. Defaults to True.
+        """
+        super().__init__(camera=None, classifier=classifier, class_names=class_names, preview=False)
+        self.log_path = log_path
+        self.speed = speed
+        self.loop = loop
+
+    def _run(self) -> None:
+        log = LandmarkLog(self.log_path)
+        if len(log) == 0:
+            # Nothing to replay, looping over it would spin forever
+            print(f"{self.log_path} holds no frames, no gestures will be replayed")
+            return
+        while not self._stop.is_set():
+            frames = log.replay(self.speed)
+            while not self._stop.is_set():
+                with self.stats["capture"].time():
+                    frame = next(frames, None)
+                if frame is None:
+                    break
+                landmarks = np.array(frame.landmarks)
+                with self.stats["classify"].time():
+                    gestures = self._classify(landmarks)
+                self.events.publish(GestureEvent(time.perf_counter(), gestures, landmarks, frame.handedness))
+                self.stats.tick()
+            if not self.loop:
+                break
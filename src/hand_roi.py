@@ -0,0 +1,163 @@
+import cv2
+import numpy as np
+try:
+    from .features import landmarks_to_array
+except ImportError:
+    # Loaded as a top-level module by the scene
+    from features import landmarks_to_array
+
+
+class HandRoiTracker:
+    def __init__(self, margin: float = 0.35, min_side: int = 128, max_side: int = None,
+                 full_frame_every: int = 30, retry_full_frame: bool = True, hold_margin: float = 0.05):
+        """Crops each frame to the region the hands are expected in before MediaPipe sees it. The region is
+        the previous frame's landmark bounding box, moved by the hands' velocity and grown by a margin.
+        Landmarks are mapped back to full-frame coordinates, so callers see the same results as with
+        full-frame detection.
+
+        The Hands instance runs in video mode (static_image_mode=False), which tracks the landmarks from
+        one input to the next in the input's coordinates. A crop that moved every frame would break that
+        tracking, so the region is held fixed while the predicted hands stay inside it, and MediaPipe
+        tracks within it as usual. Only when the hands near its edge is a new region cut; the graph is
+        then reset (about one process() call) so no tracking state carries over into the new
+        coordinates. A second, static-mode Hands for the crops would not need the reset, but would run
+        palm detection on every frame. scripts/benchmark_recognition.py --roi --reference measures the
+        landmarks against full-frame detection.
+
+        Tracking falls back to the full frame when no hand is found in the region, and every
+        full_frame_every frames, so a second hand entering elsewhere is still picked up.
+
+        Args:
+            margin (float, optional): Margin added on each side, as a fraction of the box size. Defaults to 0.35.
+            min_side (int, optional): Smallest region side in pixels. Defaults to 128.
+            max_side (int, optional): Downscale regions (and full frames) whose longest side is larger.
+                Defaults to None (no downscaling).
+            full_frame_every (int, optional): Frames between forced full-frame searches, 0 to disable.
+                Defaults to 30.
+            retry_full_frame (bool, optional): When the region comes up empty, search the full frame again
+                in the same frame instead of the next one. Defaults to True.
+            hold_margin (float, optional): Keep the region while the predicted hand box stays this fraction of
+                the region's side away from its edges. Defaults to 0.05.
+        """
+        self.margin = margin
+        self.min_side = min_side
+        self.max_side = max_side
+        self.full_frame_every = full_frame_every
+        self.retry_full_frame = retry_full_frame
+        self.hold_margin = hold_margin
+        self.region = None    # region the Hands graph last saw, None for the full frame
+        self.started = False
+        self.box = None       # last landmark box (x0, y0, x1, y1), normalized full-frame coordinates
+        self.velocity = np.zeros(2)
+        self.frames_since_full = 0
+        # Counters for reports
+        self.frames = 0
+        self.full_frame_searches = 0
+        self.region_changes = 0
+        self.pixels_processed = 0
+        self.pixels_total = 0
+
+    def reset(self) -> None:
+        self.box = None
+        self.velocity[:] = 0
+
+    def predict_roi(self, width: int, height: int):
+        """Pixel region (x0, y0, x1, y1) to search in the next frame, or None for the full frame"""
+        if self.box is None or (self.full_frame_every and self.frames_since_full >= self.full_frame_every):
+            return None
+        x0, y0, x1, y1 = self.box
+        dx, dy = self.velocity
+        if self.region is not None:
+            # Hold the region while the predicted box stays inside it, so MediaPipe's tracking stays valid
+            left, top, right, bottom = self.region
+            inset = (right - left) * self.hold_margin
+            if (left + inset <= (x0 + dx) * width and (x1 + dx) * width <= right - inset
+                    and top + inset <= (y0 + dy) * height and (y1 + dy) * height <= bottom - inset):
+                return self.region
+        cx = (x0 + x1) / 2 + dx
+        cy = (y0 + y1) / 2 + dy
+        # Square region in pixels, MediaPipe's palm detector works on square inputs
+        side = max((x1 - x0) * width, (y1 - y0) * height) * (1 + 2 * self.margin)
+        side = int(min(max(side, self.min_side), width, height))
+        # Shift (rather than cut) the region back into the frame
+        left = int(np.clip(cx * width - side / 2, 0, width - side))
+        top = int(np.clip(cy * height - side / 2, 0, height - side))
+        if side * side >= 0.8 * width * height:
+            return None
+        return left, top, left + side, top + side
+
+    def _detect(self, hands, frame, roi):
+        height, width = frame.shape[:2]
+        if self.started and roi != self.region:
+            # The tracked landmarks are in the previous region's coordinates
+            hands.reset()
+            self.region_changes += 1
+        self.region = roi
+        self.started = True
+        x0, y0, x1, y1 = roi if roi is not None else (0, 0, width, height)
+        crop = frame[y0:y1, x0:x1]
+        if self.max_side and max(crop.shape[:2]) > self.max_side:
+            # Landmarks are normalized to the input, so downscaling needs no extra mapping
+            scale = self.max_side / max(crop.shape[:2])
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        self.pixels_processed += crop.shape[0] * crop.shape[1]
+        results = hands.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        if roi is not None:
+            self._to_full_frame(results, roi, width, height)
+        return results
+
+    @staticmethod
+    def _to_full_frame(results, roi, width: int, height: int) -> None:
+        # Rewrites the landmark protos in place: region-normalized -> frame-normalized
+        x0, y0, x1, y1 = roi
+        sx, sy = (x1 - x0) / width, (y1 - y0) / height
+        ox, oy = x0 / width, y0 / height
+        for hand_landmarks in results.multi_hand_landmarks or []:
+            for lm in hand_landmarks.landmark:
+                lm.x = lm.x * sx + ox
+                lm.y = lm.y * sy + oy
+                # MediaPipe's z uses roughly the scale of x
+                lm.z = lm.z * sx
+
+    def process(self, hands, frame):
+        """Drop-in replacement for hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).
+
+        Args:
+            hands (mp.solutions.hands.Hands): The MediaPipe Hands instance of this stream
+            frame (np.ndarray): BGR frame
+
+        Returns:
+            The MediaPipe results, with landmarks in full-frame normalized coordinates
+        """
+        height, width = frame.shape[:2]
+        self.frames += 1
+        self.pixels_total += width * height
+        roi = self.predict_roi(width, height)
+        results = self._detect(hands, frame, roi)
+        if roi is not None and not results.multi_hand_landmarks and self.retry_full_frame:
+            roi = None
+            results = self._detect(hands, frame, None)
+        if roi is None:
+            self.full_frame_searches += 1
+            self.frames_since_full = 0
+        else:
+            self.frames_since_full += 1
+        self._update(results)
+        return results
+
+    def _update(self, results) -> None:
+        hand_list = results.multi_hand_landmarks or []
+        if not hand_list:
+            self.reset()
+            return
+        points = landmarks_to_array(hand_list)[..., :2].reshape(-1, 2)
+        box = (*points.min(axis=0), *points.max(axis=0))
+        if self.box is not None:
+            previous_center = np.array([(self.box[0] + self.box[2]) / 2, (self.box[1] + self.box[3]) / 2])
+            center = np.array([(box[0] + box[2]) / 2, (box[1] + box[3]) / 2])
+            self.velocity = center - previous_center
+        self.box = box
+
+    def pixel_ratio(self) -> float:
+        """Fraction of the captured pixels that went through colour conversion and MediaPipe"""
+        return self.pixels_processed / self.pixels_total if self.pixels_total else 1.0
@@ -0,0 +1,282 @@
+import numpy as np
+from moderngl import Context, Program
+from scene_object import SceneObject, compute_model_matrices
+from render_queue import DrawItem, RenderQueue
+
+# Bytes of one 4x4 float32 model matrix in the instance buffer
+MATRIX_BYTES = 64
+
+
+def _triangles(vao) -> int:
+    return vao._index_buffer.size // vao._index_element_size // 3
+
+
+class InstanceBatch:
+    def __init__(self, ctx: Context, prog: Program, vao, texture, uv_scale: float = 1.0, capacity: int = 16,
+                 lod=None):
+        """All objects sharing one mesh VAO, texture and uv scale. Their model matrices live in a
+        per-instance buffer, so the whole batch is a single draw call.
+
+        With a MeshLOD every level of the mesh gets its own instance buffer. Given a Frustum, the batch
+        culls its instances by their bounding spheres and regroups the visible ones by level, which
+        costs one draw call per level in use.
+
+        Args:
+            ctx (Context): The modernGL context
+            prog (Program): The instanced shader program (vertex_instanced.glsl)
+            vao (VAO): The shared mesh VAO
+            texture (Texture): The shared texture
+            uv_scale (float, optional): The uv scale to use. Defaults to 1.0.
+            capacity (int, optional): Initial number of instance slots. Defaults to 16.
+            lod (MeshLOD, optional): Levels of detail and bounding sphere of the mesh. Defaults to None.
+        """
+        self.ctx = ctx
+        self.prog = prog
+        self.vao = vao
+        self.texture = texture
+        self.uv_scale = uv_scale
+        self.lod = lod
+        self.levels = lod.levels if lod is not None else [vao]
+        self.level_triangles = [_triangles(level) for level in self.levels]
+        self.objects = []
+        self.slots = {} # id(obj) -> instance index
+        self.dirty = set() # instance indices whose matrix must be recomputed and uploaded
+        self.matrices = np.zeros((capacity, 4, 4), dtype='f4')
+        # World-space bounding spheres, kept up to date with the matrices
+        self.centers = np.zeros((capacity, 3))
+        self.radii = np.zeros(capacity)
+        # Visible instance indices per level, None while every instance is drawn at full detail in slot order
+        self.members = None
+        self.frustum = None # the frustum members were computed for
+        self.instance_buffers = [ctx.buffer(reserve=capacity * MATRIX_BYTES, dynamic=True) for _ in self.levels]
+        self.vertex_arrays = [None] * len(self.levels)
+        self._build_vertex_arrays()
+
+    @property
+    def instance_buffer(self):
+        return self.instance_buffers[0]
+
+    @property
+    def vertex_array(self):
+        return self.vertex_arrays[0]
+
+    def _build_vertex_arrays(self) -> None:
+        """Binds the mesh's vertex buffers plus the per-instance matrix buffer for the instanced program,
+        once per level. The mglw VAO wrapper cannot register per-instance buffers, so the vertex arrays are
+        built here from its buffers directly.
+        """
+        attributes = [name for name in ("in_position", "in_texcoord_0") if name in self.prog]
+        for level, (vao, instance_buffer) in enumerate(zip(self.levels, self.instance_buffers)):
+            if self.vertex_arrays[level] is not None:
+                self.vertex_arrays[level].release()
+            content = []
+            for info in {id(vao.get_buffer_by_name(name)): vao.get_buffer_by_name(name)
+                         for name in attributes}.values():
+                content.append(info.content(attributes))
+            content.append((instance_buffer, "16f/i", "in_model"))
+            self.vertex_arrays[level] = self.ctx.vertex_array(
+                self.prog, content, vao._index_buffer, vao._index_element_size
+            )
+
+    def _grow(self) -> None:
+        capacity = len(self.matrices) * 2
+        matrices = np.zeros((capacity, 4, 4), dtype='f4')
+        matrices[:len(self.matrices)] = self.matrices
+        self.matrices = matrices
+        self.centers = np.resize(self.centers, (capacity, 3))
+        self.radii = np.resize(self.radii, capacity)
+        for buffer in self.instance_buffers:
+            buffer.release()
+        self.instance_buffers = [self.ctx.buffer(reserve=capacity * MATRIX_BYTES, dynamic=True)
+                                 for _ in self.levels]
+        self.instance_buffers[0].write(self.matrices[:len(self.objects)].tobytes())
+        # Level buffers are refilled by the next update
+        self.members = None
+        self._build_vertex_arrays()
+
+    def add(self, obj: SceneObject) -> None:
+        if len(self.objects) == len(self.matrices):
+            self._grow()
+        self.slots[id(obj)] = len(self.objects)
+        self.dirty.add(len(self.objects))
+        self.objects.append(obj)
+        obj.add_listener(self._on_transform_changed)
+
+    def remove(self, obj: SceneObject) -> None:
+        # Swap with the last instance so the buffer stays densely packed
+        obj.remove_listener(self._on_transform_changed)
+        index = self.slots.pop(id(obj))
+        last = len(self.objects) - 1
+        moved = self.objects.pop()
+        self.dirty.discard(last)
+        if index != last:
+            self.objects[index] = moved
+            self.slots[id(moved)] = index
+            self.dirty.add(index)
+        self.members = None
+
+    def _on_transform_changed(self, obj: SceneObject) -> None:
+        self.dirty.add(self.slots[id(obj)])
+
+    def update(self, frustum=None, tolerance: float = 1.5) -> int:
+        """Recomputes the model matrices of objects that changed since the last update and uploads them.
+
+        Without a frustum (or a MeshLOD) every instance is drawn at full detail and only the changed
+        matrices are uploaded, so the work is proportional to the number of changed objects. With one, the
+        instances are culled and assigned a level; a level's buffer is only rewritten when its members or
+        their matrices changed, so a still camera over still objects uploads nothing.
+
+        Args:
+            frustum (Frustum, optional): The camera's view volume. Defaults to None (no culling).
+            tolerance (float, optional): Largest simplification error in pixels (see MeshLOD.select).
+                Defaults to 1.5.
+
+        Returns:
+            int: Number of matrices uploaded
+        """
+        dirty = sorted(self.dirty)
+        self.dirty.clear()
+        if dirty:
+            objects = [self.objects[i] for i in dirty]
+            self.matrices[dirty] = compute_model_matrices(
+                [obj.position for obj in objects],
+                [obj.rotation for obj in objects],
+                [obj.scale for obj in objects],
+            )
+            if self.lod is not None:
+                linear = self.matrices[dirty, :3, :3].astype(np.float64)
+                self.centers[dirty] = self.lod.center @ linear + self.matrices[dirty, 3, :3]
+                # The largest singular value (the largest axis scale) bounds how far the sphere can stretch
+                self.radii[dirty] = self.lod.radius * np.linalg.norm(linear, ord=2, axis=(1, 2))
+
+        if frustum is not None and self.lod is not None:
+            return self._update_levels(frustum, tolerance, dirty)
+        if self.members is not None:
+            # Back from culled, regrouped buffers to every instance in slot order
+            self.members = None
+            dirty = list(range(len(self.objects)))
+        if not dirty:
+            return 0
+
+        if len(dirty) > len(self.objects) // 2:
+            # Mostly dirty: one contiguous upload is cheaper than many small ones
+            self.instance_buffer.write(self.matrices[:len(self.objects)].tobytes())
+        else:
+            for i in dirty:
+                self.instance_buffer.write(self.matrices[i].tobytes(), offset=i * MATRIX_BYTES)
+        return len(dirty)
+
+    def _update_levels(self, frustum, tolerance: float, dirty: list) -> int:
+        if frustum is self.frustum and self.members is not None and not dirty:
+            return 0
+        count = len(self.objects)
+        visible = np.flatnonzero(frustum.intersects(self.centers[:count], self.radii[:count]))
+        levels = self.lod.select(frustum.projected_sizes(self.centers[visible], self.radii[visible]), tolerance)
+        members = [visible[levels == level] for level in range(len(self.levels))]
+        changed = np.zeros(count, dtype=bool)
+        changed[dirty] = True
+        uploads = 0
+        for level, indices in enumerate(members):
+            previous = self.members[level] if self.members is not None else None
+            if previous is not None and np.array_equal(previous, indices) and not changed[indices].any():
+                continue
+            if len(indices):
+                self.instance_buffers[level].write(self.matrices[indices].tobytes())
+                uploads += len(indices)
+        self.members = members
+        self.frustum = frustum
+        return uploads
+
+    def draw_items(self) -> list:
+        """The batch's draw calls: one for the whole batch, or one per level with visible instances"""
+        name = getattr(self.vao, "name", "batch")
+        if self.members is None:
+            if not self.objects:
+                return []
+            return [DrawItem(self.prog, self.texture, self.vertex_array, self.uv_scale,
+                             instances=len(self.objects), label=name)]
+        return [DrawItem(self.prog, self.texture, self.vertex_arrays[level], self.uv_scale,
+                         instances=len(indices), label=f"{name} lod{level}")
+                for level, indices in enumerate(self.members) if len(indices)]
+
+    def triangles(self) -> int:
+        """Triangles the batch's draw calls submit"""
+        if self.members is None:
+            return len(self.objects) * self.level_triangles[0]
+        return sum(len(indices) * triangles for indices, triangles in zip(self.members, self.level_triangles))
+
+
+class InstancedRenderer:
+    def __init__(self, ctx: Context, prog: Program, lod_tolerance: float = 1.5):
+        """Groups SceneObjects by (mesh VAO, texture, uv scale) and draws every group with one instanced
+        draw call, so the draw-call count stays flat as the number of objects grows. The draws go through
+        a RenderQueue, which owns the texture binding and the uniforms.
+
+        Once a frustum is set, objects with a MeshLOD outside it are skipped and the others are drawn at
+        the coarsest level whose error stays under lod_tolerance pixels.
+
+        Args:
+            ctx (Context): The modernGL context
+            prog (Program): The instanced shader program (vertex_instanced.glsl)
+            lod_tolerance (float, optional): Largest simplification error in pixels. Defaults to 1.5.
+        """
+        self.ctx = ctx
+        self.prog = prog
+        self.lod_tolerance = lod_tolerance
+        self.batches = {}
+        self.frustum = None
+        self.draw_calls = 0
+        self.uploads = 0
+        self.culled = 0
+        self.triangles = 0
+
+    def set_frustum(self, frustum) -> None:
+        """Culls and picks levels against this Frustum from the next submit on. None draws everything at full
+        detail. Set a new one whenever the camera or the viewport changes.
+        """
+        self.frustum = frustum
+
+    def add(self, obj: SceneObject, uv_scale: float = 1.0) -> None:
+        # Objects with levels of detail are batched by their MeshLOD, which owns every level's VAO
+        key = (id(obj.lod) if obj.lod is not None else id(obj.vao), id(obj.texture), uv_scale)
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = InstanceBatch(self.ctx, self.prog, obj.vao, obj.texture, uv_scale, lod=obj.lod)
+            self.batches[key] = batch
+        batch.add(obj)
+
+    def remove(self, obj: SceneObject) -> None:
+        for batch in self.batches.values():
+            if id(obj) in batch.slots:
+                batch.remove(obj)
+                return
+
+    def submit(self, queue: RenderQueue) -> None:
+        """Uploads changed model matrices and queues one draw call per non-empty batch (per level in use
+        for batches with levels of detail)
+
+        Args:
+            queue (RenderQueue): The frame's render queue
+        """
+        self.draw_calls = 0
+        self.uploads = 0
+        self.culled = 0
+        self.triangles = 0
+        for batch in self.batches.values():
+            self.uploads += batch.update(self.frustum, self.lod_tolerance)
+            items = batch.draw_items()
+            for item in items:
+                queue.submit(item)
+            self.draw_calls += len(items)
+            self.culled += len(batch.objects) - sum(item.instances for item in items)
+            self.triangles += batch.triangles()
+
+    def render(self, shader_program) -> None:
+        """Draws every batch immediately through a one-off queue. The camera block must already be written.
+
+        Args:
+            shader_program (ShaderProgram): The shader programs holding the camera uniform block
+        """
+        queue = RenderQueue(shader_program)
+        self.submit(queue)
+        queue.flush()
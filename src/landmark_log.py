@@ -0,0 +1,157 @@
+import os
+import time
+from typing import NamedTuple
+import numpy as np
+
+# File layout: a 16 byte header followed by fixed-size records, one per detected hand. A frame without
+# hands still writes one record (count == 0), so the log keeps the timing of every frame. Fixed-size
+# records make the file append-only and memory-mappable; a record cut short by a crash is ignored.
+MAGIC = b"LMKLOG"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S6"), ("version", "<u2"), ("record_size", "<u4"), ("reserved", "<u4")])
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),       # seconds, time.perf_counter() of the capture or source time
+    ("frame", "<u4"),           # frame number in the log
+    ("count", "u1"),            # hands in this frame
+    ("hand", "u1"),             # index of this hand within the frame
+    ("handedness", "u1"),       # 0 left, 1 right, 255 unknown
+    ("pad", "u1"),
+    ("score", "<f4"),           # MediaPipe handedness confidence
+    ("landmarks", "<f4", (21, 3)),
+])
+HANDEDNESS_CODES = {"Left": 0, "Right": 1}
+HANDEDNESS_NAMES = {code: name for name, code in HANDEDNESS_CODES.items()}
+
+
+class LandmarkFrame(NamedTuple):
+    """One frame read back from a landmark log"""
+    timestamp: float
+    landmarks: np.ndarray   # (H, 21, 3) float32, a view into the memory map
+    handedness: list        # "Left"/"Right" per hand
+    scores: np.ndarray      # (H,) float32
+
+
+class LandmarkLogWriter:
+    def __init__(self, path: str):
+        """Appends frames to a landmark log, creating it (with its header) if needed.
+
+        Args:
+            path (str): The .lmlog file
+        """
+        self.path = path
+        self.frames = 0
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER_DTYPE.itemsize
+        if exists:
+            _read_header(path)
+            # Drop a partially written record so appended frames stay aligned
+            data_bytes = os.path.getsize(path) - HEADER_DTYPE.itemsize
+            os.truncate(path, HEADER_DTYPE.itemsize + data_bytes // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize)
+            self.frames = len(LandmarkLog(path))
+        self._file = open(path, 'ab')
+        if not exists:
+            self._file.truncate(0)
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header[0] = (MAGIC, VERSION, RECORD_DTYPE.itemsize, 0)
+            self._file.write(header.tobytes())
+        self._buffers = {}
+
+    def write(self, timestamp: float, landmarks: np.ndarray, handedness=(), scores=()) -> None:
+        """Appends one frame.
+
+        Args:
+            timestamp (float): Capture time in seconds
+            landmarks (np.ndarray): (H, 21, 3) landmarks, H may be 0
+            handedness (list, optional): "Left"/"Right" per hand. Defaults to unknown.
+            scores (list, optional): Handedness confidence per hand. Defaults to 0.
+        """
+        count = len(landmarks)
+        records = self._buffers.get(count)
+        if records is None:
+            records = self._buffers[count] = np.zeros(max(count, 1), dtype=RECORD_DTYPE)
+            records["hand"] = np.arange(len(records))
+        records["timestamp"] = timestamp
+        records["frame"] = self.frames
+        records["count"] = count
+        if count:
+            records["landmarks"] = landmarks
+            codes = [HANDEDNESS_CODES.get(name, 255) for name in handedness]
+            records["handedness"] = codes + [255] * (count - len(codes))
+            records["score"] = list(scores) + [0.0] * (count - len(scores))
+        self._file.write(records.tobytes())
+        self.frames += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _read_header(path: str) -> np.ndarray:
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} is not a landmark log")
+    if header["version"][0] != VERSION or header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has unsupported version {header['version'][0]}")
+    return header
+
+
+class LandmarkLog:
+    def __init__(self, path: str):
+        """Memory-mapped reader for a landmark log. Nothing is copied until frames are accessed.
+
+        Args:
+            path (str): The .lmlog file
+        """
+        self.path = path
+        _read_header(path)
+        num_records = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+        if num_records:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_DTYPE.itemsize,
+                                     shape=(num_records,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        # Every frame starts with its hand 0 record, hands of one frame are contiguous
+        self.starts = np.flatnonzero(self.records["hand"] == 0)
+        self.counts = self.records["count"][self.starts].astype(np.int64)
+        self.timestamps = self.records["timestamp"][self.starts]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def frame(self, index: int) -> LandmarkFrame:
+        start, count = self.starts[index], self.counts[index]
+        rows = self.records[start:start + count]
+        return LandmarkFrame(
+            float(self.timestamps[index]),
+            rows["landmarks"],
+            [HANDEDNESS_NAMES.get(int(code), "Unknown") for code in rows["handedness"]],
+            rows["score"],
+        )
+
+    def hand_landmarks(self) -> np.ndarray:
+        """(N, 63) float32 landmarks of every recorded hand, ready for a classifier batch"""
+        hands = self.records[self.records["count"] > 0]
+        return np.ascontiguousarray(hands["landmarks"]).reshape(len(hands), 63)
+
+    def replay(self, speed: float = None):
+        """Yields the frames in order.
+
+        Args:
+            speed (float, optional): 1.0 for the recorded pace, 2.0 for twice as fast, ... Defaults to
+                None (as fast as possible).
+        """
+        started = time.perf_counter()
+        for index in range(len(self)):
+            if speed and index:
+                delay = (self.timestamps[index] - self.timestamps[0]) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield self.frame(index)
@@ -0,0 +1,140 @@
+import numpy as np
+
+# Grid resolutions tried for the simplified levels, cells along the longest side of the mesh's bounding box
+LOD_GRIDS = (128, 64, 32, 16, 8)
+
+
+class MeshLOD:
+    def __init__(self, levels: list, errors, center, radius: float, triangles):
+        """A mesh and its precomputed simplified versions, finest first, plus the object-space bounding
+        sphere used to cull it. Built by AssetCache.load_mesh_lods.
+
+        Each coarser level was simplified with a known geometric error (the vertex clustering cell size).
+        A level is good enough once that error covers less than a pixel or two on screen, which
+        select() decides from the projected size of the bounding sphere.
+
+        Args:
+            levels (list): Mesh VAO per level, levels[0] is the full mesh
+            errors (list): Object-space simplification error per level, 0 for levels[0]
+            center (array-like): (3,) center of the bounding sphere in object space
+            radius (float): Radius of the bounding sphere in object space
+            triangles (list): Triangle count per level
+        """
+        self.levels = levels
+        self.errors = np.asarray(errors, dtype=np.float64)
+        self.center = np.asarray(center, dtype=np.float64)
+        self.radius = float(radius)
+        self.triangles = np.asarray(triangles, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def select(self, sizes, tolerance: float = 1.5) -> np.ndarray:
+        """Coarsest level per object whose simplification error stays within tolerance pixels.
+
+        Args:
+            sizes (array-like): (N,) projected diameters of the bounding spheres in pixels
+            tolerance (float, optional): Largest acceptable error in pixels. Defaults to 1.5.
+
+        Returns:
+            np.ndarray: (N,) level indices
+        """
+        sizes = np.asarray(sizes, dtype=np.float64).reshape(-1, 1)
+        # The error scales with the object, so in pixels it is sizes * error / diameter
+        relative = self.errors[1:] / max(2.0 * self.radius, 1e-12)
+        return (sizes * relative <= tolerance).sum(axis=1)
+
+
+def position_offset(buffer_format: str, attributes: list, name: str = "in_position") -> int:
+    """Column of the first position component in an interleaved float vertex, e.g. 5 for '2f 3f 3f'
+    with attributes [in_texcoord_0, in_normal, in_position]
+    """
+    sizes = [int(fmt[:-1]) for fmt in buffer_format.split()]
+    return sum(sizes[:attributes.index(name)])
+
+
+def bounding_sphere(positions: np.ndarray):
+    """Sphere around the bounding box center enclosing every position. Returns (center (3,), radius)."""
+    center = (positions.min(axis=0) + positions.max(axis=0)) / 2.0
+    return center, float(np.sqrt(((positions - center) ** 2).sum(axis=1).max()))
+
+
+def cluster_vertices(vertices: np.ndarray, indices: np.ndarray, offset: int, cell_size: float):
+    """Simplifies an indexed triangle mesh by vertex clustering: every vertex in one cell of a uniform
+    grid collapses into a single vertex at the cell's mean position. Triangles that collapse to a line or a
+    point, and duplicates, are dropped. The whole pass is a handful of vectorized NumPy operations.
+
+    The merged vertex keeps the texture coordinates and normal of the cell's vertex closest to the mean, so
+    the attributes stay those of a real surface point.
+
+    Args:
+        vertices (np.ndarray): (V, stride) float32 interleaved vertices
+        indices (np.ndarray): (3T,) triangle indices
+        offset (int): Column of the x coordinate within a vertex
+        cell_size (float): Grid cell size, the largest distance a vertex moves is about this
+
+    Returns:
+        (vertices (V', stride) float32, indices (3T',) uint32)
+    """
+    positions = vertices[:, offset:offset + 3].astype(np.float64)
+    cells = np.floor((positions - positions.min(axis=0)) / cell_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    counts = np.bincount(cluster)
+    means = np.stack([np.bincount(cluster, positions[:, axis]) for axis in range(3)], axis=1) / counts[:, None]
+    distances = ((positions - means[cluster]) ** 2).sum(axis=1)
+    # Vertices sorted by cluster, then by distance to the mean: the first of every run represents it
+    order = np.lexsort((distances, cluster))
+    representatives = order[np.r_[0, np.flatnonzero(np.diff(cluster[order])) + 1]]
+
+    triangles = cluster[np.asarray(indices, dtype=np.int64)].reshape(-1, 3)
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) &
+                          (triangles[:, 0] != triangles[:, 2])]
+    # Rotate every triangle to start at its smallest index, which keeps the winding, then drop duplicates
+    rotation = (triangles.argmin(axis=1)[:, None] + np.arange(3)) % 3
+    triangles = np.take_along_axis(triangles, rotation, axis=1)
+    _, unique = np.unique(triangles, axis=0, return_index=True)
+    triangles = triangles[np.sort(unique)]
+
+    # Only clusters that are still referenced become vertices, in order of first use
+    used, first_use = np.unique(triangles.reshape(-1), return_index=True)
+    used = used[np.argsort(first_use)]
+    remap = np.empty(len(counts), dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    simplified = vertices[representatives[used]].copy()
+    simplified[:, offset:offset + 3] = means[used]
+    return np.ascontiguousarray(simplified, dtype='f4'), remap[triangles.reshape(-1)].astype('u4')
+
+
+def build_lod_chain(vertices: np.ndarray, indices: np.ndarray, offset: int, max_levels: int = 4,
+                    reduction: float = 0.5, min_triangles: int = 32) -> list:
+    """Simplified versions of a mesh for MeshLOD. Every level is clustered from the full mesh on a coarser
+    grid (LOD_GRIDS), and only kept when it has at most `reduction` times the triangles of the previous one.
+
+    Args:
+        vertices (np.ndarray): (V, stride) float32 interleaved vertices
+        indices (np.ndarray): (3T,) triangle indices
+        offset (int): Column of the x coordinate within a vertex
+        max_levels (int, optional): Levels including the full mesh. Defaults to 4.
+        reduction (float, optional): Largest triangle ratio between consecutive levels. Defaults to 0.5.
+        min_triangles (int, optional): Coarser levels are not built below this many triangles. Defaults to 32.
+
+    Returns:
+        list: (vertices, indices, error) per level, finest first, starting with the input at error 0
+    """
+    levels = [(vertices, indices, 0.0)]
+    extent = float(np.ptp(vertices[:, offset:offset + 3], axis=0).max())
+    for grid in LOD_GRIDS:
+        if len(levels) >= max_levels:
+            break
+        cell_size = extent / grid
+        simplified, simplified_indices = cluster_vertices(vertices, indices, offset, cell_size)
+        triangles = len(simplified_indices) // 3
+        if triangles < min_triangles:
+            break
+        if triangles <= reduction * (len(levels[-1][1]) // 3):
+            levels.append((simplified, simplified_indices, cell_size))
+    return levels
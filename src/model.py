@@ -1,23 +1,86 @@
+import copy
 import torch
 import torch.nn as nn
 import torch.optim as optim
 
+# Mapping from class indices to gesture names. Indices follow the alphabetical order of the
+# data_model subfolders, so this must be adjusted whenever a gesture is added.
+CLASS_NAMES = {0: "hold", 1: "none", 2: "scale", 3: "swipe_right"}
+
 # ----- Define the PyTorch Model -----
 class GestureClassifier(nn.Module):
-    def __init__(self, input_dim=63, num_classes=2):
+    def __init__(self, input_dim=63, num_classes=2, hidden=(128, 64), dropout=0.3):
         """
         A simple feedforward network for gesture classification.
+        hidden lists the widths of the hidden layers; the first one is followed
+        by BatchNorm and Dropout. The defaults match the shipped weights.
         """
         super(GestureClassifier, self).__init__()
-        self.net = nn.Sequential(
-            nn.Linear(input_dim, 128),
-            nn.BatchNorm1d(128),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(128, 64),
-            nn.ReLU(),
-            nn.Linear(64, num_classes)
-        )
+        layers = [nn.Linear(input_dim, hidden[0]), nn.BatchNorm1d(hidden[0]), nn.ReLU(), nn.Dropout(dropout)]
+        for in_features, out_features in zip(hidden, hidden[1:]):
+            layers += [nn.Linear(in_features, out_features), nn.ReLU()]
+        layers.append(nn.Linear(hidden[-1], num_classes))
+        self.net = nn.Sequential(*layers)
 
     def forward(self, x):
         return self.net(x)
+
+
+# ----- Deployment helpers -----
+def fold_batchnorm(model):
+    """
+    Returns an inference-only nn.Sequential equivalent to model.net in eval mode:
+    every BatchNorm1d is folded into the Linear layer before it and Dropout
+    layers are removed. The original model is left untouched.
+    """
+    layers = []
+    for layer in model.net:
+        if isinstance(layer, nn.Dropout):
+            continue
+        if isinstance(layer, nn.BatchNorm1d) and layers and isinstance(layers[-1], nn.Linear):
+            linear = layers[-1]
+            # y = gamma * (Wx + b - mean) / sqrt(var + eps) + beta
+            scale = layer.weight.detach() / torch.sqrt(layer.running_var + layer.eps)
+            folded = nn.Linear(linear.in_features, linear.out_features)
+            with torch.no_grad():
+                folded.weight.copy_(linear.weight * scale[:, None])
+                folded.bias.copy_((linear.bias - layer.running_mean) * scale + layer.bias)
+            layers[-1] = folded
+            continue
+        layers.append(copy.deepcopy(layer))
+    return nn.Sequential(*layers).eval()
+
+
+# ----- Temporal model for motion gestures -----
+class TemporalGestureClassifier(nn.Module):
+    def __init__(self, input_dim=63, num_classes=2, channels=64, kernel_size=3, dilations=(1, 2, 4)):
+        """
+        A causal, dilated 1D convolution network over a sequence of landmark vectors.
+        Every output only depends on the current frame and the receptive_field - 1
+        frames before it, so src/temporal.py can run it one frame at a time.
+        """
+        super(TemporalGestureClassifier, self).__init__()
+        self.kernel_size = kernel_size
+        self.dilations = tuple(dilations)
+        self.convs = nn.ModuleList()
+        in_channels = input_dim
+        for dilation in self.dilations:
+            self.convs.append(nn.Conv1d(in_channels, channels, kernel_size, dilation=dilation))
+            in_channels = channels
+        self.head = nn.Linear(channels, num_classes)
+
+    @property
+    def receptive_field(self):
+        """Number of frames that influence one prediction"""
+        return 1 + (self.kernel_size - 1) * sum(self.dilations)
+
+    def forward(self, x):
+        """
+        x: (B, T, input_dim) landmark sequences, oldest frame first.
+        Returns (B, num_classes) logits for the last frame of each sequence.
+        """
+        h = x.transpose(1, 2)
+        for conv, dilation in zip(self.convs, self.dilations):
+            # Left padding only, so no frame ever sees the future
+            h = torch.relu(conv(nn.functional.pad(h, ((self.kernel_size - 1) * dilation, 0))))
+        return self.head(h[:, :, -1])
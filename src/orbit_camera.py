@@ -11,6 +11,8 @@ class OrbitCamera:
             yaw (float, optional): Sets the yaw angle. Defaults to 0.0.
             pitch (float, optional): Sets the pitch angle. Defaults to 0.0.
         """
+        self.version = 0 # Bumped whenever the view changes
+        self._view = None
         self.center = center
         self.radius = radius
         self.yaw = yaw
@@ -18,33 +20,99 @@ class OrbitCamera:
         self.up = Vector3([0.0, 1.0, 0.0])
         self.update_vectors()
 
+    # The orbit parameters invalidate the view vectors and matrix when assigned
+    @property
+    def center(self) -> Vector3:
+        return self._center
+
+    @center.setter
+    def center(self, value) -> None:
+        self._center = Vector3(value)  # copy, so the default argument is never mutated by pan()
+        self._mark_dirty()
+
+    @property
+    def radius(self) -> float:
+        return self._radius
+
+    @radius.setter
+    def radius(self, value: float) -> None:
+        if value != getattr(self, "_radius", None):
+            self._radius = value
+            self._mark_dirty()
+
+    @property
+    def yaw(self) -> float:
+        return self._yaw
+
+    @yaw.setter
+    def yaw(self, value: float) -> None:
+        if value != getattr(self, "_yaw", None):
+            self._yaw = value
+            self._mark_dirty()
+
+    @property
+    def pitch(self) -> float:
+        return self._pitch
+
+    @pitch.setter
+    def pitch(self, value: float) -> None:
+        if value != getattr(self, "_pitch", None):
+            self._pitch = value
+            self._mark_dirty()
+
+    @property
+    def front(self) -> Vector3:
+        self._refresh()
+        return self._front
+
+    @property
+    def right(self) -> Vector3:
+        self._refresh()
+        return self._right
+
+    @property
+    def position(self) -> Vector3:
+        self._refresh()
+        return self._position
+
+    def _mark_dirty(self) -> None:
+        self._vectors_dirty = True
+        self._view = None
+        self.version += 1
+
+    def _refresh(self) -> None:
+        if self._vectors_dirty:
+            self.update_vectors()
+
     def update_vectors(self):
         """Updates the camera view vectors 
         """
         yaw_rad, pitch_rad = radians(self.yaw), radians(self.pitch)
 
-        self.front = Vector3([
+        self._front = Vector3([
             cos(pitch_rad) * cos(yaw_rad),
             sin(pitch_rad),
             cos(pitch_rad) * sin(yaw_rad)
         ]).normalized
 
-        self.right = self.front.cross(self.up).normalized
-        self.position = self.center - self.front * self.radius
+        self._right = self._front.cross(self.up).normalized
+        self._position = self.center - self._front * self.radius
+        self._vectors_dirty = False
 
     def get_view_matrix(self) -> Matrix44:
         """Gets the 4x4 view matrix from the camera based off its position, the center (target), and up vectors
 
         Returns:
-            Matrix44: A 4x4 view matrix
+            Matrix44: A 4x4 view matrix, cached until the camera moves
         """
-        self.update_vectors()
-        return Matrix44.look_at(
-            self.position,
-            self.center,
-            self.up,
-            dtype='f4'
-        )
+        if self._view is None:
+            self._view = Matrix44.look_at(
+                self.position,
+                self.center,
+                self.up,
+                dtype='f4'
+            )
+        return self._view
         
     def rotate(self, dy:float, dp:float)->None:
         """Rotates the camera along spherical coordinates (yaw, pitch)
@@ -73,14 +141,12 @@ class OrbitCamera:
             dz (float): delta z
             speed (float, optional): The speed to move. Defaults to 1.0.
         """
-        self.update_vectors()
-
         forward = Vector3([self.front.x, 0.0, self.front.z]).normalized
         
         offset = (self.right * dx + forward * dz) * speed
 
-        self.center += offset
-        self.position += offset        
+        # The position follows the center on the next refresh
+        self.center = self.center + offset
 
     def clamp(self, val:float, min_val:float = -89.0, max_val:float = 89.0) -> float:
         """Clamps an input value to a min/max range
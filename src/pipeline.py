@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+
+
+class LatestValueQueue:
+    def __init__(self):
+        """A bounded (size 1) queue between pipeline stages. A new put replaces any value the consumer
+        has not taken yet, so a slow consumer always sees the freshest item instead of a growing backlog.
+        """
+        self._cond = threading.Condition()
+        self._value = None
+        self._has_value = False
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, value) -> None:
+        """Publishes a value, dropping the previous one if it was never consumed
+
+        Args:
+            value: The item to publish
+        """
+        with self._cond:
+            if self._has_value:
+                self.dropped += 1
+            self._value = value
+            self._has_value = True
+            self._cond.notify()
+
+    def get(self, timeout: float = None):
+        """Waits for and takes the latest value
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to None (wait forever).
+
+        Returns:
+            The latest value, or None on timeout or when the queue is closed
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._has_value or self._closed, timeout):
+                return None
+            if not self._has_value:
+                return None
+            value, self._value, self._has_value = self._value, None, False
+            return value
+
+    def close(self) -> None:
+        """Wakes up every waiting consumer so stages can shut down"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StageTimer:
+    def __init__(self, name: str, window: int = 300):
+        """Rolling latency counter for one pipeline stage
+
+        Args:
+            name (str): The stage name used in reports
+            window (int, optional): Number of recent samples kept for percentiles. Defaults to 300.
+        """
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def time(self):
+        """Context manager that records the duration of its body"""
+        return _Timed(self)
+
+    def summary(self) -> dict:
+        """Returns mean/p50/p95/p99 in milliseconds over the rolling window"""
+        if not self.samples:
+            return {"count": self.count, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+        ms = np.fromiter(self.samples, dtype=np.float64) * 1000.0
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {"count": self.count, "mean_ms": float(ms.mean()), "p50_ms": float(p50), "p95_ms": float(p95),
+                "p99_ms": float(p99)}
+
+    def __str__(self) -> str:
+        s = self.summary()
+        return f"{self.name:>14}: mean {s['mean_ms']:6.1f} ms  p50 {s['p50_ms']:6.1f} ms  p95 {s['p95_ms']:6.1f} ms"
+
+
+class _Timed:
+    def __init__(self, timer: StageTimer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(time.perf_counter() - self.start)
+        return False
+
+
+class PipelineStats:
+    def __init__(self, *stage_names: str, window: int = 300):
+        """A named set of StageTimers plus a frame-rate counter for the final stage
+
+        Args:
+            stage_names (str): Names of the stages to track
+            window (int, optional): Rolling window size for every timer. Defaults to 300.
+        """
+        self.stages = {name: StageTimer(name, window) for name in stage_names}
+        self.frame_times = deque(maxlen=window)
+
+    def __getitem__(self, name: str) -> StageTimer:
+        return self.stages[name]
+
+    def tick(self) -> None:
+        """Marks one output frame, used to compute the end-to-end FPS"""
+        self.frame_times.append(time.perf_counter())
+
+    def fps(self) -> float:
+        if len(self.frame_times) < 2:
+            return 0.0
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+    def report(self) -> str:
+        lines = [str(timer) for timer in self.stages.values()]
+        lines.append(f"{'fps':>14}: {self.fps():6.1f}")
+        return "\n".join(lines)
+
+
+class Mailbox:
+    def __init__(self):
+        """A lock-free latest-value mailbox for a single consumer. The producer swaps in a
+        (sequence, value) tuple, which is one atomic reference assignment under the GIL, and the consumer
+        polls without ever blocking.
+        """
+        self._latest = (0, None)
+        self._seen = 0
+
+    def publish(self, value) -> None:
+        """Replaces the current value. Only one thread may publish.
+
+        Args:
+            value: The item to publish
+        """
+        self._latest = (self._latest[0] + 1, value)
+
+    def poll(self):
+        """Returns the newest value if it has not been returned before, otherwise None. Never blocks."""
+        seq, value = self._latest
+        if seq == self._seen:
+            return None
+        self._seen = seq
+        return value
+
+    def peek(self):
+        """Returns the newest value whether or not it was already polled"""
+        return self._latest[1]
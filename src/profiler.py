@@ -0,0 +1,194 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+from pipeline import StageTimer
+
+# Returned by every timer while profiling is off, so instrumented code costs one method call
+_DISABLED = nullcontext()
+
+
+class FrameProfiler:
+    def __init__(self, ctx=None, enabled: bool = False, window: int = 300, max_events: int = 200_000,
+                 gpu_latency: int = 3):
+        """Opt-in per-stage frame profiler. CPU stages are timed with perf_counter, GPU work with
+        moderngl time-elapsed queries. Rolling p50/p95/p99 per stage feed the overlay, and every
+        measured span is kept as a trace event for Chrome trace or CSV export.
+
+        GPU queries are read gpu_latency frames after they were issued, so reading them never stalls
+        the pipeline. GL time-elapsed queries cannot nest, so GPU stages must not overlap.
+
+        Args:
+            ctx (Context, optional): The modernGL context, required for GPU timings. Defaults to None.
+            enabled (bool, optional): Start recording right away. Defaults to False.
+            window (int, optional): Samples kept per stage for the percentiles. Defaults to 300.
+            max_events (int, optional): Trace events kept for export, oldest dropped first. Defaults to 200_000.
+            gpu_latency (int, optional): Frames to wait before reading a GPU query. Defaults to 3.
+        """
+        self.ctx = ctx
+        self.enabled = enabled
+        self.window = window
+        self.gpu_latency = gpu_latency
+        self.cpu_timers = {}
+        self.gpu_timers = {}
+        self.attached = {} # name -> StageTimer owned by another thread, e.g. the gesture worker
+        self.events = deque(maxlen=max_events) # (frame, track, name, start_s, duration_s)
+        self.frame = 0
+        self.origin = time.perf_counter()
+        self._frame_start = None
+        self._pending = deque() # (frame, query, name, cpu_start_s) waiting for their result
+        self._free_queries = []
+
+    # ----- Instrumentation -----
+    def stage(self, name: str):
+        """Context manager timing a CPU stage of the current frame"""
+        if not self.enabled:
+            return _DISABLED
+        return _CpuStage(self, name)
+
+    def gpu_stage(self, name: str):
+        """Context manager timing the GPU work issued inside it, e.g. one draw call"""
+        if not self.enabled or self.ctx is None:
+            return _DISABLED
+        return _GpuStage(self, name)
+
+    def begin_frame(self) -> None:
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        """Closes the frame, records its total CPU time and collects GPU results that are ready"""
+        if not self.enabled or self._frame_start is None:
+            return
+        end = time.perf_counter()
+        self._record("cpu", "frame", self._frame_start, end - self._frame_start)
+        self._frame_start = None
+        self._collect_gpu(self.frame - self.gpu_latency)
+        self.frame += 1
+
+    def attach(self, timers: dict) -> None:
+        """Shows StageTimers measured elsewhere (e.g. GestureWorker.stats.stages) next to the frame stages"""
+        self.attached.update(timers)
+
+    def set_enabled(self, enabled: bool) -> None:
+        if not enabled:
+            self._collect_gpu(self.frame)
+            self._frame_start = None
+        self.enabled = enabled
+
+    # ----- Recording -----
+    def _timer(self, track: str, name: str) -> StageTimer:
+        timers = self.gpu_timers if track == "gpu" else self.cpu_timers
+        timer = timers.get(name)
+        if timer is None:
+            timer = timers[name] = StageTimer(name, self.window)
+        return timer
+
+    def _record(self, track: str, name: str, start: float, duration: float, frame: int = None) -> None:
+        self._timer(track, name).record(duration)
+        self.events.append((self.frame if frame is None else frame, track, name, start - self.origin, duration))
+
+    def _acquire_query(self):
+        return self._free_queries.pop() if self._free_queries else self.ctx.query(time=True)
+
+    def _collect_gpu(self, up_to_frame: int) -> None:
+        while self._pending and self._pending[0][0] <= up_to_frame:
+            frame, query, name, start = self._pending.popleft()
+            # elapsed is in nanoseconds
+            self._record("gpu", name, start, query.elapsed * 1e-9, frame)
+            self._free_queries.append(query)
+
+    # ----- Reports -----
+    def summary(self) -> dict:
+        """Rolling statistics per stage: {"cpu": {...}, "gpu": {...}, "attached": {...}}"""
+        return {
+            "cpu": {name: timer.summary() for name, timer in self.cpu_timers.items()},
+            "gpu": {name: timer.summary() for name, timer in self.gpu_timers.items()},
+            "attached": {name: timer.summary() for name, timer in self.attached.items()},
+        }
+
+    def report(self) -> str:
+        lines = [f"{'stage':>28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for track, stages in self.summary().items():
+            for name, s in stages.items():
+                label = f"{track}:{name}"
+                lines.append(f"{label:>28} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f}")
+        return "\n".join(lines)
+
+    def draw_overlay(self, imgui) -> None:
+        """Draws the rolling percentiles as an imgui window. Call between imgui.new_frame() and imgui.render().
+
+        Args:
+            imgui: The imgui module (imgui_bundle.imgui)
+        """
+        imgui.begin("Frame profiler")
+        for line in self.report().splitlines():
+            imgui.text(line)
+        imgui.end()
+
+    # ----- Export -----
+    def export_chrome_trace(self, path: str) -> None:
+        """Writes the recorded spans as Chrome trace JSON (chrome://tracing or ui.perfetto.dev). GPU spans
+        are placed at the CPU time their commands were issued.
+        """
+        tracks = {"cpu": 0, "gpu": 1}
+        trace = [{"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": track.upper()}}
+                 for track, tid in tracks.items()]
+        for frame, track, name, start, duration in self.events:
+            trace.append({
+                "name": name, "cat": track, "ph": "X", "pid": 0, "tid": tracks[track],
+                "ts": start * 1e6, "dur": duration * 1e6, "args": {"frame": frame},
+            })
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def export_csv(self, path: str) -> None:
+        """Writes one row per recorded span: frame, track, stage, start_ms, duration_ms"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "track", "stage", "start_ms", "duration_ms"])
+            for frame, track, name, start, duration in self.events:
+                writer.writerow([frame, track, name, f"{start * 1e3:.4f}", f"{duration * 1e3:.4f}"])
+
+    def export(self, path: str) -> None:
+        """Exports to CSV when path ends in .csv, Chrome trace JSON otherwise"""
+        if str(path).lower().endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_chrome_trace(path)
+
+
+class _CpuStage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: FrameProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._record("cpu", self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class _GpuStage:
+    __slots__ = ("profiler", "name", "query", "start")
+
+    def __init__(self, profiler: FrameProfiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.query = self.profiler._acquire_query()
+        self.query.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.query.__exit__(*exc)
+        self.profiler._pending.append((self.profiler.frame, self.query, self.name, self.start))
+        return False
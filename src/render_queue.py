@@ -0,0 +1,105 @@
+from typing import NamedTuple, Optional
+from moderngl import Program, Texture, VertexArray
+
+
+class DrawItem(NamedTuple):
+    """One draw call. vao is either a moderngl VertexArray already bound to program (instanced batches)
+    or an mglw VAO that is bound on render. model is the raw f4 bytes of a per-draw model matrix, or
+    None when the matrices come from an instance buffer.
+    """
+    program: Program
+    texture: Texture
+    vao: object
+    uv_scale: float = 1.0
+    instances: int = 1
+    model: Optional[bytes] = None
+    label: str = "draw" # Stage name used by the profiler's GPU timings
+
+
+class RenderQueue:
+    def __init__(self, shader_program, texture_unit: int = 0, profiler=None):
+        """Collects the draw items of a frame and issues them sorted by program, then texture, then VAO,
+        so consecutive draws share as much GL state as possible. Uniform values are cached per program
+        and only written when they change; the camera matrices go through the shared uniform block of
+        ShaderProgram.
+
+        Args:
+            shader_program (ShaderProgram): Holds the programs and the camera uniform block
+            texture_unit (int, optional): The texture unit every draw samples from. Defaults to 0.
+            profiler (FrameProfiler, optional): Times every draw on the GPU while enabled. Defaults to None.
+        """
+        self.shader_program = shader_program
+        self.texture_unit = texture_unit
+        self.profiler = profiler
+        self.items = []
+        self._uniforms = {} # (id(program), name) -> last written value
+        self._camera_writes = 0
+        # Counters of the last flushed frame
+        self.stats = {"draws": 0, "program_changes": 0, "texture_changes": 0, "vao_changes": 0,
+                      "uniform_writes": 0}
+
+    def set_camera(self, view, proj) -> None:
+        """Uploads the camera matrices for every program. Call it only when they changed."""
+        self.shader_program.write_camera(view, proj)
+        self._camera_writes += 1
+
+    def submit(self, item: DrawItem) -> None:
+        self.items.append(item)
+
+    def _set_uniform(self, program: Program, name: str, value) -> int:
+        key = (id(program), name)
+        if name not in program or self._uniforms.get(key) == value:
+            return 0
+        if isinstance(value, bytes):
+            program[name].write(value)
+        else:
+            program[name].value = value
+        self._uniforms[key] = value
+        return 1
+
+    @staticmethod
+    def _draw(program: Program, vao, instances: int) -> None:
+        if isinstance(vao, VertexArray):
+            vao.render(instances=instances)
+        else:
+            vao.render(program, instances=instances)
+
+    def flush(self) -> dict:
+        """Draws and clears the queued items
+
+        Returns:
+            dict: State changes, uniform writes and draws of this frame (also kept in self.stats)
+        """
+        self.items.sort(key=lambda item: (id(item.program), id(item.texture), id(item.vao)))
+        stats = dict.fromkeys(self.stats, 0)
+        stats["uniform_writes"] = self._camera_writes
+        profiling = self.profiler is not None and self.profiler.enabled
+        program = texture = vao = None
+        for item in self.items:
+            if item.program is not program:
+                program = item.program
+                stats["program_changes"] += 1
+                stats["uniform_writes"] += self._set_uniform(program, "Texture", self.texture_unit)
+            if item.texture is not texture:
+                texture = item.texture
+                texture.use(location=self.texture_unit)
+                stats["texture_changes"] += 1
+            if item.vao is not vao:
+                vao = item.vao
+                stats["vao_changes"] += 1
+            stats["uniform_writes"] += self._set_uniform(program, "uv_scale", item.uv_scale)
+            if item.model is not None:
+                program["model"].write(item.model)
+                stats["uniform_writes"] += 1
+
+            if profiling:
+                with self.profiler.gpu_stage(item.label):
+                    self._draw(program, vao, item.instances)
+            else:
+                self._draw(program, vao, item.instances)
+            stats["draws"] += 1
+
+        self.items.clear()
+        self._camera_writes = 0
+        self.stats = stats
+        return stats
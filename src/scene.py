@@ -1,3 +1,4 @@
+import time
 import cv2
 import numpy as np
 import moderngl_window as mglw
@@ -7,8 +8,15 @@ from pathlib import Path
 from orbit_camera import OrbitCamera
 from shader_program import ShaderProgram
 from scene_object import SceneObject
-# from imgui_bundle import imgui
-# from moderngl_window.integrations.imgui_bundle import ModernglWindowRenderer
+from gesture_worker import GestureWorker, LandmarkReplayWorker
+from scheduler import InferenceScheduler
+from gesture_index import GestureIndex, DEFAULT_INDEX_PATH
+from gesture_service import GestureServiceClient, DEFAULT_ADDRESS
+from asset_cache import AssetCache
+from instanced_renderer import InstancedRenderer
+from frustum import Frustum
+from render_queue import RenderQueue
+from profiler import FrameProfiler
 
 
 # pip install moderngl moderngl-window pywavefront moderngl-window[imgui]
@@ -24,6 +32,8 @@ class Scene(WindowConfig):
     resizable = False
     vsync = True
     use_imgui = True
+    class_names = {}
+    gesture_timeout = 0.5 # seconds before the last gesture event is considered stale
 
     def __init__(self, **kwargs):
         """Initializes the program and its components. Args include the modernGL context, window size,
@@ -34,12 +44,13 @@ class Scene(WindowConfig):
         self.wnd.ctx.error
 
         self.shader_program = ShaderProgram(self.ctx)
-        assert Path(self.resource_dir, "shaders/vertex.glsl").exists(), "Vertex shader program not found"
+        assert Path(self.resource_dir, "shaders/vertex_instanced.glsl").exists(), "Vertex shader program not found"
         assert Path(self.resource_dir, "shaders/fragment.glsl").exists(), "Fragment shader program not found"
 
-        self.prog = self.shader_program.load_shader(
-            name = "crate",
-            vertex_path=self.resource_dir / 'shaders' / 'vertex.glsl',
+        # Every object is drawn instanced, model matrices come from a per-instance buffer
+        self.instanced_prog = self.shader_program.load_shader(
+            name = "instanced",
+            vertex_path=self.resource_dir / 'shaders' / 'vertex_instanced.glsl',
             fragment_path=self.resource_dir / 'shaders' / 'fragment.glsl'
         )
 
@@ -49,23 +60,131 @@ class Scene(WindowConfig):
         assert Path(self.resource_dir, "models/bunny.obj").exists(), "Bunny obj file not found"
         assert Path(self.resource_dir, "textures/bunny.jpg").exists(), "Bunny texture not found"
 
-        # Load the crate
-        crate_mesh = self.load_scene("models/bunny.obj").root_nodes[0].mesh.vao
-        crate_tex = self.load_texture_2d("textures/bunny.jpg")
-        self.object = SceneObject(crate_mesh, crate_tex, editable=True)
+        # Meshes and textures go through a binary cache so warm launches skip OBJ and JPEG parsing
+        self.assets = AssetCache(self.ctx, self.resource_dir)
+
+        # Load the crate, with its simplified levels of detail (built once and cached next to the mesh)
+        crate_lods = self.assets.load_mesh_lods("models/bunny.obj")
+        crate_tex = self.assets.load_texture("textures/bunny.jpg")
+        self.object = SceneObject(None, crate_tex, editable=True, lod=crate_lods)
 
         # Load the floor
-        floor_mesh = self.load_scene("models/floor.obj").root_nodes[0].mesh.vao
-        floor_tex = self.load_texture_2d("textures/tile_floor.jpg")
+        floor_mesh = self.assets.load_mesh("models/floor.obj")
+        floor_tex = self.assets.load_texture("textures/tile_floor.jpg")
         self.floor = SceneObject(floor_mesh, floor_tex)
         self.floor.position = list([0, -0.01, 0])
 
+        # Objects sharing a mesh and texture are drawn together with one instanced draw call. Objects with
+        # levels of detail are culled against the view frustum and drawn at a level matching their screen size
+        self.renderer = InstancedRenderer(self.ctx, self.instanced_prog)
+        self.renderer.add(self.object)
+        self.renderer.add(self.floor, uv_scale=1)
+        # Opt-in instrumentation (--profile). While it is off every timer is a shared no-op
+        self.profiler = FrameProfiler(self.ctx, enabled=self.argv is not None and self.argv.profile)
+        self.imgui = None
+        if self.profiler.enabled:
+            self.init_overlay()
+
+        # Draws are sorted by program, texture and VAO before they are issued
+        self.render_queue = RenderQueue(self.shader_program, profiler=self.profiler)
+
         # Setup orbit camera params
         self.cam = OrbitCamera(radius=2)
         self.cam_speed = 2.5 # Camera speed when moving
-
-        # OpenCV webcam
-        self.cap = cv2.VideoCapture(1)
+        self.proj = None
+        self.proj_aspect = None
+        self.uploaded_camera = None # (camera version, aspect) last written to the uniforms
+
+        # Gesture recognition runs on a background worker that owns the OpenCV webcam, replays a
+        # recorded landmark log without touching the camera or MediaPipe, or subscribes to a running
+        # recognition service (src/gesture_service.py) that shares its camera and model
+        argv = self.argv
+        if argv is not None and argv.service:
+            self.gesture_worker = GestureServiceClient(argv.service, name="scene").start()
+            self.class_names = self.gesture_worker.class_names
+        elif argv is not None and argv.replay_landmarks:
+            classifier = self.load_classifier()
+            self.gesture_worker = LandmarkReplayWorker(
+                argv.replay_landmarks,
+                classifier=classifier,
+                class_names=self.class_names,
+                speed=argv.replay_speed
+            ).start()
+        else:
+            classifier = self.load_classifier()
+            scheduler = None
+            if argv is not None and (argv.adaptive or argv.target_fps or argv.cpu_budget):
+                scheduler = InferenceScheduler(target_fps=argv.target_fps, cpu_budget=argv.cpu_budget)
+            self.gesture_worker = GestureWorker(
+                camera=argv.source if argv is not None else 1,
+                classifier=classifier,
+                class_names=self.class_names,
+                record_path=argv.record_landmarks if argv is not None else None,
+                roi=argv is not None and argv.roi,
+                scheduler=scheduler
+            ).start()
+        self.last_gesture = None
+        self.profiler.attach({f"worker {name}": timer for name, timer in self.gesture_worker.stats.stages.items()})
+
+    @classmethod
+    def add_arguments(cls, parser) -> None:
+        parser.add_argument("--source", default="1",
+                            help="Camera index, or a video file / image directory to replay instead of the webcam")
+        parser.add_argument("--roi", action="store_true",
+                            help="Detect hands in a crop around their last position instead of the full frame")
+        parser.add_argument("--knn", nargs="?", const=DEFAULT_INDEX_PATH, default=None, metavar="INDEX",
+                            help="Classify with the few-shot k-NN gesture index (scripts/gesture_index.py)")
+        parser.add_argument("--adaptive", action="store_true",
+                            help="Skip hand detection on still frames and extrapolate the landmarks instead")
+        parser.add_argument("--target-fps", type=float, default=None,
+                            help="Run hand detection at most this often per second (implies --adaptive)")
+        parser.add_argument("--cpu-budget", type=float, default=None,
+                            help="Fraction of one core hand detection may use, e.g. 0.5 (implies --adaptive)")
+        parser.add_argument("--record-landmarks", default=None, metavar="LOG",
+                            help="Append the recognized landmarks of every frame to a landmark log")
+        parser.add_argument("--replay-landmarks", default=None, metavar="LOG",
+                            help="Drive the scene from a recorded landmark log instead of the webcam")
+        parser.add_argument("--replay-speed", type=float, default=1.0, help="Speed of --replay-landmarks")
+        parser.add_argument("--service", nargs="?", const=DEFAULT_ADDRESS, default=None, metavar="ADDRESS",
+                            help="Take gestures and frames from a running recognition service (src/gesture_service.py)")
+        parser.add_argument("--profile", action="store_true",
+                            help="Time every frame stage on the CPU and every draw on the GPU")
+        parser.add_argument("--trace-out", default=None,
+                            help="With --profile, write the recorded spans on exit (.csv, otherwise Chrome trace JSON)")
+
+    def init_overlay(self) -> None:
+        """Sets up the imgui overlay showing the profiler's rolling percentiles. Without imgui_bundle the
+        report is printed to the console instead.
+        """
+        try:
+            from imgui_bundle import imgui
+            from moderngl_window.integrations.imgui_bundle import ModernglWindowRenderer
+        except ImportError:
+            print("imgui_bundle is not installed, the profiler report is printed every 300 frames instead")
+            return
+        imgui.create_context()
+        self.imgui_module = imgui
+        self.imgui = ModernglWindowRenderer(self.wnd)
+
+    def load_classifier(self):
+        """Loads the few-shot gesture index with --knn, else the fastest exported gesture classifier (see
+        scripts/export.py), falling back to the trained eager weights
+
+        Returns:
+            callable | None: A predictor mapping featurized landmarks to logits, or None to only track landmarks
+        """
+        if self.argv is not None and self.argv.knn:
+            index = GestureIndex.load(self.argv.knn)
+            self.class_names = index.class_names
+            return index
+
+        from deploy import load_gesture_predictor, load_eager_predictor
+        predictor = load_gesture_predictor() or load_eager_predictor("gesture_classifier_weights.pth")
+        if predictor is None:
+            print("gesture_classifier_weights.pth not found, gestures will not be classified")
+            return None
+        self.class_names = predictor.class_names
+        return predictor
 
     def on_render(self, time:float , frame_time: float) -> None:
         """The rendering pipeline for this program.
@@ -74,57 +193,102 @@ class Scene(WindowConfig):
             time (float): The time of the start of the rendering.
             frame_time (float): The time since the last frame
         """
-        # Read a frame from webcam
-        ret, frame = self.cap.read()
-        if ret:
-            frame = cv2.flip(frame, 1)
-            cv2.imshow("Webcam", frame)
-            ##### TODO: send frame to the model to parse for commands.
+        profiler = self.profiler
+        profiler.begin_frame()
+
+        # Show the latest annotated webcam frame. The worker only publishes at camera rate, so the
+        # renderer never waits on the webcam
+        with profiler.stage("preview"):
+            frame = self.gesture_worker.preview.poll() if self.gesture_worker.preview is not None else None
+            if frame is not None:
+                cv2.imshow("Webcam", frame)
 
-            if cv2.waitKey(1) & 0xFF == 27: # ESC key
-                self.wnd.close()
+                if cv2.waitKey(1) & 0xFF == 27: # ESC key
+                    self.wnd.close()
 
         # Camera event listener.
         # WASD will move camera orbit camera Up/Down/Left/Right
         # Q/E will zoom in/out
         # Up/Down/Left/Right arrows will pan the camera to a new position as well as orbit new point.
         # Panning is relative to the camera axis projected onto world X-Z for natural
-        self.handle_movement(frame_time)
+        with profiler.stage("movement"):
+            self.handle_movement(frame_time)
 
         # Object event listener.
         # O/K/L/; will translate the object along the X- or Z- axis (absolute, world scales)
         # RT/FG/VB will rotate the model about the X, Y, Z axes, respectively
         # YU/HJ/NM will scale the model in the X, Y, Z axes, respectively
-        self.handle_object(self.object, frame_time) # Keyboard inputs
+        with profiler.stage("object"):
+            self.handle_object(self.object, frame_time) # Keyboard inputs
 
         ##### Model command inputs go here
         # Send commands from gesture to the object... The declaration can change
-        self.handle_gesture(self.object, frame_time)
+        with profiler.stage("gesture"):
+            self.handle_gesture(self.object, frame_time)
 
 
         #####
 
+        with profiler.stage("draw"):
+            self.draw_scene()
+
+        if profiler.enabled:
+            with profiler.stage("overlay"):
+                self.draw_overlay()
+        profiler.end_frame()
+
+    def draw_scene(self) -> None:
+        """Uploads the camera and issues the frame's draw calls"""
         # This sets the background color and enables a depth test to improve rendering
         self.ctx.clear(0.1, 0.1, 0.1)
         self.ctx.enable(self.ctx.DEPTH_TEST)
 
-        # Builds the view and projection matrices. Model will be created at each mesh's render
-        view = self.cam.get_view_matrix()
-        proj = Matrix44.perspective_projection(
-            fovy=45.0,
-            aspect=self.wnd.aspect_ratio,
-            near=0.1,
-            far=100.0,
-            dtype='f4'
-        )
-
-        # Establish the uniforms for the view and projection matrices
-        self.prog['view'].write(view.astype('f4').tobytes())
-        self.prog['proj'].write(proj.astype('f4').tobytes())
-
-        # Renders each mesh individually. Internally, it will determine its texture and create a model matrix
-        self.object.render(self.prog, texture_unit=0)
-        self.floor.render(self.prog, texture_unit=1, uv_scale=1)
+        # The view and projection matrices live in one uniform block shared by every program. Both are
+        # cached, and the block keeps its contents, so it is only rewritten when the camera or window changes
+        camera_state = (self.cam.version, self.wnd.aspect_ratio)
+        if camera_state != self.uploaded_camera:
+            view, proj = self.cam.get_view_matrix(), self.get_projection_matrix()
+            self.render_queue.set_camera(view, proj)
+            self.renderer.set_frustum(Frustum(view, proj, self.wnd.buffer_size[1]))
+            self.uploaded_camera = camera_state
+
+        # Queues one draw call per mesh/texture batch. Only model matrices of objects that moved are uploaded
+        self.renderer.submit(self.render_queue)
+        self.render_queue.flush()
+
+    def draw_overlay(self) -> None:
+        """Draws the profiler overlay, or prints the report periodically when imgui is unavailable"""
+        if self.imgui is None:
+            if self.profiler.frame and self.profiler.frame % 300 == 0:
+                print(self.profiler.report())
+            return
+        imgui = self.imgui_module
+        imgui.new_frame()
+        self.profiler.draw_overlay(imgui)
+        imgui.render()
+        self.imgui.render(imgui.get_draw_data())
+
+    def on_resize(self, width: int, height: int) -> None:
+        if self.imgui is not None:
+            self.imgui.resize(width, height)
+
+    def get_projection_matrix(self) -> Matrix44:
+        """Returns the perspective projection, rebuilt only when the window aspect ratio changes
+
+        Returns:
+            Matrix44: A 4x4 projection matrix
+        """
+        aspect = self.wnd.aspect_ratio
+        if self.proj is None or aspect != self.proj_aspect:
+            self.proj = Matrix44.perspective_projection(
+                fovy=45.0,
+                aspect=aspect,
+                near=0.1,
+                far=100.0,
+                dtype='f4'
+            )
+            self.proj_aspect = aspect
+        return self.proj
 
     def handle_object(self, object: SceneObject, dt:float) -> None:
         """Key listener to adjust scene object parameters. Currently only supports adjusting one object
@@ -214,16 +378,34 @@ class Scene(WindowConfig):
             self.cam.zoom(zoom_speed)
 
     def handle_gesture(self, object, frame_time):
-        # Would look something like the key event handler above
-        pass
+        """Consumes the newest gesture event from the recognition worker without blocking. Frames
+        with no new event keep acting on the last one until it is older than gesture_timeout.
+
+        Args:
+            object (SceneObject): The object to manipulate
+            frame_time (float): The delta time from the last frame.
+        """
+        event = self.gesture_worker.events.poll()
+        if event is not None:
+            self.last_gesture = event
+        if self.last_gesture is None or time.perf_counter() - self.last_gesture.timestamp > self.gesture_timeout:
+            return
+        # Would look something like the key event handler above, driven by self.last_gesture.gestures
 
     def destroy(self):
         """Cleans up memory upon shutdown
         """
         # Clean up OpenCV when window closes
-        self.cap.release()
+        self.gesture_worker.stop()
         cv2.destroyAllWindows()
 
+        if self.profiler.enabled:
+            self.profiler.set_enabled(False) # reads the outstanding GPU queries
+            print(self.profiler.report())
+            if self.argv.trace_out:
+                self.profiler.export(self.argv.trace_out)
+                print(f"Wrote frame trace to {self.argv.trace_out}")
+
 
 if __name__ == "__main__":
     mglw.run_window_config(Scene)
@@ -1,31 +1,147 @@
+import numpy as np
 from pyrr import Matrix44, Vector3
 from moderngl import Context, Program, Texture
 from math import radians
+from render_queue import DrawItem
+
+
+def _axis_rotations(angles: np.ndarray, axis: int) -> np.ndarray:
+    """(N,) angles in radians to (N, 3, 3) rotations laid out like pyrr's Matrix44.from_*_rotation"""
+    c, s = np.cos(angles), np.sin(angles)
+    out = np.zeros((len(angles), 3, 3))
+    i, j = [(1, 2), (0, 2), (0, 1)][axis]
+    out[:, axis, axis] = 1.0
+    out[:, i, i] = c
+    out[:, j, j] = c
+    # pyrr puts -sin above the diagonal for X and Z, but below it for Y
+    sign = -1.0 if axis == 1 else 1.0
+    out[:, i, j] = -sign * s
+    out[:, j, i] = sign * s
+    return out
+
+
+def compute_model_matrices(positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray,
+                           out: np.ndarray = None) -> np.ndarray:
+    """Vectorized SceneObject.get_model_matrix for many objects at once.
+
+    Args:
+        positions (np.ndarray): (N, 3) translations
+        rotations (np.ndarray): (N, 3) Euler angles in degrees about X, Y, Z
+        scales (np.ndarray): (N, 3) scale factors
+        out (np.ndarray, optional): (N, 4, 4) array to write into. Defaults to a new float32 array.
+
+    Returns:
+        np.ndarray: (N, 4, 4) model matrices, element for element equal to get_model_matrix
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    angles = np.radians(np.asarray(rotations, dtype=np.float64).reshape(-1, 3))
+    scales = np.asarray(scales, dtype=np.float64).reshape(-1, 3)
+    if out is None:
+        out = np.empty((len(positions), 4, 4), dtype='f4')
+
+    # Same order as get_model_matrix: T @ Rz @ Ry @ Rx @ S
+    linear = _axis_rotations(angles[:, 2], 2) @ _axis_rotations(angles[:, 1], 1) @ _axis_rotations(angles[:, 0], 0)
+    linear *= scales[:, None, :]
+    out[:, :3, :3] = linear
+    out[:, :3, 3] = 0.0
+    out[:, 3, :3] = np.einsum('ni,nij->nj', positions, linear)
+    out[:, 3, 3] = 1.0
+    return out
+
+
+class TransformVector(list):
+    """A list of three floats that tells its SceneObject whenever an element is assigned, so
+    `obj.position[2] -= speed` invalidates the cached model matrix
+    """
+    __slots__ = ("_owner",)
+
+    def __init__(self, values, owner):
+        super().__init__(float(v) for v in values)
+        self._owner = owner
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._owner.mark_dirty()
+
 
 class SceneObject:
-    def __init__(self, vao, texture: Texture, editable=False):
+    def __init__(self, vao, texture: Texture, editable=False, lod=None):
         """Initializes an object to be rendered via it's mesh VAO. The position, scale, and rotation are
         automatically set to pos=[0,0,0], scale=[1,1,1], and rotation=[0,0,0]
 
         Args:
-            vao (Mesh VAO): From the mglw scene loader, the mesh.vao object
+            vao (Mesh VAO): From the mglw scene loader, the mesh.vao object. None when lod is given.
             texture (Texture): The texture associated with the object
             editable (bool, optional): If the object will be modifiable by the user. Defaults to False.
+            lod (MeshLOD, optional): Simplified levels and bounding sphere of the mesh (see
+                AssetCache.load_mesh_lods). Objects with one are frustum culled and drawn at the level their
+                screen size needs. Defaults to None (always drawn at full detail).
         """
 
-        self.vao = vao
+        self.lod = lod
+        self.vao = lod.levels[0] if lod is not None else vao
         self.texture = texture
+        self.version = 0 # Bumped on every transform change
+        self._listeners = []
+        self._model_matrix = None
+        self._bounds = None
         self.position = [0.0, 0.0, 0.0] 
         self.scale = [1.0, 1.0, 1.0]
         self.rotation = [0.0, 0.0, 0.0]
         self.editable = editable 
 
+    @property
+    def position(self) -> TransformVector:
+        return self._position
+
+    @position.setter
+    def position(self, value) -> None:
+        self._position = TransformVector(value, self)
+        self.mark_dirty()
+
+    @property
+    def rotation(self) -> TransformVector:
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value) -> None:
+        self._rotation = TransformVector(value, self)
+        self.mark_dirty()
+
+    @property
+    def scale(self) -> TransformVector:
+        return self._scale
+
+    @scale.setter
+    def scale(self, value) -> None:
+        self._scale = TransformVector(value, self)
+        self.mark_dirty()
+
+    def mark_dirty(self) -> None:
+        """Invalidates the cached model matrix and notifies listeners (e.g. an instance batch)"""
+        self._model_matrix = None
+        self._bounds = None
+        self.version += 1
+        for listener in self._listeners:
+            listener(self)
+
+    def add_listener(self, listener) -> None:
+        """Registers listener(obj), called every time the transform changes"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        self._listeners.remove(listener)
+
     def get_model_matrix(self) -> Matrix44:
-        """Calculates and returns the 4x4 model matrix by computing M = T * R * S
+        """Calculates and returns the 4x4 model matrix by computing M = T * R * S. The matrix is cached
+        until the position, rotation or scale changes.
 
         Returns:
             Matrix44: The model matrix
         """
+        if self._model_matrix is not None:
+            return self._model_matrix
+
         Txyz = Matrix44.from_translation(self.position)
         Rx = Matrix44.from_x_rotation(radians(self.rotation[0]))
         Ry = Matrix44.from_y_rotation(radians(self.rotation[1]))
@@ -33,7 +149,59 @@ class SceneObject:
         Sxyz = Matrix44.from_scale(self.scale)
 
         # Matrix multiplication L <- R
-        return Txyz @ Rz @ Ry @ Rx @ Sxyz
+        self._model_matrix = Txyz @ Rz @ Ry @ Rx @ Sxyz
+        return self._model_matrix
+
+    def get_bounds(self):
+        """World-space bounding sphere, cached like the model matrix
+
+        Returns:
+            (center (3,) np.ndarray, radius float), or None without a MeshLOD
+        """
+        if self.lod is None:
+            return None
+        if self._bounds is None:
+            model = np.asarray(self.get_model_matrix(), dtype=np.float64)
+            center = self.lod.center @ model[:3, :3] + model[3, :3]
+            # The largest singular value (the largest axis scale) bounds how far the sphere can stretch
+            self._bounds = (center, self.lod.radius * float(np.linalg.norm(model[:3, :3], ord=2)))
+        return self._bounds
+
+    def select_level(self, frustum, tolerance: float = 1.5):
+        """Level of detail to draw with, or None when the object is outside the frustum
+
+        Args:
+            frustum (Frustum): The camera's view volume (see src/frustum.py)
+            tolerance (float, optional): Largest simplification error in pixels. Defaults to 1.5.
+        """
+        if self.lod is None:
+            return 0
+        center, radius = self.get_bounds()
+        centers, radii = center[None], np.array([radius])
+        if not frustum.intersects(centers, radii)[0]:
+            return None
+        return int(self.lod.select(frustum.projected_sizes(centers, radii), tolerance)[0])
+
+    def draw_item(self, prog: Program, uv_scale=1.0, frustum=None):
+        """Describes this object as a draw call for a RenderQueue
+
+        Args:
+            prog (Program): The (non-instanced) shader program to use
+            uv_scale (float, optional): The uv scale to use. Defaults to 1.0.
+            frustum (Frustum, optional): Cull the object and pick its level of detail against this view.
+                Defaults to None (full detail).
+
+        Returns:
+            DrawItem | None: The queued draw, carrying this object's model matrix, or None when it is culled
+        """
+        vao = self.vao
+        if frustum is not None and self.lod is not None:
+            level = self.select_level(frustum)
+            if level is None:
+                return None
+            vao = self.lod.levels[level]
+        return DrawItem(prog, self.texture, vao, uv_scale, model=self.get_model_matrix().astype('f4').tobytes(),
+                        label=getattr(vao, "name", "draw"))
 
     def render(self, prog:Program, texture_unit=0, uv_scale=1.0):
         """Renders the object onto the scene.
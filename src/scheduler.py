@@ -0,0 +1,128 @@
+import time
+import cv2
+import numpy as np
+
+
+class InferenceScheduler:
+    def __init__(self, target_fps: float = None, cpu_budget: float = None, motion_threshold: float = 3.0,
+                 speed_threshold: float = 0.15, idle_fps: float = 4.0, max_extrapolation: float = 0.15,
+                 thumbnail_size: tuple = (32, 24)):
+        """Decides per frame whether landmark detection has to run. Frames are skipped while the image
+        and the tracked hands are still, and whenever running detection would exceed the budget. Skipped
+        frames get landmarks extrapolated from the last two detections.
+
+        The budget is the stricter of target_fps (detections per second) and cpu_budget (fraction of
+        one core spent in detection, using a moving average of the measured detection cost).
+
+        Args:
+            target_fps (float, optional): Maximum detections per second. Defaults to None (unlimited).
+            cpu_budget (float, optional): Maximum share of one core for detection, e.g. 0.5. Defaults to None.
+            motion_threshold (float, optional): Mean absolute difference (0-255) of a gray thumbnail since the
+                last detection above which the frame counts as moving. Defaults to 3.0.
+            speed_threshold (float, optional): Landmark speed (normalized image units per second) above
+                which the hands count as moving. Defaults to 0.15.
+            idle_fps (float, optional): Detection rate while nothing moves, so appearing or resting hands
+                are still picked up. Defaults to 4.0.
+            max_extrapolation (float, optional): Seconds landmarks are extrapolated past the last detection
+                before they are held still. Defaults to 0.15.
+            thumbnail_size (tuple, optional): (width, height) of the motion thumbnail. Defaults to (32, 24).
+        """
+        self.target_fps = target_fps
+        self.cpu_budget = cpu_budget
+        self.motion_threshold = motion_threshold
+        self.speed_threshold = speed_threshold
+        self.idle_fps = idle_fps
+        self.max_extrapolation = max_extrapolation
+        self.thumbnail_size = thumbnail_size
+
+        self.cost = None          # moving average of the detection time in seconds
+        self.motion = 0.0         # motion signal of the last frame
+        self._thumbnail = None    # gray thumbnail of the last detected frame
+        self._pending_thumbnail = None
+        self._history = []        # up to two (timestamp, landmarks (H, 21, 3), handedness) detections
+        self.detections = 0
+        self.skips = 0
+
+    def min_interval(self) -> float:
+        """Shortest time between two detections the budget allows"""
+        interval = 0.0
+        if self.target_fps:
+            interval = 1.0 / self.target_fps
+        if self.cpu_budget and self.cost is not None:
+            interval = max(interval, self.cost / self.cpu_budget)
+        return interval
+
+    def hand_speed(self) -> float:
+        """Fastest landmark speed between the last two detections, in normalized units per second"""
+        if len(self._history) < 2:
+            return 0.0
+        (t0, previous, hands0), (t1, latest, hands1) = self._history
+        if len(previous) != len(latest) or len(latest) == 0 or hands0 != hands1 or t1 <= t0:
+            return 0.0
+        return float(np.abs(latest[:, :, :2] - previous[:, :, :2]).max() / (t1 - t0))
+
+    def should_detect(self, frame: np.ndarray, timestamp: float = None) -> bool:
+        """Whether the frame needs a landmark detection. Call update() after running it.
+
+        Args:
+            frame (np.ndarray): BGR frame
+            timestamp (float, optional): Capture time in seconds. Defaults to time.perf_counter().
+        """
+        now = time.perf_counter() if timestamp is None else timestamp
+        since = now - self._history[-1][0] if self._history else None
+        # 1 ms of slack, so a 15 fps budget on a 30 fps camera is not rounded down to every third frame
+        if since is not None and since < self.min_interval() - 1e-3:
+            return self._decide(False)
+
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        self._pending_thumbnail = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+        if since is None or self._thumbnail is None:
+            return self._decide(True)
+        self.motion = float(np.abs(self._pending_thumbnail - self._thumbnail).mean())
+        moving = self.motion >= self.motion_threshold or self.hand_speed() >= self.speed_threshold
+        return self._decide(moving or since >= 1.0 / self.idle_fps)
+
+    def _decide(self, detect: bool) -> bool:
+        if detect:
+            self.detections += 1
+        else:
+            self.skips += 1
+        return detect
+
+    def update(self, timestamp: float, landmarks: np.ndarray, handedness: list = None, cost: float = None) -> None:
+        """Records a detection.
+
+        Args:
+            timestamp (float): Capture time of the detected frame
+            landmarks (np.ndarray): (H, 21, 3) detected landmarks
+            handedness (list, optional): "Left"/"Right" per hand. Defaults to None.
+            cost (float, optional): Seconds the detection took, feeds the CPU budget. Defaults to None.
+        """
+        self._thumbnail = self._pending_thumbnail
+        self._history = (self._history + [(timestamp, np.array(landmarks, dtype=np.float32), list(handedness or []))])[-2:]
+        if cost is not None:
+            self.cost = cost if self.cost is None else 0.8 * self.cost + 0.2 * cost
+
+    def estimate(self, timestamp: float):
+        """Landmarks for a skipped frame: interpolated between the last two detections, or extrapolated
+        (for at most max_extrapolation seconds) past the latest one.
+
+        Returns:
+            (landmarks (H, 21, 3) float32, handedness list)
+        """
+        if not self._history:
+            return np.zeros((0, 21, 3), dtype=np.float32), []
+        t1, latest, handedness = self._history[-1]
+        if len(self._history) < 2:
+            return latest.copy(), handedness
+        t0, previous, previous_handedness = self._history[0]
+        if len(previous) != len(latest) or previous_handedness != handedness or t1 <= t0:
+            return latest.copy(), handedness
+        # Interpolation weight is in [0, 1] between the detections and > 1 past the latest one
+        weight = max(min(timestamp, t1 + self.max_extrapolation) - t0, 0.0) / (t1 - t0)
+        return (previous + weight * (latest - previous)).astype(np.float32), handedness
+
+    def detect_ratio(self) -> float:
+        """Fraction of frames that ran detection"""
+        total = self.detections + self.skips
+        return self.detections / total if total else 1.0
@@ -1,6 +1,11 @@
 from moderngl import Context, Program
 from typing import Optional
 
+# Uniform block holding the per-frame camera matrices (see the vertex shaders)
+CAMERA_BLOCK = "Camera"
+CAMERA_BINDING = 0
+CAMERA_BLOCK_BYTES = 2 * 64 # view and proj, two std140 mat4
+
 class ShaderProgram:
     def __init__(self, ctx: Context):
         """Initializes the shader program to hold one or more programs
@@ -10,6 +15,8 @@ class ShaderProgram:
         """
         self.ctx = ctx
         self.programs = {}
+        # One buffer backs the Camera block of every program, so the matrices are uploaded once per frame
+        self.camera_buffer = ctx.buffer(reserve=CAMERA_BLOCK_BYTES, dynamic=True)
 
     def load_shader(self, name:str , vertex_path:str , fragment_path: str) -> Program:
         """Loads and compiles a shader program from files, saves it by name
@@ -33,9 +40,21 @@ class ShaderProgram:
             vertex_shader=vertex_src,
             fragment_shader=fragment_src,
         )
+        if CAMERA_BLOCK in program:
+            program[CAMERA_BLOCK].binding = CAMERA_BINDING
         self.programs[name] = program
         return program
 
+    def write_camera(self, view, proj) -> None:
+        """Uploads the view and projection matrices into the Camera uniform block shared by all programs
+
+        Args:
+            view (Matrix44): The 4x4 view matrix
+            proj (Matrix44): The 4x4 projection matrix
+        """
+        self.camera_buffer.write(view.astype('f4').tobytes() + proj.astype('f4').tobytes())
+        self.camera_buffer.bind_to_uniform_block(CAMERA_BINDING)
+
     def get(self, name) -> Optional[Program]:
         """Returns the program from memory if it's found. Otherwise None
 
@@ -0,0 +1,157 @@
+import numpy as np
+
+
+class LandmarkRingBuffer:
+    def __init__(self, capacity: int, dim: int = 63):
+        """A fixed-size, preallocated ring buffer of the most recent vectors. Pushing is O(1) and never
+        allocates. Slots that were never written read as zeros.
+
+        Args:
+            capacity (int): Number of vectors kept
+            dim (int, optional): Length of each vector. Defaults to 63 (21 landmarks * 3 coordinates).
+        """
+        self.capacity = capacity
+        self.data = np.zeros((capacity, dim), dtype=np.float32)
+        self.head = -1  # index of the newest vector
+        self.count = 0
+
+    def push(self, vector: np.ndarray) -> None:
+        self.head = (self.head + 1) % self.capacity
+        self.data[self.head] = vector
+        self.count += 1
+
+    def taps(self, offsets: np.ndarray) -> np.ndarray:
+        """Gathers the vectors pushed `offsets` steps ago (0 is the newest)
+
+        Args:
+            offsets (np.ndarray): Integer offsets, each smaller than capacity
+
+        Returns:
+            np.ndarray: (len(offsets), dim) array
+        """
+        return self.data[(self.head - offsets) % self.capacity]
+
+    def window(self) -> np.ndarray:
+        """Returns a copy of the buffer ordered oldest to newest"""
+        return np.roll(self.data, -(self.head + 1), axis=0)
+
+    def reset(self) -> None:
+        self.data.fill(0.0)
+        self.head = -1
+        self.count = 0
+
+
+class StreamingTemporalModel:
+    def __init__(self, layers: list, head_weight: np.ndarray, head_bias: np.ndarray):
+        """Frame-by-frame evaluation of a TemporalGestureClassifier for one tracked hand. Every layer keeps
+        a ring buffer of its recent inputs, so a new frame costs one kernel application per layer no matter
+        how long the hand has been tracked, instead of re-running the whole window.
+
+        Args:
+            layers (list): (weight (C_out, C_in, K), bias (C_out,), dilation) per causal conv layer
+            head_weight (np.ndarray): (num_classes, C) classifier weight
+            head_bias (np.ndarray): (num_classes,) classifier bias
+        """
+        self.layers = []
+        for weight, bias, dilation in layers:
+            out_channels, in_channels, kernel_size = weight.shape
+            # Tap j of the kernel reads the input from (K - 1 - j) * dilation frames ago
+            offsets = (kernel_size - 1 - np.arange(kernel_size)) * dilation
+            # (K * C_in, C_out) so one layer step is a single matmul over the gathered taps
+            flat_weight = np.ascontiguousarray(weight.transpose(2, 1, 0).reshape(kernel_size * in_channels, out_channels))
+            buffer = LandmarkRingBuffer(int(offsets.max()) + 1, in_channels)
+            self.layers.append((flat_weight, bias.astype(np.float32), offsets, buffer))
+        self.head_weight = np.ascontiguousarray(head_weight.T.astype(np.float32))
+        self.head_bias = head_bias.astype(np.float32)
+
+    @staticmethod
+    def weights_from_module(model) -> tuple:
+        """Extracts the constructor arguments from a trained TemporalGestureClassifier"""
+        layers = [(conv.weight.detach().cpu().numpy().astype(np.float32), conv.bias.detach().cpu().numpy(), dilation)
+                  for conv, dilation in zip(model.convs, model.dilations)]
+        return layers, model.head.weight.detach().cpu().numpy(), model.head.bias.detach().cpu().numpy()
+
+    @classmethod
+    def from_module(cls, model) -> "StreamingTemporalModel":
+        """Copies the weights of a trained TemporalGestureClassifier"""
+        return cls(*cls.weights_from_module(model))
+
+    def step(self, landmarks: np.ndarray) -> np.ndarray:
+        """Feeds one 63-d landmark vector and returns the logits for it
+
+        Args:
+            landmarks (np.ndarray): The newest landmark vector
+
+        Returns:
+            np.ndarray: (num_classes,) logits
+        """
+        h = np.asarray(landmarks, dtype=np.float32).reshape(-1)
+        for flat_weight, bias, offsets, buffer in self.layers:
+            buffer.push(h)
+            h = np.maximum(buffer.taps(offsets).reshape(-1) @ flat_weight + bias, 0.0)
+        return h @ self.head_weight + self.head_bias
+
+    def reset(self) -> None:
+        for _, _, _, buffer in self.layers:
+            buffer.reset()
+
+
+def unique_hand_ids(hand_ids: list) -> list:
+    """Suffixes repeated ids with their occurrence, so every hand of a frame keeps its own history"""
+    seen = {}
+    unique = []
+    for hand_id in hand_ids:
+        count = seen.get(hand_id, 0)
+        seen[hand_id] = count + 1
+        unique.append(hand_id if count == 0 else f"{hand_id}#{count}")
+    return unique
+
+
+class StreamingGestureRecognizer:
+    def __init__(self, model, class_names: dict, min_frames: int = None):
+        """Keeps one StreamingTemporalModel per tracked hand (e.g. keyed by handedness) and resets a
+        hand's state once it leaves the frame.
+
+        Args:
+            model (TemporalGestureClassifier): The trained temporal model
+            class_names (dict): Mapping of class index to gesture name
+            min_frames (int, optional): Frames a hand must be tracked before a label is reported. Defaults to
+                the model's receptive field: before that the layer buffers still hold zeros instead of
+                activations of real frames, and the logits differ from the model run over the same frames.
+        """
+        self.weights = StreamingTemporalModel.weights_from_module(model)
+        self.class_names = class_names
+        self.min_frames = min_frames if min_frames is not None else model.receptive_field
+        self.hands = {}
+        self.frames_seen = {}
+
+    def update(self, hand_ids: list, landmarks: np.ndarray) -> list:
+        """Advances every tracked hand by one frame
+
+        Args:
+            hand_ids (list): A stable id per detected hand, e.g. "Left"/"Right". Repeated ids (MediaPipe
+                often labels two hands alike) are told apart by their order, "Left", "Left#1", ...
+            landmarks (np.ndarray): (H, 63) or (H, 21, 3) landmarks in the same order
+
+        Returns:
+            list: Gesture name per hand, or None while a hand is still warming up
+        """
+        hand_ids = unique_hand_ids(hand_ids)
+        # Hands that disappeared start from a clean history when they return
+        for hand_id in list(self.hands):
+            if hand_id not in hand_ids:
+                del self.hands[hand_id]
+                del self.frames_seen[hand_id]
+
+        gestures = []
+        for hand_id, hand_landmarks in zip(hand_ids, landmarks):
+            if hand_id not in self.hands:
+                self.hands[hand_id] = StreamingTemporalModel(*self.weights)
+                self.frames_seen[hand_id] = 0
+            logits = self.hands[hand_id].step(hand_landmarks)
+            self.frames_seen[hand_id] += 1
+            if self.frames_seen[hand_id] < self.min_frames:
+                gestures.append(None)
+            else:
+                gestures.append(self.class_names.get(int(np.argmax(logits)), "Unknown"))
+        return gestures
@@ -1,47 +1,201 @@
-import cv2
 import os
+import time
+import queue
+import argparse
+import threading
+import cv2
+import numpy as np
+from dataset import LANDMARK_DIM, IMAGE_LANDMARKS_SUFFIX
+from features import landmarks_to_array
+from frame_source import open_frame_source
+
+
+class SampleWriter:
+    def __init__(self, output_folder: str, prefix: str, save_images: bool = True, queue_size: int = 256,
+                 flush_every: int = 500):
+        """Writes captured samples on a background thread, so JPEG encoding and disk I/O never stall the
+        capture loop. The queue is bounded: when the disk cannot keep up, new samples are dropped (and
+        counted) instead of growing memory or blocking the camera.
+
+        Without images, the landmarks of the session are written to <output_folder>/<prefix>.npy, which
+        src/dataset.py loads next to the images. With images, the tracked landmarks are still kept, one
+        row per image (zeros without a hand) in <output_folder>/<prefix>.images.npy, which is not loaded
+        as extra samples. Neither goes into the training LandmarkCache: these landmarks were tracked in
+        video mode, while training and preprocessing detect every image on its own.
+
+        Args:
+            output_folder (str): data_model/<gesture>
+            prefix (str): File name prefix of this session
+            save_images (bool, optional): Write JPEGs, else only landmarks. Defaults to True.
+            queue_size (int, optional): Samples buffered before new ones are dropped. Defaults to 256.
+            flush_every (int, optional): Samples between landmark file flushes. Defaults to 500.
+        """
+        self.output_folder = output_folder
+        self.prefix = prefix
+        self.save_images = save_images
+        self.flush_every = flush_every
+        suffix = IMAGE_LANDMARKS_SUFFIX if save_images else ".npy"
+        self.landmarks_path = os.path.join(output_folder, prefix + suffix)
+        self.landmarks = []
+
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="SampleWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: np.ndarray, landmarks: np.ndarray = None) -> bool:
+        """Queues one sample without blocking. Returns False when it was dropped.
+
+        Args:
+            frame (np.ndarray): BGR frame, must not be modified afterwards
+            landmarks (np.ndarray, optional): (63,) landmarks, None when no hand was detected
+        """
+        try:
+            self._queue.put_nowait((frame, landmarks))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, landmarks = item
+            if self.save_images:
+                path = os.path.join(self.output_folder, f"{self.prefix}_{self.written:05d}.jpg")
+                cv2.imwrite(path, frame)
+                self.landmarks.append(np.zeros(LANDMARK_DIM, dtype=np.float32) if landmarks is None else landmarks)
+            elif landmarks is not None:
+                self.landmarks.append(landmarks)
+            self.written += 1
+            if self.written % self.flush_every == 0:
+                self._flush()
+        self._flush()
+
+    def _flush(self) -> None:
+        if self.landmarks:
+            # Rewritten as a whole through a temporary file, so an interrupted session keeps a valid file
+            np.save(self.landmarks_path + ".tmp.npy", np.stack(self.landmarks).astype(np.float32))
+            os.replace(self.landmarks_path + ".tmp.npy", self.landmarks_path)
+
+    def close(self) -> None:
+        """Writes every queued sample and flushes the outputs"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+def landmark_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean distance between corresponding landmarks of two (63,) vectors, in normalized image units"""
+    return float(np.linalg.norm((a - b).reshape(21, 3), axis=1).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture training samples for one gesture")
+    parser.add_argument("--gesture", default="rotate", help="Label, samples go to <out-dir>/<gesture>")
+    parser.add_argument("--out-dir", default="data_model")
+    parser.add_argument("--camera", default="1", help="Camera index, or a video file / image directory")
+    parser.add_argument("--no-images", action="store_true",
+                        help="Only store landmarks (<gesture>_<session>.npy), no JPEGs")
+    parser.add_argument("--min-distance", type=float, default=0.01,
+                        help="In burst mode, skip frames whose landmarks moved less than this since the last kept one")
+    parser.add_argument("--max-samples", type=int, default=None, help="Stop a burst after this many samples")
+    parser.add_argument("--queue-size", type=int, default=256, help="Samples buffered for the writer thread")
+    parser.add_argument("--min-detection-confidence", type=float, default=0.5)
+    args = parser.parse_args()
+
+    # Define the folder path where samples will be saved (data_model/<gesture>)
+    gesture_name = args.gesture
+    output_folder = os.path.join(args.out_dir, gesture_name)
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"Created folder: {output_folder}")
+
+    import mediapipe as mp
+    mp_hands = mp.solutions.hands
+    mp_drawing = mp.solutions.drawing_utils
+    # Video mode tracks the hand between frames, which is what keeps burst capture at camera rate
+    hands = mp_hands.Hands(
+        static_image_mode=False,
+        max_num_hands=1,
+        min_detection_confidence=args.min_detection_confidence,
+        min_tracking_confidence=0.5
+    )
+    cap = open_frame_source(args.camera)
+    session = time.strftime("%Y%m%d-%H%M%S")
+    writer = SampleWriter(output_folder, f"{gesture_name}_{session}", save_images=not args.no_images,
+                          queue_size=args.queue_size)
+
+    burst = False
+    kept = skipped = 0
+    last_kept = None
+    burst_started = None
+    burst_first = 0 # kept count when the burst started
+    print("Press 'c' to capture one frame, 'b' to start/stop a burst, 'q' to quit.")
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("Failed to grab frame.")
+            break
+
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        landmarks = None
+        if results.multi_hand_landmarks:
+            landmarks = landmarks_to_array(results.multi_hand_landmarks[:1]).reshape(LANDMARK_DIM)
+
+        key = cv2.waitKey(1) & 0xFF
+        captured = False
+        if key == ord('b'):
+            burst = not burst
+            burst_started = time.perf_counter() if burst else None
+            burst_first = kept
+            print("Burst started" if burst else f"Burst stopped, {kept} samples kept")
+        elif key == ord('c') and (landmarks is not None or not args.no_images):
+            captured = True
+            if writer.submit(frame, landmarks):
+                kept += 1
+                print(f"Captured sample {kept}")
+            else:
+                print("Sample dropped, the writer queue is full")
+        elif key == ord('q'):
+            break
+
+        # Burst mode keeps every frame with a hand that differs enough from the last kept one. A frame
+        # captured with 'c' is not submitted twice
+        if burst and landmarks is not None and not captured:
+            if last_kept is not None and landmark_distance(landmarks, last_kept) < args.min_distance:
+                skipped += 1
+            elif writer.submit(frame, landmarks):
+                kept += 1
+                last_kept = landmarks
+            if args.max_samples and kept >= args.max_samples:
+                burst = False
+                print(f"Burst stopped after {args.max_samples} samples")
+
+        # The submitted frame belongs to the writer now, annotations go on a copy
+        preview = frame.copy()
+        if results.multi_hand_landmarks:
+            mp_drawing.draw_landmarks(preview, results.multi_hand_landmarks[0], mp_hands.HAND_CONNECTIONS)
+        status = f"BURST {(kept - burst_first) / (time.perf_counter() - burst_started):.0f}/s" if burst else "'c' capture, 'b' burst, 'q' quit"
+        cv2.putText(preview, f"{status}  kept {kept}  dup {skipped}  dropped {writer.dropped}  queued {writer.pending()}",
+                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.imshow(f"Capture Gesture - {gesture_name}", preview)
+
+    # Release the capture and close windows
+    cap.release()
+    cv2.destroyAllWindows()
+    hands.close()
+    print(f"Writing {writer.pending()} queued samples...")
+    writer.close()
+    print(f"{writer.written} samples written to {output_folder} ({skipped} near-duplicates skipped, "
+          f"{writer.dropped} dropped by a full queue)")
+
 
-# Define the folder path where images will be saved (data/rotate)
-gesture_name = "rotate"
-output_folder = os.path.join("data_model", gesture_name)
-
-# Create the folder if it doesn't exist
-if not os.path.exists(output_folder):
-    os.makedirs(output_folder)
-    print(f"Created folder: {output_folder}")
-
-# Initialize video capture (0 for default webcam)
-cap = cv2.VideoCapture(1)
-
-# Initialize a counter to name captured images
-img_counter = 0
-
-print("Press 'c' to capture an image, 'q' to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame.")
-        break
-
-    # Display instructions on the frame
-    cv2.putText(frame, "Press 'c' to capture, 'q' to quit", (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-
-    # Show the frame
-    cv2.imshow("Capture Gesture - Rotate", frame)
-
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('c'):
-        # Build the filename and save the image
-        img_name = f"{gesture_name}_{img_counter:03d}.jpg"
-        save_path = os.path.join(output_folder, img_name)
-        cv2.imwrite(save_path, frame)
-        print(f"Captured {save_path}")
-        img_counter += 1
-    elif key == ord('q'):
-        break
-
-# Release the capture and close windows
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import pytest
+import torch
+from src.augment import LandmarkAugmenter, mirror_label_map
+
+
+@pytest.mark.parametrize("shape", [(4, 63), (4, 21, 3), (4, 5, 63)])
+def test_augmenter_keeps_shape_dtype_and_missing_hands(shape):
+    generator = torch.Generator().manual_seed(0)
+    features = torch.rand(shape, generator=generator, dtype=torch.float64)
+    features[1] = 0.0
+    augmented, labels = LandmarkAugmenter(generator=generator)(features)
+    assert augmented.shape == features.shape and augmented.dtype == features.dtype
+    assert labels is None
+    assert (augmented[1] == 0).all()
+    assert not torch.equal(augmented[0], features[0])
+
+
+def test_frames_of_a_window_share_one_transform():
+    generator = torch.Generator().manual_seed(0)
+    frame = torch.rand(63, generator=generator)
+    window = frame.repeat(2, 3, 1)
+    augmented, _ = LandmarkAugmenter(jitter_std=0.0, generator=generator)(window)
+    torch.testing.assert_close(augmented[:, 0], augmented[:, 1])
+    torch.testing.assert_close(augmented[:, 0], augmented[:, 2])
+
+
+def test_mirroring_swaps_left_and_right_labels():
+    names = ["swipe_left", "swipe_right", "fist", "point_left"]
+    assert mirror_label_map(names) == [1, 0, 2, None]
+
+    augmenter = LandmarkAugmenter(rotation_deg=(0, 0, 0), scale=(1, 1), translation=0.0, jitter_std=0.0,
+                                  mirror_prob=1.0, mirror_labels=mirror_label_map(names))
+    features = torch.rand(4, 21, 3)
+    augmented, labels = augmenter(features, torch.tensor([0, 1, 2, 3]))
+    assert labels.tolist() == [1, 0, 2, 3]
+    torch.testing.assert_close(augmented[:3, :, 0], 1.0 - features[:3, :, 0])
+    # A class without a mirrored counterpart is left alone
+    torch.testing.assert_close(augmented[3], features[3])
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+from src.dataset import LandmarkCache
+
+
+def write_image(path, content: bytes) -> str:
+    with open(path, 'wb') as f:
+        f.write(content)
+    return str(path)
+
+
+def test_landmark_cache_persists_rows(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = write_image(tmp_path / "a.png", b"a")
+    second = write_image(tmp_path / "b.png", b"b")
+    cache = LandmarkCache(cache_dir)
+    assert cache.lookup(first) is None
+    cache.store(first, np.arange(63), True)
+    cache.store(second, np.zeros(63), False)
+    cache.flush()
+
+    reloaded = LandmarkCache(cache_dir)
+    assert len(reloaded) == 2
+    landmarks, detected = reloaded.lookup(first)
+    np.testing.assert_array_equal(landmarks, np.arange(63, dtype=np.float32))
+    assert detected
+    assert reloaded.lookup(second)[1] is False
+
+
+def test_landmark_cache_reuses_rows_by_content(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    image = write_image(tmp_path / "a.png", b"a")
+    cache = LandmarkCache(cache_dir)
+    cache.store(image, np.ones(63), True)
+    cache.flush()
+
+    # Touched but unchanged, and copied under another name: both found through the content hash
+    os.utime(image, ns=(0, 0))
+    copy = write_image(tmp_path / "copy.png", b"a")
+    cache = LandmarkCache(cache_dir)
+    assert cache.lookup(image) is not None
+    assert cache.lookup(copy) is not None
+    assert len(cache) == 1
+    # Changed content is a miss
+    write_image(tmp_path / "a.png", b"changed")
+    assert cache.lookup(image) is None
+
+
+def test_landmark_cache_is_invalidated_by_other_detector_settings(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    image = write_image(tmp_path / "a.png", b"a")
+    cache = LandmarkCache(cache_dir)
+    cache.store(image, np.ones(63), True)
+    cache.flush()
+
+    assert LandmarkCache(cache_dir, static_image_mode=True).lookup(image) is not None
+    assert LandmarkCache(cache_dir, static_image_mode=False).lookup(image) is None
+    assert LandmarkCache(cache_dir, min_detection_confidence=0.7).lookup(image) is None
+
+
+def test_flush_compacts_rows_of_rewritten_and_deleted_images(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    kept = write_image(tmp_path / "kept.png", b"kept")
+    rewritten = write_image(tmp_path / "rewritten.png", b"old")
+    deleted = write_image(tmp_path / "deleted.png", b"deleted")
+    cache = LandmarkCache(cache_dir)
+    for value, image in enumerate((kept, rewritten, deleted)):
+        cache.store(image, np.full(63, value), True)
+    cache.flush()
+
+    write_image(tmp_path / "rewritten.png", b"new")
+    os.remove(deleted)
+    cache = LandmarkCache(cache_dir)
+    assert cache.lookup(rewritten) is None
+    cache.store(rewritten, np.full(63, 7), True)
+    cache.flush()
+
+    reloaded = LandmarkCache(cache_dir)
+    assert len(reloaded) == 2 and set(reloaded.entries) == {kept, rewritten}
+    assert reloaded.lookup(kept)[0][0] == 0 and reloaded.lookup(rewritten)[0][0] == 7
+
+
+def test_flush_writes_entries_found_by_content_alone(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    image = write_image(tmp_path / "a.png", b"a")
+    cache = LandmarkCache(cache_dir)
+    cache.store(image, np.ones(63), True)
+    cache.flush()
+
+    copy = write_image(tmp_path / "copy.png", b"a")
+    cache = LandmarkCache(cache_dir)
+    assert cache.lookup(copy) is not None
+    cache.flush()
+    assert os.path.abspath(copy) in LandmarkCache(cache_dir).entries
+
+    # Every image gone: the cache empties instead of keeping their rows
+    os.remove(image)
+    os.remove(copy)
+    cache = LandmarkCache(cache_dir)
+    cache.flush()
+    assert len(LandmarkCache(cache_dir)) == 0
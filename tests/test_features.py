@@ -0,0 +1,34 @@
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+from src.features import landmarks_to_array
+
+
+def hand(points: np.ndarray, visibility: bool = False) -> landmark_pb2.NormalizedLandmarkList:
+    proto = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points:
+        landmark = proto.landmark.add(x=x, y=y, z=z)
+        if visibility:
+            landmark.visibility = 0.5
+    return proto
+
+
+def test_landmarks_to_array_matches_the_protos():
+    points = np.random.default_rng(0).random((2, 21, 3), dtype=np.float32)
+    # The second hand carries visibility and takes the generic path
+    array = landmarks_to_array([hand(points[0]), hand(points[1], visibility=True)])
+    assert array.dtype == np.float32 and array.shape == (2, 21, 3)
+    np.testing.assert_array_equal(array, points)
+    np.testing.assert_array_equal(landmarks_to_array([hand(points[0])]), points[:1])
+
+
+def test_landmarks_to_array_without_hands():
+    assert landmarks_to_array(None).shape == (0, 21, 3)
+    assert landmarks_to_array([]).shape == (0, 21, 3)
+
+
+def test_landmarks_to_array_writes_into_out():
+    points = np.random.default_rng(1).random((1, 21, 3), dtype=np.float32)
+    out = np.zeros((2, 21, 3), dtype=np.float32)
+    array = landmarks_to_array([hand(points[0])], out)
+    assert np.shares_memory(array, out)
+    np.testing.assert_array_equal(out[0], points[0])
@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+import pytest
+from src.frame_source import FrameSource, ImageDirectorySource
+
+
+def write_frames(directory, values):
+    for index, value in enumerate(values):
+        cv2.imwrite(str(directory / f"{index:03d}.png"), np.full((4, 4, 3), value, dtype=np.uint8))
+
+
+def test_frame_source_requires_next():
+    with pytest.raises(TypeError):
+        FrameSource(30.0)
+
+
+def test_unreadable_images_are_skipped(tmp_path, capsys):
+    write_frames(tmp_path, [10, 20])
+    (tmp_path / "001b.png").write_bytes(b"not an image")
+    with ImageDirectorySource(str(tmp_path), fps=10.0, loop=True) as source:
+        values = []
+        for _ in range(4):
+            ok, frame = source.read()
+            assert ok
+            values.append(int(frame[0, 0, 0]))
+        assert values == [10, 20, 10, 20]
+        # Skipped images leave no gap in the timestamps
+        assert source.timestamp == pytest.approx(0.3)
+    assert capsys.readouterr().out.count("Skipping unreadable image") == 1
+
+
+def test_stream_ends_after_the_last_image(tmp_path):
+    write_frames(tmp_path, [10])
+    (tmp_path / "zz.png").write_bytes(b"")
+    source = ImageDirectorySource(str(tmp_path))
+    assert source.read()[0]
+    assert source.read() == (False, None)
+
+
+def test_directory_without_readable_images_ends_even_when_looping(tmp_path):
+    (tmp_path / "a.png").write_bytes(b"")
+    assert ImageDirectorySource(str(tmp_path), loop=True).read() == (False, None)
@@ -0,0 +1,62 @@
+import numpy as np
+from src.gesture_index import GestureIndex
+
+
+def clusters(center: float, count: int = 6, seed: int = 0) -> np.ndarray:
+    return center + np.random.default_rng(seed).normal(scale=0.01, size=(count, 4)).astype(np.float32)
+
+
+def test_add_and_classify():
+    index = GestureIndex(k=3)
+    assert index.add("fist", clusters(1.0)) == 0
+    assert index.add("palm", clusters(2.0)) == 1
+    # All-zero rows are frames without a hand
+    index.add("palm", np.zeros((2, 4), dtype=np.float32))
+    assert len(index) == 12 and index.counts() == {"fist": 6, "palm": 6}
+    scores = index(np.array([[1.0] * 4, [2.0] * 4], dtype=np.float32))
+    assert scores.argmax(axis=1).tolist() == [0, 1]
+    np.testing.assert_allclose(scores.sum(axis=1), 1.0, rtol=1e-5)
+
+
+def test_remove_keeps_the_other_indices():
+    index = GestureIndex(k=3)
+    for gesture, center in (("fist", 1.0), ("palm", 2.0), ("wave", 3.0)):
+        index.add(gesture, clusters(center))
+    assert index.remove("palm") == 6
+    assert index.class_names == {0: "fist", 2: "wave"}
+    assert index(np.full((1, 4), 3.0, dtype=np.float32)).argmax() == 2
+    # A new gesture gets a fresh index
+    assert index.add("point", clusters(4.0)) == 3
+
+
+def test_unknown_beyond_max_distance():
+    index = GestureIndex(k=1, max_distance=0.5)
+    index.add("fist", clusters(1.0))
+    scores = index(np.array([[1.0] * 4, [9.0] * 4], dtype=np.float32))
+    assert scores.shape == (2, 2)
+    assert scores.argmax(axis=1).tolist() == [0, 1]
+
+
+def test_save_load_round_trip(tmp_path):
+    index = GestureIndex(k=2, max_distance=0.75, features={"normalize": True, "angles": True})
+    index.add("fist", clusters(1.0))
+    index.add("palm", clusters(2.0))
+    index.remove("fist")
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    loaded = GestureIndex.load(path)
+    assert (loaded.k, loaded.max_distance, loaded.features) == (2, 0.75, {"normalize": True, "angles": True})
+    assert loaded.class_names == {1: "palm"} and len(loaded) == 6
+    queries = clusters(2.0, 3, seed=1)
+    np.testing.assert_allclose(loaded(queries), index(queries), rtol=1e-5)
+
+
+def test_an_empty_feature_spec_means_raw_landmarks(tmp_path):
+    index = GestureIndex(features={})
+    assert index.features == {}
+    index.add("fist", clusters(1.0))
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    assert GestureIndex.load(path).features == {}
+    assert GestureIndex().features == {"normalize": True}
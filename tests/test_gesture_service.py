@@ -0,0 +1,87 @@
+import time
+import numpy as np
+import pytest
+from src.frame_ring import FrameRing
+from src.gesture_service import (MSG_ACK, MSG_RESULT, ACK, GestureServiceClient, RecognitionServer, ServiceEvent,
+                                 _MessageReader, decode_result, encode_message, encode_result)
+
+CLASS_NAMES = {0: "fist", 1: "palm"}
+
+
+def make_event(hands: int = 2, estimated: bool = False) -> ServiceEvent:
+    landmarks = np.random.default_rng(hands).random((hands, 21, 3), dtype=np.float32)
+    return ServiceEvent(12.5, ["palm", "wave"][:hands], landmarks, ["Right", "Left"][:hands], estimated, 0, 0)
+
+
+def test_result_round_trip():
+    event = make_event()
+    message = encode_result(7, 3, event, {name: idx for idx, name in CLASS_NAMES.items()})
+    [(kind, payload)] = _MessageReader().feed(message)
+    assert kind == MSG_RESULT
+
+    decoded = decode_result(payload, CLASS_NAMES)
+    assert (decoded.seq, decoded.frame, decoded.timestamp, decoded.estimated) == (7, 3, 12.5, False)
+    # Gestures the service does not know travel as -1 and come back as Unknown
+    assert decoded.gestures == ["palm", "Unknown"]
+    assert decoded.handedness == ["Right", "Left"]
+    np.testing.assert_array_equal(decoded.landmarks, event.landmarks)
+
+
+def test_result_without_hands_keeps_the_estimated_flag():
+    decoded = decode_result(_MessageReader().feed(encode_result(1, 0, make_event(0, True), {}))[0][1], CLASS_NAMES)
+    assert decoded.gestures == [] and decoded.landmarks.shape == (0, 21, 3)
+    assert decoded.estimated
+
+
+def test_message_reader_reassembles_split_and_coalesced_messages():
+    acks = [encode_message(MSG_ACK, ACK.pack(seq, seq / 10)) for seq in range(3)]
+    stream = b"".join(acks)
+    reader = _MessageReader()
+    # Split inside the first header, then the rest of the first message and all of the other two at once
+    assert reader.feed(stream[:3]) == []
+    messages = reader.feed(stream[3:])
+    assert [ACK.unpack(payload) for kind, payload in messages] == [(seq, seq / 10) for seq in range(3)]
+    assert all(kind == MSG_ACK for kind, _ in messages)
+    assert not reader.buffer
+
+
+def test_frame_ring_write_read_and_overwrite():
+    with FrameRing.create((4, 6, 3), slots=2) as ring:
+        frames = [np.full((4, 6, 3), value, dtype=np.uint8) for value in (1, 2, 3)]
+        seqs = [ring.write(frame, float(t)) for t, frame in enumerate(frames)]
+        assert seqs == [1, 2, 3] and ring.latest == 3
+        with FrameRing.attach(ring.name) as reader:
+            np.testing.assert_array_equal(reader.read(3), frames[2])
+            assert reader.timestamp(2) == 1.0
+            # Frame 1 shared its slot with frame 3
+            assert reader.read(1) is None
+        with pytest.raises(ValueError):
+            ring.write(np.zeros((4, 6), dtype=np.uint8), 0.0)
+
+
+def test_server_sends_an_event_to_a_client(tmp_path):
+    server = RecognitionServer(str(tmp_path / "gestures.sock"), CLASS_NAMES).start()
+    client = None
+    try:
+        # Clients are greeted once the first frame created the ring
+        frame = np.full((8, 8, 3), 42, dtype=np.uint8)
+        seq = server.publish_frame(frame, time.perf_counter())
+        client = GestureServiceClient(server.address, name="test", preview=False).start()
+        assert client.class_names == CLASS_NAMES
+
+        event = make_event(1)._replace(timestamp=time.perf_counter())
+        received = None
+        deadline = time.perf_counter() + 5.0
+        while received is None and time.perf_counter() < deadline:
+            # The client may subscribe after the first publish, which only reaches greeted clients
+            server.publish(event, frame=seq)
+            time.sleep(0.05)
+            received = client.events.poll()
+        assert received is not None
+        assert received.gestures == ["palm"] and received.handedness == ["Right"]
+        np.testing.assert_array_equal(received.landmarks, event.landmarks)
+        np.testing.assert_array_equal(client.frame(received.frame), frame)
+    finally:
+        if client is not None:
+            client.stop()
+        server.stop()
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+from src.features import landmarks_to_array
+from src.hand_roi import HandRoiTracker
+
+
+class BrightSquareHands:
+    """Stands in for mp.solutions.hands.Hands: the 'hand' is the bright square of the input"""
+    def __init__(self):
+        self.resets = 0
+
+    def process(self, rgb):
+        ys, xs = np.nonzero(rgb[..., 0] > 128)
+        if len(xs) == 0:
+            return SimpleNamespace(multi_hand_landmarks=None)
+        height, width = rgb.shape[:2]
+        hand = landmark_pb2.NormalizedLandmarkList()
+        for t in np.linspace(0.0, 1.0, 21):
+            hand.landmark.add(x=(xs.min() + t * (xs.max() - xs.min())) / width,
+                              y=(ys.min() + t * (ys.max() - ys.min())) / height, z=0.0)
+        return SimpleNamespace(multi_hand_landmarks=[hand])
+
+    def reset(self):
+        self.resets += 1
+
+
+def frame_with_hand(x: int, y: int, side: int = 40) -> np.ndarray:
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[y:y + side, x:x + side] = 255
+    return frame
+
+
+def test_region_is_held_while_the_hand_stays_inside():
+    hands = BrightSquareHands()
+    tracker = HandRoiTracker(full_frame_every=0)
+    tracker.process(hands, frame_with_hand(300, 200))
+    regions = []
+    for step in range(5):
+        results = tracker.process(hands, frame_with_hand(300 + 2 * step, 200))
+        regions.append(tracker.region)
+        # Landmarks come back in full-frame coordinates
+        wrist = landmarks_to_array(results.multi_hand_landmarks)[0, 0, :2]
+        np.testing.assert_allclose(wrist, [(300 + 2 * step) / 640, 200 / 480], atol=2e-3)
+    assert regions[0] is not None and all(region == regions[0] for region in regions)
+    # Full frame -> first crop is the only change of coordinates the graph saw
+    assert hands.resets == tracker.region_changes == 1
+
+
+def test_region_moves_and_resets_the_graph_when_the_hand_leaves_it():
+    hands = BrightSquareHands()
+    tracker = HandRoiTracker(full_frame_every=0, retry_full_frame=False)
+    tracker.process(hands, frame_with_hand(100, 100))
+    tracker.process(hands, frame_with_hand(100, 100))
+    first = tracker.region
+    # The region is predicted from the previous frame, the jump shows one frame later
+    tracker.process(hands, frame_with_hand(150, 100))
+    tracker.process(hands, frame_with_hand(150, 100))
+    assert tracker.region != first
+    assert hands.resets == tracker.region_changes == 2
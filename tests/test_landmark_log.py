@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import numpy as np
+from src.landmark_log import HEADER_DTYPE, RECORD_DTYPE, LandmarkLog, LandmarkLogWriter
+
+# The worker modules import each other by bare module name, as when src/scene.py is run directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def hands(count: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).random((count, 21, 3), dtype=np.float32)
+
+
+def write_log(path, frames):
+    with LandmarkLogWriter(str(path)) as writer:
+        for timestamp, landmarks, handedness in frames:
+            writer.write(timestamp, landmarks, handedness, [0.9] * len(landmarks))
+
+
+def test_frames_round_trip_including_frames_without_hands(tmp_path):
+    path = tmp_path / "hands.lmlog"
+    frames = [(0.0, hands(1, 1), ["Left"]), (0.1, hands(0), []), (0.2, hands(2, 2), ["Right"])]
+    write_log(path, frames)
+
+    log = LandmarkLog(str(path))
+    assert len(log) == 3
+    np.testing.assert_allclose(log.timestamps, [0.0, 0.1, 0.2])
+    empty = log.frame(1)
+    assert empty.landmarks.shape == (0, 21, 3) and empty.handedness == []
+    last = log.frame(2)
+    np.testing.assert_array_equal(last.landmarks, frames[2][1])
+    # Missing handedness is stored as unknown
+    assert last.handedness == ["Right", "Unknown"]
+    assert log.hand_landmarks().shape == (3, 63)
+
+
+def test_record_cut_short_by_a_crash_is_ignored_and_dropped_on_append(tmp_path):
+    path = tmp_path / "hands.lmlog"
+    write_log(path, [(0.0, hands(1), ["Left"]), (0.1, hands(1, 1), ["Right"])])
+    with open(path, 'ab') as f:
+        f.write(b"\0" * (RECORD_DTYPE.itemsize // 2))
+    assert len(LandmarkLog(str(path))) == 2
+
+    # Reopening truncates the torn record, appended frames stay aligned and keep counting
+    with LandmarkLogWriter(str(path)) as writer:
+        assert writer.frames == 2
+        writer.write(0.2, hands(1, 2), ["Left"])
+    assert (os.path.getsize(path) - HEADER_DTYPE.itemsize) % RECORD_DTYPE.itemsize == 0
+    log = LandmarkLog(str(path))
+    assert len(log) == 3
+    assert log.records["frame"].tolist() == [0, 1, 2]
+    np.testing.assert_array_equal(log.frame(2).landmarks, hands(1, 2))
+
+
+def test_replay_worker_publishes_the_recorded_frames(tmp_path):
+    from gesture_worker import LandmarkReplayWorker
+    path = tmp_path / "hands.lmlog"
+    write_log(path, [(0.0, hands(1), ["Left"]), (0.01, hands(0), []), (0.02, hands(2, 1), ["Left", "Right"])])
+
+    classifier = lambda features: np.tile([[0.0, 1.0]], (len(features), 1)).astype(np.float32)
+    worker = LandmarkReplayWorker(str(path), classifier, {0: "fist", 1: "palm"}, speed=None, loop=False).start()
+    deadline = time.perf_counter() + 5.0
+    while worker.is_alive() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert not worker.is_alive()
+    # The mailbox keeps the newest event: the last frame
+    event = worker.events.poll()
+    assert event.gestures == ["palm", "palm"] and event.handedness == ["Left", "Right"]
+    np.testing.assert_array_equal(event.landmarks, hands(2, 1))
+    assert worker.events.poll() is None
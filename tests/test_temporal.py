@@ -0,0 +1,33 @@
+import numpy as np
+import torch
+from src.model import TemporalGestureClassifier
+from src.temporal import StreamingGestureRecognizer, StreamingTemporalModel
+
+
+def test_streaming_matches_batch_forward_after_receptive_field():
+    torch.manual_seed(0)
+    model = TemporalGestureClassifier(num_classes=3).eval()
+    window = model.receptive_field
+    streaming = StreamingTemporalModel.from_module(model)
+    frames = np.random.default_rng(0).random((window + 5, 63), dtype=np.float32)
+    for t, frame in enumerate(frames):
+        logits = streaming.step(frame)
+        if t >= window - 1:
+            with torch.no_grad():
+                expected = model(torch.from_numpy(frames[None, t - window + 1:t + 1])).numpy()[0]
+            np.testing.assert_allclose(logits, expected, atol=1e-5)
+
+
+def test_hands_with_the_same_label_keep_separate_histories():
+    torch.manual_seed(0)
+    model = TemporalGestureClassifier(num_classes=2).eval()
+    recognizer = StreamingGestureRecognizer(model, {0: "a", 1: "b"}, min_frames=1)
+    landmarks = np.random.default_rng(0).random((2, 63), dtype=np.float32)
+
+    gestures = recognizer.update(["Left", "Left"], landmarks)
+    assert len(gestures) == 2
+    assert recognizer.frames_seen == {"Left": 1, "Left#1": 1}
+
+    # The second hand leaving resets only its own history
+    recognizer.update(["Left"], landmarks[:1])
+    assert recognizer.frames_seen == {"Left": 2}
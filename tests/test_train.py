@@ -0,0 +1,19 @@
+import re
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, TensorDataset
+from scripts.train import train_model
+
+
+def test_constant_loss_is_reported_the_same_every_epoch(capsys):
+    # With lr=0 the weights never change, so every epoch has exactly the same mean loss
+    torch.manual_seed(0)
+    features = torch.randn(40, 63)
+    labels = torch.randint(0, 3, (40,))
+    loader = DataLoader(TensorDataset(features, labels), batch_size=16, shuffle=True)
+    train_model(nn.Linear(63, 3), loader, loader, num_epochs=3, lr=0.0)
+
+    losses = [float(loss) for loss in re.findall(r"Training Loss: ([0-9.]+)", capsys.readouterr().out)]
+    assert len(losses) == 3
+    assert losses[0] > 0
+    assert losses == [losses[0]] * 3